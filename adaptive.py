@@ -0,0 +1,104 @@
+import re
+import threading
+
+from archive import get_profile
+from metrics import METRICS
+
+ADAPTIVE_PROFILE = "adaptive"
+
+# Candidate levels on the 7z scale; 0 means store (no compression).
+LEVELS = [0, 1, 3, 5, 7]
+
+_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "kB": 1024}
+_RATE_RE = re.compile(r"([\d.]+)\s*([kKMG]?B)/s")
+
+
+def parse_croc_rate(line):
+    """Extracts the transfer rate in bytes/s from a croc progress line, e.g. '(12/40 MB, 5.2 MB/s)'."""
+    match = _RATE_RE.search(line)
+    if not match:
+        return None
+    unit = match.group(2)
+    return float(match.group(1)) * _UNITS.get(unit, _UNITS.get(unit.upper(), 1))
+
+
+class AdaptiveCompression:
+    """
+    Picks the compression level for the next file from measured rates.
+    With archives prepared ahead of the sender, end-to-end raw throughput at a level
+    is bounded by min(compress rate, link rate / compression ratio). The controller
+    tracks both per level with an EWMA, uses the best known level, and now and then
+    probes a neighbouring level so it can follow changes in the link or the data.
+    """
+
+    def __init__(self, base_profile="default", start_level=3, alpha=0.3, probe_every=8):
+        self.base_profile = get_profile(base_profile)
+        self.alpha = alpha
+        self.probe_every = probe_every
+        self.level = start_level
+        self.link_bps = None
+        self.stats = {}
+        self._files = 0
+        self._probe_up = True
+        self._lock = threading.Lock()
+
+    def _ewma(self, old, new):
+        return new if old is None else old + self.alpha * (new - old)
+
+    def profile_for(self, level):
+        profile = dict(self.base_profile)
+        profile["level"] = level
+        if level == 0:
+            profile["method"] = "store"
+        elif profile["method"] == "store":
+            profile["method"] = "lzma2"
+        return profile
+
+    def record_compression(self, level, raw_bytes, packed_bytes, seconds):
+        if raw_bytes <= 0:
+            return
+        with self._lock:
+            entry = self.stats.setdefault(level, {"compress_bps": None, "ratio": None})
+            entry["compress_bps"] = self._ewma(entry["compress_bps"], raw_bytes / max(seconds, 1e-6))
+            entry["ratio"] = self._ewma(entry["ratio"], packed_bytes / raw_bytes)
+        METRICS.set(f"adaptive.level{level}.compress_bps", entry["compress_bps"])
+        METRICS.set(f"adaptive.level{level}.ratio", entry["ratio"])
+
+    def record_link(self, bytes_per_sec):
+        if not bytes_per_sec:
+            return
+        with self._lock:
+            self.link_bps = self._ewma(self.link_bps, bytes_per_sec)
+        METRICS.set("adaptive.link_bps", self.link_bps)
+
+    def estimate(self, level):
+        entry = self.stats.get(level)
+        if not entry or entry["compress_bps"] is None:
+            return None
+        if self.link_bps is None:
+            return entry["compress_bps"]
+        return min(entry["compress_bps"], self.link_bps / max(entry["ratio"], 1e-6))
+
+    def next_level(self):
+        with self._lock:
+            self._files += 1
+            previous = self.level
+            known = {lvl: self.estimate(lvl) for lvl in LEVELS if self.estimate(lvl) is not None}
+            if known:
+                self.level = max(known, key=known.get)
+
+            reason = "best-estimate"
+            if self.link_bps is not None and self._files % self.probe_every == 0:
+                index = LEVELS.index(self.level)
+                step = 1 if self._probe_up else -1
+                self._probe_up = not self._probe_up
+                if 0 <= index + step < len(LEVELS):
+                    self.level = LEVELS[index + step]
+                    reason = "probe"
+
+        METRICS.set("adaptive.level", self.level)
+        if self.level != previous:
+            METRICS.inc("adaptive.level_changes")
+            METRICS.event("adaptive.level_change", old=previous, new=self.level, reason=reason,
+                          link_bps=self.link_bps, estimate_bps=self.estimate(self.level))
+        return self.level
@@ -0,0 +1,438 @@
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import time
+import zipfile
+import logging
+import importlib.util
+
+# zstandard is optional and only imported when a zstd archive is actually handled.
+HAS_ZSTD = importlib.util.find_spec("zstandard") is not None
+
+
+# ==========================================
+# COMPRESSION PROFILES
+# ==========================================
+# method: "store" | "deflate" | "lzma2" | "zstd"; level: 0-9 (7z scale);
+# threads: 0 = all cores; dictionary / solid: 7z -md / -ms values.
+COMPRESSION_PROFILES = {
+    "default": {"method": "lzma2", "level": 3, "threads": 0, "dictionary": "", "solid": ""},
+    "lan-fast": {"method": "lzma2", "level": 1, "threads": 0, "dictionary": "1m", "solid": "off"},
+    "wan-small": {"method": "lzma2", "level": 7, "threads": 0, "dictionary": "64m", "solid": "on"},
+    "archive": {"method": "lzma2", "level": 9, "threads": 2, "dictionary": "256m", "solid": "on"},
+    "store": {"method": "store", "level": 0, "threads": 1, "dictionary": "", "solid": "off"},
+}
+
+
+def get_profile(name):
+    return COMPRESSION_PROFILES.get(name) or COMPRESSION_PROFILES["default"]
+
+
+def is_store_profile(profile):
+    return profile["method"] == "store" or profile["level"] == 0
+
+
+# ==========================================
+# BACKEND INTERFACE
+# ==========================================
+class ArchiveBackend:
+    """
+    Packs one file or folder into a single archive and unpacks it again.
+    The archive extension identifies the backend, so the receiver can dispatch
+    on the file name alone. Native formats use a ".croc." marker so that plain
+    .zip files a user sends are delivered untouched.
+    """
+    name = None
+    extension = None
+
+    def __init__(self, profile=None):
+        self.profile = profile or COMPRESSION_PROFILES["default"]
+
+    def available(self):
+        return True
+
+    def compress(self, source, out_path, startupinfo=None, base_dir=None, path_filter=None):
+        """
+        Stores `source` under its own name, or under its path relative to `base_dir` if given.
+        A folder source only takes what `path_filter` (pathfilter.PathFilter) accepts.
+        """
+        raise NotImplementedError
+
+    def test(self, archive_path, startupinfo=None):
+        raise NotImplementedError
+
+    def extract(self, archive_path, out_dir, startupinfo=None, syncer=None):
+        """`syncer` (assembly.SyncBatch) collects the written files for a batched fsync."""
+        raise NotImplementedError
+
+
+class SevenZipBackend(ArchiveBackend):
+    name = "7z"
+    extension = ".7z"
+
+    def __init__(self, _7z_path, profile=None):
+        super().__init__(profile)
+        self._7z_path = _7z_path
+
+    def available(self):
+        return bool(self._7z_path)
+
+    def _run(self, args, startupinfo, cwd=None):
+        res = subprocess.run([self._7z_path] + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                             startupinfo=startupinfo, cwd=cwd)
+        return res.returncode == 0
+
+    def compression_args(self):
+        p = self.profile
+        if p["method"] == "store" or p["level"] == 0:
+            return ["-mx=0", "-m0=Copy"]
+        args = [f"-mx={p['level']}", f"-m0={'Deflate' if p['method'] == 'deflate' else 'LZMA2'}"]
+        from tools import TOOLS
+        if TOOLS.supports("7z", "multithread"):
+            args.append(f"-mmt={p['threads']}" if p.get("threads") else "-mmt=on")
+        if p.get("dictionary"):
+            args.append(f"-md={p['dictionary']}")
+        if p.get("solid"):
+            args.append(f"-ms={p['solid']}")
+        return args
+
+    def compress(self, source, out_path, startupinfo=None, base_dir=None, path_filter=None):
+        members = _filtered_members(source, path_filter)
+        if members is not None:
+            # Only some files pass the filter: hand 7z the exact list, relative to where it runs.
+            cwd = base_dir or os.path.dirname(os.path.normpath(source))
+            fd, list_path = tempfile.mkstemp(suffix=".lst")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.writelines(os.path.relpath(m, cwd) + "\n" for m in members)
+                return self._run(["a", "-scsUTF-8"] + self.compression_args() + [os.path.abspath(out_path),
+                                                                                  "@" + list_path],
+                                 startupinfo, cwd=cwd)
+            finally:
+                os.remove(list_path)
+        if base_dir:
+            # 7z stores paths as given on the command line, so run it from the base folder.
+            return self._run(["a"] + self.compression_args() + [os.path.abspath(out_path),
+                                                                 os.path.relpath(source, base_dir)],
+                             startupinfo, cwd=base_dir)
+        return self._run(["a"] + self.compression_args() + [out_path, source], startupinfo)
+
+    def test(self, archive_path, startupinfo=None):
+        return self._run(["t", archive_path], startupinfo)
+
+    def extract(self, archive_path, out_dir, startupinfo=None, syncer=None):
+        if not syncer:
+            return self._run(["x", "-y", archive_path, f"-o{out_dir}"], startupinfo)
+        # out_dir may already hold the rest of the batch: extracting into a fresh folder
+        # first means only this archive's members are handed to the syncer.
+        os.makedirs(out_dir, exist_ok=True)
+        fresh = tempfile.mkdtemp(prefix=".extract-", dir=out_dir)
+        try:
+            if not self._run(["x", "-y", archive_path, f"-o{fresh}"], startupinfo):
+                return False
+            _merge_tree(fresh, out_dir, syncer)
+            return True
+        except OSError as e:
+            logging.error(f"7z backend extract failed for {archive_path}: {e}")
+            return False
+        finally:
+            shutil.rmtree(fresh, ignore_errors=True)
+
+
+class ZipBackend(ArchiveBackend):
+    """In-process deflate zip; no child process per file."""
+    name = "zip"
+    extension = ".croc.zip"
+
+    def compress(self, source, out_path, startupinfo=None, base_dir=None, path_filter=None):
+        try:
+            stored = self.profile["method"] == "store" or self.profile["level"] == 0
+            with zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED,
+                                 compresslevel=None if stored else min(9, self.profile["level"])) as zf:
+                for path, arcname in _iter_members(source, base_dir, path_filter):
+                    zf.write(path, arcname)
+            return True
+        except (OSError, zipfile.BadZipFile) as e:
+            logging.error(f"Zip backend compress failed for {source}: {e}")
+            return False
+
+    def test(self, archive_path, startupinfo=None):
+        try:
+            with zipfile.ZipFile(archive_path) as zf:
+                return zf.testzip() is None
+        except (OSError, zipfile.BadZipFile):
+            return False
+
+    def extract(self, archive_path, out_dir, startupinfo=None, syncer=None):
+        try:
+            with zipfile.ZipFile(archive_path) as zf:
+                for info in zf.infolist():
+                    target = _safe_target(out_dir, info.filename)
+                    if info.is_dir():
+                        os.makedirs(target, exist_ok=True)
+                        continue
+                    with zf.open(info) as src:
+                        _assemble(src, target, info.file_size, syncer)
+            return True
+        except (OSError, zipfile.BadZipFile) as e:
+            logging.error(f"Zip backend extract failed for {archive_path}: {e}")
+            return False
+
+
+class TarZstdBackend(ArchiveBackend):
+    """In-process streaming tar + zstd. Needs the optional `zstandard` package."""
+    name = "zstd"
+    extension = ".croc.tar.zst"
+
+    def available(self):
+        return HAS_ZSTD
+
+    def compress(self, source, out_path, startupinfo=None, base_dir=None, path_filter=None):
+        import zstandard
+        try:
+            # zstd levels run 1-19; stretch the 7z 0-9 scale over them.
+            level = max(1, min(19, self.profile["level"] * 2))
+            cctx = zstandard.ZstdCompressor(level=level, threads=self.profile.get("threads") or -1)
+            with open(out_path, "wb") as fh, cctx.stream_writer(fh) as writer:
+                with tarfile.open(fileobj=writer, mode="w|") as tar:
+                    arcname = os.path.relpath(source, base_dir) if base_dir else os.path.basename(os.path.normpath(source))
+                    tar.add(source, arcname=arcname, filter=_tar_filter(arcname, path_filter))
+            return True
+        except (OSError, tarfile.TarError, zstandard.ZstdError) as e:
+            logging.error(f"Zstd backend compress failed for {source}: {e}")
+            return False
+
+    def test(self, archive_path, startupinfo=None):
+        import zstandard
+        try:
+            with open(archive_path, "rb") as fh, zstandard.ZstdDecompressor().stream_reader(fh) as reader:
+                with tarfile.open(fileobj=reader, mode="r|") as tar:
+                    for member in tar:
+                        if member.isfile():
+                            tar.extractfile(member).read()
+            return True
+        except (OSError, tarfile.TarError, zstandard.ZstdError):
+            return False
+
+    def extract(self, archive_path, out_dir, startupinfo=None, syncer=None):
+        import zstandard
+        try:
+            with open(archive_path, "rb") as fh, zstandard.ZstdDecompressor().stream_reader(fh) as reader:
+                with tarfile.open(fileobj=reader, mode="r|") as tar:
+                    _extract_tar_stream(tar, out_dir, syncer)
+            return True
+        except (OSError, tarfile.TarError, zstandard.ZstdError) as e:
+            logging.error(f"Zstd backend extract failed for {archive_path}: {e}")
+            return False
+
+
+# ==========================================
+# HELPERS
+# ==========================================
+def _iter_members(source, base_dir=None, path_filter=None):
+    """Yields (path, arcname) pairs, keeping the source's own name (or path under base_dir) as the top level."""
+    source = os.path.normpath(source)
+    base = base_dir or os.path.dirname(source)
+    if not os.path.isdir(source):
+        yield source, os.path.relpath(source, base)
+        return
+    for root, dirs, files in (path_filter.walk(source) if path_filter else os.walk(source)):
+        yield root, os.path.relpath(root, base)
+        for f in files:
+            full = os.path.join(root, f)
+            yield full, os.path.relpath(full, base)
+
+
+def _filtered_members(source, path_filter):
+    """The files of a folder that pass the filter, or None if the filter leaves it whole."""
+    if not path_filter or not os.path.isdir(source):
+        return None
+    members, skipped = [], False
+    for root, dirs, files in os.walk(source):
+        rel_dir = os.path.relpath(root, source).replace(os.sep, "/")
+        prefix = "" if rel_dir == "." else rel_dir + "/"
+        kept = [d for d in dirs if not path_filter.prunes(prefix + d)]
+        skipped = skipped or len(kept) != len(dirs)
+        dirs[:] = kept
+        for f in files:
+            if path_filter.accepts(prefix + f):
+                members.append(os.path.join(root, f))
+            else:
+                skipped = True
+    return members if skipped else None
+
+
+def _tar_filter(arcname, path_filter):
+    """tarfile `filter` callback applying a PathFilter below the archive's top-level entry."""
+    if not path_filter:
+        return None
+    top = arcname.replace(os.sep, "/").rstrip("/")
+
+    def keep(info):
+        if info.name == top:
+            return info
+        rel = info.name[len(top) + 1:]
+        if info.isdir():
+            return None if path_filter.prunes(rel) else info
+        return info if path_filter.accepts(rel) else None
+    return keep
+
+
+def _safe_target(out_dir, name):
+    """Resolves an archive member name inside out_dir, refusing anything that would escape it."""
+    out_real = os.path.realpath(out_dir)
+    target = os.path.realpath(os.path.join(out_dir, name))
+    if os.path.isabs(name) or (not target.startswith(out_real + os.sep) and target != out_real):
+        raise OSError(f"Blocked path traversal: {name}")
+    return target
+
+
+def _merge_tree(src_dir, dest_dir, syncer):
+    """Moves the files under src_dir to the same relative paths under dest_dir, adding each to syncer."""
+    for root, dirs, files in os.walk(src_dir):
+        target_dir = os.path.join(dest_dir, os.path.relpath(root, src_dir))
+        os.makedirs(target_dir, exist_ok=True)
+        for f in files:
+            target = os.path.join(target_dir, f)
+            os.replace(os.path.join(root, f), target)
+            syncer.add(target)
+
+
+def _assemble(src, target, size, syncer=None, sparse=False):
+    """Streams one member into a preallocated file with positional writes (see assembly.py)."""
+    from assembly import FileAssembler
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    out = FileAssembler(target, size, sparse=sparse)
+    try:
+        out.copy_from(src)
+    except BaseException:
+        out.abort()
+        raise
+    out.close(syncer)
+
+
+def _extract_tar_stream(tar, out_dir, syncer=None):
+    """Regular files and folders only; links and devices are skipped like tarfile's "data" filter would refuse them."""
+    for member in tar:
+        target = _safe_target(out_dir, member.name)
+        if member.isdir():
+            os.makedirs(target, exist_ok=True)
+        elif member.isfile():
+            _assemble(tar.extractfile(member), target, member.size, syncer, sparse=member.issparse())
+            os.chmod(target, (member.mode & 0o755) | 0o600)
+            os.utime(target, (member.mtime, member.mtime))
+
+
+ARCHIVE_FORMATS = ["7z", "zip", "zstd", "native"]
+
+
+def get_backend(name, _7z_path, profile_name="default"):
+    """
+    Returns the backend for a configured format name. "native" picks the best in-process one.
+    `profile_name` may also be a profile dict built on the fly.
+    """
+    profile = profile_name if isinstance(profile_name, dict) else get_profile(profile_name)
+    if name == "native":
+        name = "zstd" if HAS_ZSTD else "zip"
+    if name == "zip":
+        return ZipBackend(profile)
+    if name == "zstd":
+        backend = TarZstdBackend(profile)
+        return backend if backend.available() else ZipBackend(profile)
+    return SevenZipBackend(_7z_path, profile)
+
+
+def backend_for_archive(filename, _7z_path):
+    """Dispatches on the archive suffix recorded in the payload. Returns None for non-archives."""
+    for backend in (TarZstdBackend(), ZipBackend(), SevenZipBackend(_7z_path)):
+        if filename.endswith(backend.extension):
+            return backend if backend.available() else None
+    return None
+
+
+ARCHIVE_EXTENSIONS = (".croc.tar.zst", ".croc.zip", ".7z")
+
+
+def is_archive(filename):
+    return filename.endswith(ARCHIVE_EXTENSIONS)
+
+
+def strip_archive_suffix(filename):
+    for ext in ARCHIVE_EXTENSIONS:
+        if filename.endswith(ext):
+            return filename[:-len(ext)]
+    return filename
+
+
+# ==========================================
+# PROFILE BENCHMARK
+# ==========================================
+def _sample_files(sample_path, max_bytes):
+    if os.path.isfile(sample_path):
+        return [sample_path]
+    picked, total = [], 0
+    for root, dirs, files in os.walk(sample_path):
+        for f in files:
+            full = os.path.join(root, f)
+            try:
+                size = os.path.getsize(full)
+            except OSError:
+                continue
+            picked.append(full)
+            total += size
+            if total >= max_bytes:
+                return picked
+    return picked
+
+
+def benchmark_profiles(sample_path, _7z_path, archive_format="7z", link_mbps=100.0, max_sample_mb=256):
+    """
+    Compresses a sample with every profile and ranks them by estimated end-to-end
+    throughput: raw bytes / (compress time + compressed bytes / link rate).
+    Returns (results, best_profile_name); results are dicts sorted best first, with
+    profiles whose compression failed last (marked "failed"). best is None if none worked.
+    """
+    if not get_backend(archive_format, _7z_path).available():
+        raise RuntimeError(f"The {archive_format} archiver is not available")
+    files = _sample_files(sample_path, max_sample_mb * 1024 * 1024)
+    raw_bytes = sum(os.path.getsize(f) for f in files)
+    link_bps = link_mbps * 1024 * 1024 / 8
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="croc_bench_")
+    try:
+        for name in COMPRESSION_PROFILES:
+            backend = get_backend(archive_format, _7z_path, name)
+            packed, failed, started = 0, False, time.perf_counter()
+            for index, f in enumerate(files):
+                out = os.path.join(work_dir, f"{name}_{index}{backend.extension}")
+                try:
+                    failed = not backend.compress(f, out)
+                    if not failed:
+                        packed += os.path.getsize(out)
+                except OSError:
+                    failed = True
+                if os.path.exists(out):
+                    os.remove(out)
+                if failed:
+                    logging.error(f"Benchmark: profile {name} failed on {f}")
+                    break
+            elapsed = max(time.perf_counter() - started, 1e-6)
+            if failed:
+                results.append({"profile": name, "failed": True})
+                continue
+            results.append({
+                "profile": name,
+                "failed": False,
+                "raw_bytes": raw_bytes,
+                "packed_bytes": packed,
+                "ratio": packed / raw_bytes if raw_bytes else 1.0,
+                "compress_mbps": raw_bytes * 8 / elapsed / (1024 * 1024),
+                "effective_mbps": raw_bytes * 8 / (elapsed + packed / link_bps) / (1024 * 1024),
+            })
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    results.sort(key=lambda r: (r["failed"], -r.get("effective_mbps", 0)))
+    best = results[0]["profile"] if results and not results[0]["failed"] else None
+    return results, best
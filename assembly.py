@@ -0,0 +1,126 @@
+import os
+import logging
+
+# Blocks that are entirely zero are not written: in a preallocated file they already
+# read as zero, in a sparse one they stay holes.
+BLOCK = 1024 * 1024
+ZERO_BLOCK = bytes(BLOCK)
+
+
+def preallocate(fd, size):
+    """Reserves the full size up front so the file isn't extended (and fragmented) write by write."""
+    if size <= 0:
+        return
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass  # Not supported by this filesystem; fall back to a (sparse) truncate.
+    os.ftruncate(fd, size)
+
+
+class SyncBatch:
+    """
+    Makes received data durable before it is published and acknowledged, without an
+    fsync per file: written files are collected and synced once `batch_bytes` have
+    accumulated (and at flush). Synced pages are dropped from the page cache, so a
+    burst of large files doesn't evict everything else.
+    """
+
+    def __init__(self, batch_bytes=64 * 1024 * 1024, enabled=True):
+        self.batch_bytes = batch_bytes
+        self.enabled = enabled
+        self.pending = []
+        self.pending_bytes = 0
+
+    def add(self, path, nbytes=None):
+        if not self.enabled:
+            return
+        if nbytes is None:
+            try:
+                nbytes = os.path.getsize(path)
+            except OSError:
+                return
+        self.pending.append(path)
+        self.pending_bytes += nbytes
+        if self.pending_bytes >= self.batch_bytes:
+            self.flush()
+
+    def flush(self):
+        for path in self.pending:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.fsync(fd)
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            except OSError as e:
+                logging.warning(f"fsync failed for {path}: {e}")
+            finally:
+                os.close(fd)
+        self.pending = []
+        self.pending_bytes = 0
+
+
+class FileAssembler:
+    """
+    Writes one output file with positional writes. The file is preallocated to its
+    final size unless it is known to be sparse, zero blocks are skipped, and the size
+    is fixed on close, so parts may arrive in any order.
+    """
+
+    def __init__(self, path, size, sparse=False):
+        self.path = path
+        self.size = size
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+        if not sparse:
+            preallocate(self.fd, size)
+
+    def write_at(self, offset, data):
+        view = memoryview(data)
+        for start in range(0, len(view), BLOCK):
+            block = view[start:start + BLOCK]
+            if len(block) == BLOCK and block == ZERO_BLOCK:
+                continue
+            _pwrite_all(self.fd, block, offset + start)
+        return len(view)
+
+    def copy_from(self, fileobj, offset=0):
+        """Streams a readable file object into the file starting at offset. Returns bytes read."""
+        total = 0
+        while True:
+            chunk = fileobj.read(BLOCK)
+            if not chunk:
+                break
+            self.write_at(offset + total, chunk)
+            total += len(chunk)
+        return total
+
+    def close(self, syncer=None):
+        try:
+            os.ftruncate(self.fd, self.size)
+        finally:
+            os.close(self.fd)
+        if syncer:
+            syncer.add(self.path, self.size)
+
+    def abort(self):
+        os.close(self.fd)
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _pwrite_all(fd, data, offset):
+    if hasattr(os, "pwrite"):
+        while data:
+            written = os.pwrite(fd, data, offset)
+            data, offset = data[written:], offset + written
+    else:
+        os.lseek(fd, offset, os.SEEK_SET)
+        while data:
+            data = data[os.write(fd, data):]
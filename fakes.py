@@ -0,0 +1,463 @@
+"""
+Offline stand-ins for the croc and 7z executables.
+
+They speak the subset of each CLI the app uses, so the workers can be driven
+deterministically without a relay or a real 7-Zip:
+
+    python fakes.py install ./fakebin      # writes croc / 7z shims, prints the env to use
+    CROC_PATH=./fakebin/croc SEVENZIP_PATH=./fakebin/7z python main.py
+
+The fake croc relays through a shared directory (one room per code): `send`
+publishes an offer and blocks until a receiver has taken it, a receive claims the
+oldest offer and copies it into --out. The fake 7z reads and writes zip data
+under whatever name it is given.
+
+Behaviour is tuned per tool with environment variables (prefix FAKE_CROC_ / FAKE_7Z_):
+    LATENCY_MS  delay before the tool does anything
+    MBPS        throughput cap in megabytes/s (0 = unlimited); croc also honours --throttleUpload
+    FAIL_RATE   probability (0-1) that a call fails; a receive fails part-way through
+    EXIT_CODE   exit code used for injected failures
+    WAIT_S      croc only: how long send waits for a receiver
+    RECV_WAIT_S croc only: how long a receive waits for an offer before "room not ready"
+FAKE_SEED makes the failure pattern reproducible; every call draws from its own
+seeded stream, numbered in call order. FAKE_CROC_RELAY sets the relay directory.
+Each call is recorded as <relay>/calls/<tool>-<n>-<pid>.json with its argv.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import shutil
+import tempfile
+import zipfile
+
+DEFAULT_RELAY = os.path.join(tempfile.gettempdir(), "fake_croc_relay")
+CHUNK = 256 * 1024
+
+DEFAULTS = {
+    # A croc receive without a waiting sender errors out quickly, like the real one.
+    "croc": {"LATENCY_MS": 0, "MBPS": 0, "FAIL_RATE": 0, "EXIT_CODE": 1, "WAIT_S": 30, "RECV_WAIT_S": 2},
+    "7z": {"LATENCY_MS": 0, "MBPS": 0, "FAIL_RATE": 0, "EXIT_CODE": 2},
+}
+
+
+# ==========================================
+# SHARED PLUMBING
+# ==========================================
+def relay_dir():
+    return os.environ.get("FAKE_CROC_RELAY") or DEFAULT_RELAY
+
+
+def settings(tool):
+    prefix = "FAKE_" + tool.upper() + "_"
+    result = {}
+    for key, default in DEFAULTS[tool].items():
+        try:
+            result[key] = float(os.environ.get(prefix + key, default))
+        except ValueError:
+            result[key] = float(default)
+    return result
+
+
+def _next_call_number(calls, tool):
+    """Increments <calls>/<tool>.count under a mkdir lock: O(1) however many calls were made."""
+    counter = os.path.join(calls, tool + ".count")
+    lock = counter + ".lock"
+    deadline = time.monotonic() + 5
+    while True:
+        try:
+            os.mkdir(lock)
+            break
+        except FileExistsError:
+            # A call killed inside the lock leaves it behind; don't wait on it forever.
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.001)
+    try:
+        try:
+            with open(counter) as f:
+                n = int(f.read() or 0)
+        except (OSError, ValueError):
+            n = 0
+        with open(counter, "w") as f:
+            f.write(str(n + 1))
+        return n
+    finally:
+        try:
+            os.rmdir(lock)
+        except OSError:
+            pass
+
+
+def _record_call(tool, argv):
+    """Claims the next call number for `tool` and logs the argv under it."""
+    calls = os.path.join(relay_dir(), "calls")
+    os.makedirs(calls, exist_ok=True)
+    n = _next_call_number(calls, tool)
+    with open(os.path.join(calls, f"{tool}-{n}-{os.getpid()}.json"), "w") as f:
+        json.dump({"argv": argv, "cwd": os.getcwd(), "time": time.time(), "call": n}, f)
+    return n
+
+
+def _rng(tool, call_number):
+    seed = os.environ.get("FAKE_SEED")
+    return random.Random(f"{seed}:{tool}:{call_number}") if seed is not None else random.Random()
+
+
+class Throttle:
+    def __init__(self, mbps):
+        self.rate = mbps * 1024 * 1024
+        self.started = time.monotonic()
+        self.sent = 0
+
+    def account(self, nbytes):
+        self.sent += nbytes
+        if self.rate > 0:
+            ahead = self.sent / self.rate - (time.monotonic() - self.started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def mbps(self):
+        return self.sent / (1024 * 1024) / max(time.monotonic() - self.started, 1e-6)
+
+
+def _copy(src, dst, throttle, stop_after=None):
+    """Throttled copy. Returns False if it stopped early at `stop_after` bytes."""
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        copied = 0
+        while True:
+            chunk = fin.read(CHUNK)
+            if not chunk:
+                break
+            if stop_after is not None and copied + len(chunk) > stop_after:
+                fout.write(chunk[:max(0, stop_after - copied)])
+                return False
+            fout.write(chunk)
+            copied += len(chunk)
+            throttle.account(len(chunk))
+    shutil.copymode(src, dst)
+    return True
+
+
+def _say(line):
+    print(line, flush=True)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _parse_rate(value):
+    """croc --throttleUpload values look like '500k' or '2M'."""
+    units = {"k": 1 / 1024, "m": 1, "g": 1024}
+    value = value.strip().lower().rstrip("b")
+    try:
+        if value and value[-1] in units:
+            return float(value[:-1]) * units[value[-1]]
+        return float(value) / (1024 * 1024)
+    except ValueError:
+        return 0
+
+
+def _effective_mbps(*caps):
+    caps = [c for c in caps if c > 0]
+    return min(caps) if caps else 0
+
+
+# ==========================================
+# FAKE CROC
+# ==========================================
+CROC_HELP = """NAME:
+   croc - easily and securely transfer stuff from one computer to another (fake)
+
+USAGE:
+   croc [GLOBAL OPTIONS] [COMMAND] [COMMAND OPTIONS] [filename(s) or folder]
+
+GLOBAL OPTIONS:
+   --yes                 automagically agree to all prompts
+   --out value           specify an output folder to receive the file
+   --throttleUpload value  throttle the upload speed e.g. 500k
+   --version, -v         print the version
+"""
+
+
+def croc_main(argv):
+    opts, rest = {"yes": False, "out": os.getcwd(), "throttle": 0}, list(argv)
+    while rest and rest[0].startswith("-"):
+        flag = rest.pop(0)
+        if flag in ("--version", "-v"):
+            _say("croc version v10.0.0-fake")
+            return 0
+        if flag in ("--help", "-h"):
+            _say(CROC_HELP)
+            return 0
+        if flag == "--yes":
+            opts["yes"] = True
+        elif flag == "--out" and rest:
+            opts["out"] = rest.pop(0)
+        elif flag == "--throttleUpload" and rest:
+            opts["throttle"] = _parse_rate(rest.pop(0))
+        else:
+            _say(f"Incorrect Usage: flag provided but not defined: {flag}")
+            return 1
+
+    cfg = settings("croc")
+    call = _record_call("croc", argv)
+    rng = _rng("croc", call)
+    time.sleep(cfg["LATENCY_MS"] / 1000)
+    fail_at = rng.random() if rng.random() < cfg["FAIL_RATE"] else None
+
+    if rest and rest[0] == "send":
+        rest.pop(0)
+        code = None
+        if len(rest) >= 2 and rest[0] == "--code":
+            code = rest[1]
+            rest = rest[2:]
+        if not code or not rest:
+            _say("Error: send needs --code and at least one file")
+            return 1
+        if fail_at is not None:
+            _say("Error: could not connect to relay (fake failure injected)")
+            return int(cfg["EXIT_CODE"])
+        return _croc_send(code, rest, cfg, opts["throttle"])
+    if len(rest) != 1:
+        _say("Error: must specify a code to receive")
+        return 1
+    mbps = _effective_mbps(cfg["MBPS"])
+    return _croc_receive(rest[0], opts["out"], mbps, fail_at, cfg)
+
+
+def _croc_send(code, paths, cfg, throttle_mbps=0):
+    room = os.path.join(relay_dir(), "rooms", code)
+    os.makedirs(room, exist_ok=True)
+    offer_id = f"{time.time():.6f}-{uuid.uuid4().hex[:8]}"
+    tmp = os.path.join(room, ".tmp-" + offer_id)
+    os.makedirs(tmp)
+    total = 0
+    for path in paths:
+        if not os.path.exists(path):
+            shutil.rmtree(tmp, ignore_errors=True)
+            _say(f"Error: stat {path}: no such file or directory")
+            return 1
+        target = os.path.join(tmp, os.path.basename(os.path.normpath(path)))
+        if os.path.isdir(path):
+            shutil.copytree(path, target)
+        else:
+            shutil.copy2(path, target)
+    for root, dirs, files in os.walk(tmp):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+
+    # The receiver does the copying, so it applies the sender's upload cap.
+    with open(os.path.join(room, offer_id + ".json"), "w") as f:
+        json.dump({"throttle_mbps": throttle_mbps, "bytes": total}, f)
+    offer = os.path.join(room, offer_id + ".ready")
+    os.replace(tmp, offer)
+    _say(f"Sending {len(paths)} file(s) ({total / (1024 * 1024):.1f} MB)")
+    _say(f"Code is: {code}")
+
+    # Like croc, block until a receiver has taken everything (or give up).
+    claimed = os.path.join(room, offer_id + ".claimed")
+    deadline, started = time.monotonic() + cfg["WAIT_S"], None
+    while os.path.exists(offer) or os.path.exists(claimed):
+        if started is None and not os.path.exists(offer):
+            started = time.monotonic()
+        if started is None and time.monotonic() > deadline:
+            try:
+                os.replace(offer, offer + ".expired")
+            except OSError:
+                continue  # a receiver claimed it just now
+            shutil.rmtree(offer + ".expired", ignore_errors=True)
+            _remove(os.path.join(room, offer_id + ".json"))
+            _say("Error: peer did not connect")
+            return 1
+        time.sleep(0.05)
+    elapsed = max(time.monotonic() - (started or time.monotonic()), 1e-6)
+    size_mb = total / (1024 * 1024)
+    _say(f"Sending (->fake) 100% |████████████████████| ({size_mb:.1f}/{size_mb:.1f} MB, {size_mb / elapsed:.1f} MB/s)")
+    return 0
+
+
+def _claim_offer(room, wait_s):
+    deadline = time.monotonic() + wait_s
+    while True:
+        offers = sorted(f for f in os.listdir(room) if f.endswith(".ready")) if os.path.isdir(room) else []
+        for name in offers:
+            claimed = os.path.join(room, name[:-len(".ready")] + ".claimed")
+            try:
+                os.replace(os.path.join(room, name), claimed)
+                return claimed
+            except OSError:
+                continue  # another receiver got it first
+        if time.monotonic() > deadline:
+            return None
+        time.sleep(0.05)
+
+
+def _croc_receive(code, out_dir, mbps, fail_at, cfg):
+    room = os.path.join(relay_dir(), "rooms", code)
+    claimed = _claim_offer(room, cfg["RECV_WAIT_S"])
+    if claimed is None:
+        _say("Error: room not ready")
+        return 1
+
+    files = []
+    for root, dirs, names in os.walk(claimed):
+        files += [os.path.join(root, n) for n in sorted(names)]
+    total = sum(os.path.getsize(f) for f in files)
+    stop_after = int(total * fail_at) if fail_at is not None else None
+    meta_path = claimed[:-len(".claimed")] + ".json"
+    try:
+        with open(meta_path) as f:
+            mbps = _effective_mbps(mbps, json.load(f).get("throttle_mbps", 0))
+    except (OSError, ValueError):
+        pass
+    throttle = Throttle(mbps)
+    _say(f"Receiving {len(files)} file(s) ({total / (1024 * 1024):.1f} MB)")
+    os.makedirs(out_dir, exist_ok=True)
+
+    done = 0
+    for src in files:
+        rel = os.path.relpath(src, claimed)
+        dst = os.path.join(out_dir, rel)
+        os.makedirs(os.path.dirname(dst) or out_dir, exist_ok=True)
+        size = os.path.getsize(src)
+        budget = None if stop_after is None else stop_after - done
+        if not _copy(src, dst, throttle, budget):
+            # Hand the offer back so the sender is still "waiting" for a retry.
+            os.replace(claimed, claimed[:-len(".claimed")] + ".ready")
+            _say("Error: connection reset by peer (fake failure injected)")
+            return int(cfg["EXIT_CODE"])
+        done += size
+        size_mb = size / (1024 * 1024)
+        _say(f"{rel} 100% |████████████████████| ({size_mb:.1f}/{size_mb:.1f} MB, {throttle.mbps():.1f} MB/s)")
+    shutil.rmtree(claimed, ignore_errors=True)
+    _remove(meta_path)
+    return 0
+
+
+# ==========================================
+# FAKE 7Z
+# ==========================================
+SEVENZIP_BANNER = """
+7-Zip (fake) 23.01 : Copyright (c) 1999-2023 Igor Pavlov
+
+Usage: 7z <command> [<switches>...] <archive_name> [<file_names>...]
+  -mmt[N] : set number of CPU threads
+"""
+
+
+def sevenzip_main(argv):
+    if not argv:
+        _say(SEVENZIP_BANNER)
+        return 0
+    if argv[0] == "i":
+        _say(SEVENZIP_BANNER + "\nCodecs:\n LZMA2\n Deflate\n Copy")
+        return 0
+
+    cfg = settings("7z")
+    call = _record_call("7z", argv)
+    rng = _rng("7z", call)
+    time.sleep(cfg["LATENCY_MS"] / 1000)
+    command, switches = argv[0], [a for a in argv[1:] if a.startswith("-")]
+    operands = [a for a in argv[1:] if not a.startswith("-")]
+    if not operands:
+        _say("Command Line Error: Cannot find archive name")
+        return 7
+    if rng.random() < cfg["FAIL_RATE"]:
+        _say("ERROR: fake failure injected")
+        return int(cfg["EXIT_CODE"])
+
+    throttle = Throttle(cfg["MBPS"])
+    try:
+        if command == "a":
+            return _7z_add(operands[0], _expand_list_files(operands[1:]), switches, throttle)
+        if command == "t":
+            with zipfile.ZipFile(operands[0]) as zf:
+                return 0 if zf.testzip() is None else 2
+        if command == "x":
+            out = next((s[2:] for s in switches if s.startswith("-o")), os.getcwd())
+            with zipfile.ZipFile(operands[0]) as zf:
+                for info in zf.infolist():
+                    zf.extract(info, out)
+                    throttle.account(info.file_size)
+            return 0
+    except (OSError, zipfile.BadZipFile) as e:
+        _say(f"ERROR: {e}")
+        return 2
+    _say(f"Command Line Error: Unsupported command: {command}")
+    return 7
+
+
+def _expand_list_files(operands):
+    """`@file` operands name a list file with one path per line (the app writes them as UTF-8)."""
+    paths = []
+    for operand in operands:
+        if operand.startswith("@"):
+            with open(operand[1:], encoding="utf-8") as f:
+                paths.extend(line.rstrip("\r\n") for line in f if line.strip())
+        else:
+            paths.append(operand)
+    return paths
+
+
+def _7z_add(archive, sources, switches, throttle):
+    stored = "-mx=0" in switches or "-m0=Copy" in switches
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED) as zf:
+        for source in sources:
+            # 7z keeps relative paths as given and strips absolute ones to the last component.
+            base = os.path.dirname(os.path.normpath(source)) if os.path.isabs(source) else ""
+            for root, dirs, files in os.walk(source) if os.path.isdir(source) else [("", [], [source])]:
+                for f in files:
+                    full = os.path.join(root, f)
+                    zf.write(full, os.path.relpath(full, base) if base else os.path.normpath(full))
+                    throttle.account(os.path.getsize(full))
+    return 0
+
+
+# ==========================================
+# INSTALL
+# ==========================================
+def install(bin_dir, relay=None):
+    """
+    Writes `croc` and `7z` shims into bin_dir that run this module, and returns the
+    environment (CROC_PATH, SEVENZIP_PATH, FAKE_CROC_RELAY) that points the app at them.
+    """
+    os.makedirs(bin_dir, exist_ok=True)
+    script = os.path.abspath(__file__)
+    env = {"FAKE_CROC_RELAY": os.path.abspath(relay or relay_dir())}
+    for tool, var in (("croc", "CROC_PATH"), ("7z", "SEVENZIP_PATH")):
+        if os.name == 'nt':
+            path = os.path.join(bin_dir, tool + ".cmd")
+            with open(path, "w") as f:
+                f.write(f'@"{sys.executable}" "{script}" {tool} %*\r\n')
+        else:
+            path = os.path.join(bin_dir, tool)
+            with open(path, "w") as f:
+                f.write(f'#!/bin/sh\nexec "{sys.executable}" "{script}" {tool} "$@"\n')
+            os.chmod(path, 0o755)
+        env[var] = os.path.abspath(path)
+    return env
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "croc":
+        return croc_main(argv[1:])
+    if argv and argv[0] == "7z":
+        return sevenzip_main(argv[1:])
+    if len(argv) >= 2 and argv[0] == "install":
+        env = install(argv[1], argv[2] if len(argv) > 2 else None)
+        for key, value in env.items():
+            print(f"set {key}={value}" if os.name == 'nt' else f"export {key}={value}")
+        return 0
+    print("usage: fakes.py install BIN_DIR [RELAY_DIR] | croc ARGS... | 7z ARGS...")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
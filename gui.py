@@ -1,16 +1,33 @@
 import os
 import sys
+import time
 import subprocess
 import shutil
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QPushButton, QTextEdit,
                              QFileDialog, QGroupBox, QMessageBox, QTabWidget,
-                             QSpinBox, QFormLayout, QListWidget, QAbstractItemView, QCheckBox)
-from PyQt5.QtCore import Qt
+                             QSpinBox, QFormLayout, QListWidget, QListWidgetItem, QAbstractItemView, QCheckBox, QComboBox,
+                             QDialog, QDialogButtonBox)
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
 
-from utils import get_7z_path, generate_transfer_code, load_config, save_config
-from workers import ZipWorker, LiveUnzipWorker, CrocWorker, AutoSendWorker, AutoRecvWorker
+from utils import generate_transfer_code, load_config, save_config
+from scheduler import SCHEDULER
+from receive import ReceiveStaging
+from archive import ARCHIVE_FORMATS, COMPRESSION_PROFILES
+from adaptive import ADAPTIVE_PROFILE
+from metrics import METRICS
+from staging import STAGING_CACHE, STAGING, verify_zero_copy, tree_stats
+from history import HISTORY
+from profiling import PROFILER
+from scanner import SCANNER
+from policies import FolderPolicy, PRIORITIES
+from pathfilter import PathFilter, parse_globs
+from jobs import JobQueue, QUEUED, ZIPPING, SENDING, RECEIVING, PAUSED, DONE
+
+# workers (croc/7z process handling and the manifest, mirror and assembly code behind
+# it) is imported on first use so the window can be shown before any of it loads.
+# Workers started before the dependency probe reports back look 7z up themselves.
 
 
 class CrocApp(QWidget):
@@ -20,54 +37,99 @@ class CrocApp(QWidget):
         self.resize(900, 750)
 
         self.config = load_config()
+        SCHEDULER.configure(self.config.get("scheduler"))
 
-        self._7z_path = get_7z_path()
+        self._7z_path = None
+        self.croc_version = None
+        self.probe_worker = None
+        self.dependencies_probed = False
         self.download_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "received")
-        if not os.path.exists(self.download_folder):
-            os.makedirs(self.download_folder)
 
         self.croc_worker = None
         self.zip_worker = None
         self.live_unzip_worker = None
         self.auto_send_worker = None
-        self.auto_recv_workers = []
+        self.auto_recv_pool = None
+        self.stopping_recv_pools = []
+        self.job_queue = None
+        # job id -> {"worker": ZipWorker | CrocWorker, "unzip": LiveUnzipWorker | None}
+        self.job_workers = {}
 
         self.code_length = self.config.get("code_length", 6)
         self.current_state = "IDLE"
         self.staged_path_to_send = None
         self.staged_base_temp_dir = None
+        # Bookkeeping for the transfer history of the manual transfer.
+        self.zip_started = self.zip_seconds = 0
+        self.send_attempts = self.recv_attempts = 0
 
         self.init_ui()
-        self.refresh_file_list()
         self.set_ui_state("IDLE")
 
         self.txt_code.setText(generate_transfer_code(self.code_length))
 
-        if not self._7z_path:
-            QMessageBox.critical(self, "Dependency Missing", "7-Zip is missing!")
+        # Everything that touches the disk or spawns processes runs once the window is up.
+        QTimer.singleShot(0, self.deferred_init)
+
+    def deferred_init(self):
+        if not os.path.exists(self.download_folder):
+            os.makedirs(self.download_folder)
+        self.refresh_file_list()
+
+        self.job_queue = JobQueue()
+        self.refresh_job_list()
+        STAGING_CACHE.configure(self.config.get("staging_cache_mb", 4096))
+        STAGING.configure(self.config.get("staging_dirs", []), self.config.get("staging_min_free_mb", 512),
+                          self.config.get("staging_quota_mb", 0))
+        PROFILER.configure(self.config.get("profiling", False), self.config.get("profile_capture", "off"),
+                           self.config.get("profile_dir", "croc_profiles"))
+        SCANNER.configure(self.config.get("scan_workers", 8))
+
+        # The tool registry only spawns croc/7z when its cache is cold or a binary changed.
+        from workers import DependencyProbeWorker
+        self.probe_worker = DependencyProbeWorker()
+        self.probe_worker.result_signal.connect(self.on_dependencies_probed)
+        self.probe_worker.start()
+
+    def on_dependencies_probed(self, result):
+        self.dependencies_probed = True
+        self._7z_path = result.get("7z")
+        self.croc_version = result.get("croc")
+        if not self.croc_version:
+            self.log("❌ croc was not found on PATH. Transfers will fail until it is installed.")
+        if not self._7z_path and self.config.get("archive_format", "7z") == "7z":
+            QMessageBox.critical(self, "Dependency Missing", "7-Zip is missing! Pick a native archive format in Settings.")
+        # Queued jobs wait for the tool paths before they start.
+        self._pump_jobs()
 
     def init_ui(self):
         main_layout = QVBoxLayout()
         self.tabs = QTabWidget()
 
         self.tab_transfer = QWidget()
+        self.tab_queue = QWidget()
         self.tab_auto_recv = QWidget()
         self.tab_auto_send = QWidget()
         self.tab_downloads = QWidget()
         self.tab_settings = QWidget()
 
         self.tabs.addTab(self.tab_transfer, "📂 Manual Transfer")
+        self.tabs.addTab(self.tab_queue, "🗂️ Queue")
         self.tabs.addTab(self.tab_auto_recv, "🖥️ Receiver (Server)")
         self.tabs.addTab(self.tab_auto_send, "📤 Sender (Watcher)")
         self.tabs.addTab(self.tab_downloads, "📥 Files")
         self.tabs.addTab(self.tab_settings, "⚙️ Settings")
 
         self.setup_transfer_tab()
+        self.setup_queue_tab()
         self.setup_auto_recv_tab()
         self.setup_auto_send_tab()
         self.setup_downloads_tab()
         self.setup_settings_tab()
 
+        # The history database is only opened when someone looks at it.
+        self.tabs.currentChanged.connect(
+            lambda index: self.refresh_history_stats() if self.tabs.widget(index) is self.tab_downloads else None)
         main_layout.addWidget(self.tabs)
 
         self.log_group = QGroupBox("📜 Activity Log")
@@ -116,12 +178,21 @@ class CrocApp(QWidget):
         file_row.addWidget(btn_browse_folder)
 
         send_btn_row = QHBoxLayout()
+        self.combo_send_profile = QComboBox()
+        self.combo_send_profile.addItems(list(COMPRESSION_PROFILES))
+        self.combo_send_profile.setCurrentText(self.config.get("manual_profile", "default"))
+        self.combo_send_profile.currentTextChanged.connect(self._save_state)
+        send_btn_row.addWidget(QLabel("Profile:"))
+        send_btn_row.addWidget(self.combo_send_profile)
         self.btn_send = QPushButton("🚀 Send")
         self.btn_send.clicked.connect(self.handle_send_click)
         self.btn_pause_send = QPushButton("⏸️ Pause")
         self.btn_pause_send.clicked.connect(self.handle_pause_send_click)
         send_btn_row.addWidget(self.btn_send)
         send_btn_row.addWidget(self.btn_pause_send)
+        btn_queue_send = QPushButton("➕ Queue")
+        btn_queue_send.clicked.connect(self.queue_send)
+        send_btn_row.addWidget(btn_queue_send)
         send_layout.addLayout(file_row)
         send_layout.addLayout(send_btn_row)
         send_group.setLayout(send_layout)
@@ -138,6 +209,9 @@ class CrocApp(QWidget):
         code_layout.addWidget(self.recv_code_input)
         code_layout.addWidget(self.btn_recv)
         code_layout.addWidget(self.btn_pause_recv)
+        btn_queue_recv = QPushButton("➕ Queue")
+        btn_queue_recv.clicked.connect(self.queue_recv)
+        code_layout.addWidget(btn_queue_recv)
         recv_layout.addLayout(code_layout)
         recv_group.setLayout(recv_layout)
 
@@ -147,6 +221,43 @@ class CrocApp(QWidget):
         layout.addStretch()
         self.tab_transfer.setLayout(layout)
 
+    # --- TAB: JOB QUEUE ---
+    def setup_queue_tab(self):
+        layout = QVBoxLayout()
+        info = QLabel("<i><b>Queue:</b> Manual sends and receives run one after another (or in parallel) "
+                      "and are kept across restarts. Paused sends resume from their staged archives.</i>")
+        layout.addWidget(info)
+
+        self.job_list = QListWidget()
+        self.job_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        layout.addWidget(self.job_list)
+
+        btn_layout = QHBoxLayout()
+        btn_pause = QPushButton("⏸️ Pause Selected")
+        btn_pause.clicked.connect(self.pause_selected_jobs)
+        btn_resume = QPushButton("▶️ Resume Selected")
+        btn_resume.clicked.connect(self.resume_selected_jobs)
+        btn_remove = QPushButton("❌ Remove Selected")
+        btn_remove.clicked.connect(self.remove_selected_jobs)
+        btn_clear = QPushButton("🧹 Clear Finished")
+        btn_clear.clicked.connect(self.clear_finished_jobs)
+        for btn in (btn_pause, btn_resume, btn_remove, btn_clear):
+            btn_layout.addWidget(btn)
+        layout.addLayout(btn_layout)
+
+        concurrency_layout = QHBoxLayout()
+        concurrency_layout.addWidget(QLabel("Parallel jobs:"))
+        self.spin_job_concurrency = QSpinBox()
+        self.spin_job_concurrency.setRange(1, 16)
+        self.spin_job_concurrency.setValue(self.config.get("job_concurrency", 2))
+        self.spin_job_concurrency.valueChanged.connect(self._save_state)
+        self.spin_job_concurrency.valueChanged.connect(self._pump_jobs)
+        concurrency_layout.addWidget(self.spin_job_concurrency)
+        concurrency_layout.addStretch()
+        layout.addLayout(concurrency_layout)
+
+        self.tab_queue.setLayout(layout)
+
     # --- TAB: AUTO SENDER (WATCHER) ---
     def setup_auto_send_tab(self):
         layout = QVBoxLayout()
@@ -156,9 +267,13 @@ class CrocApp(QWidget):
 
         self.auto_send_list = QListWidget()
         self.auto_send_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
-        # Load persisted folders
-        for f in self.config.get("sender_folders", []):
-            self.auto_send_list.addItem(f)
+        # Load persisted folders; entries with per-folder settings are dicts.
+        self.folder_policies = {}
+        for entry in self.config.get("sender_folders", []):
+            policy = FolderPolicy.from_config(entry)
+            self.folder_policies[policy.folder] = policy
+            self.auto_send_list.addItem(policy.folder)
+        self._refresh_folder_profile_tooltips()
         layout.addWidget(self.auto_send_list)
 
         btn_layout = QHBoxLayout()
@@ -166,10 +281,24 @@ class CrocApp(QWidget):
         btn_add.clicked.connect(self.add_watch_folder)
         btn_remove = QPushButton("❌ Remove Selected")
         btn_remove.clicked.connect(self.remove_watch_folder)
+        btn_policy = QPushButton("⚙️ Folder Settings")
+        btn_policy.clicked.connect(self.edit_folder_policy)
         btn_layout.addWidget(btn_add)
         btn_layout.addWidget(btn_remove)
+        btn_layout.addWidget(btn_policy)
         layout.addLayout(btn_layout)
 
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(QLabel("Compression profile for selected:"))
+        self.combo_folder_profile = QComboBox()
+        self.combo_folder_profile.addItems(list(COMPRESSION_PROFILES) + [ADAPTIVE_PROFILE])
+        btn_apply_profile = QPushButton("Apply")
+        btn_apply_profile.clicked.connect(self.apply_folder_profile)
+        profile_layout.addWidget(self.combo_folder_profile)
+        profile_layout.addWidget(btn_apply_profile)
+        profile_layout.addStretch()
+        layout.addLayout(profile_layout)
+
         code_group = QGroupBox("Server Connection")
         code_layout = QHBoxLayout()
         code_layout.addWidget(QLabel("Server Code:"))
@@ -264,6 +393,24 @@ class CrocApp(QWidget):
 
         layout.addLayout(header_layout)
         layout.addWidget(self.file_list_widget)
+
+        stats_group = QGroupBox("📊 Transfer Stats")
+        stats_layout = QVBoxLayout()
+        stats_header = QHBoxLayout()
+        self.combo_stats_range = QComboBox()
+        self.combo_stats_range.addItems(["Last 24 hours", "Last 7 days", "Last 30 days", "All time"])
+        self.combo_stats_range.currentTextChanged.connect(self.refresh_history_stats)
+        btn_stats = QPushButton("🔄 Refresh Stats")
+        btn_stats.clicked.connect(self.refresh_history_stats)
+        stats_header.addWidget(self.combo_stats_range)
+        stats_header.addStretch()
+        stats_header.addWidget(btn_stats)
+        self.lbl_stats = QLabel()
+        self.lbl_stats.setTextFormat(Qt.RichText)
+        stats_layout.addLayout(stats_header)
+        stats_layout.addWidget(self.lbl_stats)
+        stats_group.setLayout(stats_layout)
+        layout.addWidget(stats_group)
         self.tab_downloads.setLayout(layout)
 
     def setup_settings_tab(self):
@@ -275,6 +422,12 @@ class CrocApp(QWidget):
         self.chk_delete_sent.stateChanged.connect(self._save_state)
         layout.addRow("", self.chk_delete_sent)
 
+        # Mirror mode: keep originals, propagate renames and deletions to the server
+        self.chk_mirror = QCheckBox("Mirror mode: propagate renames/deletions instead of deleting sent files")
+        self.chk_mirror.setChecked(self.config.get("mirror_mode", False))
+        self.chk_mirror.stateChanged.connect(self._save_state)
+        layout.addRow("", self.chk_mirror)
+
         # 2. Option for time interval
         self.spin_interval = QSpinBox()
         self.spin_interval.setRange(1, 3600)
@@ -283,6 +436,16 @@ class CrocApp(QWidget):
         self.spin_interval.valueChanged.connect(self._save_state)
         layout.addRow("Folder Check Interval:", self.spin_interval)
 
+        # Filters for folder sends (manual/queued); watched folders also have their own.
+        self.chk_default_excludes = QCheckBox("Skip partial downloads, lock and swap files (.part, ~$*, .DS_Store, .swp)")
+        self.chk_default_excludes.setChecked(self.config.get("default_excludes", True))
+        self.chk_default_excludes.stateChanged.connect(self._save_state)
+        layout.addRow("", self.chk_default_excludes)
+        self.txt_send_exclude = QLineEdit(", ".join(self.config.get("send_exclude", [])))
+        self.txt_send_exclude.setPlaceholderText("e.g. *.bak, node_modules/, .git/")
+        self.txt_send_exclude.editingFinished.connect(self._save_state)
+        layout.addRow("Exclude from Folder Sends:", self.txt_send_exclude)
+
         # 3. Code length
         self.spin_length = QSpinBox()
         self.spin_length.setRange(4, 20)
@@ -290,6 +453,13 @@ class CrocApp(QWidget):
         self.spin_length.valueChanged.connect(self.update_code_length)
         layout.addRow("Auto-Code Length:", self.spin_length)
 
+        # 4. Archive format (7z spawns a process per file, native formats run in-process)
+        self.combo_archive = QComboBox()
+        self.combo_archive.addItems(ARCHIVE_FORMATS)
+        self.combo_archive.setCurrentText(self.config.get("archive_format", "7z"))
+        self.combo_archive.currentTextChanged.connect(self._save_state)
+        layout.addRow("Archive Format:", self.combo_archive)
+
         self.tab_settings.setLayout(layout)
 
     # ==========================
@@ -298,18 +468,195 @@ class CrocApp(QWidget):
     def _save_state(self):
         """Extracts UI values and saves to config.json"""
         self.config["sender_code"] = self.auto_send_code.text().strip()
-        self.config["sender_folders"] = [self.auto_send_list.item(i).text() for i in range(self.auto_send_list.count())]
+        self.config["sender_folders"] = [self.folder_policies.get(path, FolderPolicy(path)).to_config()
+                                         for path in (self.auto_send_list.item(i).text()
+                                                      for i in range(self.auto_send_list.count()))]
         self.config["receiver_listeners"] = [self.auto_recv_list.item(i).text() for i in
                                              range(self.auto_recv_list.count())]
         self.config["delete_after_send"] = self.chk_delete_sent.isChecked()
+        self.config["mirror_mode"] = self.chk_mirror.isChecked()
         self.config["check_interval"] = self.spin_interval.value()
+        self.config["default_excludes"] = self.chk_default_excludes.isChecked()
+        self.config["send_exclude"] = parse_globs(self.txt_send_exclude.text())
         self.config["code_length"] = self.spin_length.value()
+        self.config["archive_format"] = self.combo_archive.currentText()
+        self.config["manual_profile"] = self.combo_send_profile.currentText()
+        self.config["job_concurrency"] = self.spin_job_concurrency.value()
         save_config(self.config)
 
     def update_code_length(self):
         self.code_length = self.spin_length.value()
         self._save_state()
 
+    # ==========================
+    # LOGIC: JOB QUEUE
+    # ==========================
+    def queue_send(self):
+        path = self.file_path_input.text()
+        code = self.txt_code.text().strip()
+        if not path or not code or self.job_queue is None: return
+        self.job_queue.add_send(path, code, self.combo_archive.currentText(), self.combo_send_profile.currentText())
+        self.log(f"[Queue] ➕ Send queued: {os.path.basename(os.path.normpath(path))} on code '{code}'")
+        # Every queued send needs its own code, so the next one gets a fresh one.
+        self.txt_code.setText(generate_transfer_code(self.code_length))
+        self._pump_jobs()
+
+    def queue_recv(self):
+        code = self.recv_code_input.text().strip()
+        if not code or self.job_queue is None: return
+        self.job_queue.add_recv(code)
+        self.log(f"[Queue] ➕ Receive queued on code '{code}'")
+        self.recv_code_input.clear()
+        self._pump_jobs()
+
+    def _pump_jobs(self):
+        """Starts queued jobs until the configured number are running."""
+        if self.job_queue is None or not self.dependencies_probed:
+            return
+        while len(self.job_workers) < self.spin_job_concurrency.value():
+            job = self.job_queue.next_queued()
+            if not job: break
+            if job["kind"] == "recv":
+                self._start_job_receive(job)
+            elif job["staged_path"] and os.path.exists(job["staged_path"]):
+                self._start_job_send(job)
+            else:
+                self._start_job_zip(job)
+        self.refresh_job_list()
+
+    def _start_job_zip(self, job):
+        job_id = job["id"]
+        staged_dir = self.job_queue.staging_dir_for(job_id)
+        self.job_queue.update(job_id, state=ZIPPING, staged_dir=staged_dir, staged_path=None, error=None,
+                              zip_started=time.time())
+        from workers import ZipWorker
+        worker = ZipWorker(job["source"], self._7z_path, job["archive_format"], job["profile"], staging_dir=staged_dir,
+                           path_filter=self._send_filter())
+        worker.log_signal.connect(self.log)
+        worker.finished_signal.connect(lambda ok, staged, _base, jid=job_id: self.on_job_zipped(jid, ok, staged))
+        self.job_workers[job_id] = {"worker": worker, "unzip": None}
+        worker.start()
+
+    def on_job_zipped(self, job_id, success, staged_path):
+        job = self.job_queue.get(job_id)
+        if job is None:
+            self.job_workers.pop(job_id, None)
+        elif success:
+            self.job_queue.update(job_id, staged_path=staged_path, compress_s=time.time() - job["zip_started"])
+            self._start_job_send(job)
+        else:
+            self.job_workers.pop(job_id, None)
+            self.job_queue._discard_staging(job)
+            self.job_queue.update(job_id, state=PAUSED, error="Zipping failed")
+        self._pump_jobs()
+
+    def _start_job_send(self, job):
+        job_id = job["id"]
+        self.job_queue.update(job_id, state=SENDING, error=None, attempts=job.get("attempts", 0) + 1)
+        self._restage_raw_files(job["staged_dir"])
+        from workers import CrocWorker
+        worker = CrocWorker(["croc", "send", "--code", job["code"], job["staged_path"]])
+        worker.log_signal.connect(self.log)
+        worker.finished_signal.connect(lambda paused, ok, jid=job_id: self.on_job_croc_finished(jid, paused, ok))
+        self.job_workers[job_id] = {"worker": worker, "unzip": None}
+        worker.start()
+
+    def _start_job_receive(self, job):
+        job_id = job["id"]
+        self.job_queue.update(job_id, state=RECEIVING, error=None, attempts=job.get("attempts", 0) + 1)
+        # Each receive job has its own session folder, so a paused job resumes where croc left off.
+        staging = ReceiveStaging(self.download_folder, f"job-{job_id}")
+        session_dir = staging.prepare()
+        from workers import CrocWorker, LiveUnzipWorker
+        worker = CrocWorker(["croc", "--yes", "--out", session_dir, job["code"]], kind="recv")
+        worker.log_signal.connect(self.log)
+        worker.finished_signal.connect(lambda paused, ok, jid=job_id: self.on_job_croc_finished(jid, paused, ok))
+        unzip = LiveUnzipWorker(self.download_folder, self._7z_path, staging,
+                                fsync=self.config.get("receive_fsync", True))
+        unzip.log_signal.connect(self.log)
+        unzip.file_extracted_signal.connect(self.refresh_file_list)
+        self.job_workers[job_id] = {"worker": worker, "unzip": unzip}
+        worker.start()
+        unzip.start()
+
+    def on_job_croc_finished(self, job_id, was_paused, is_success):
+        running = self.job_workers.pop(job_id, None)
+        job = self.job_queue.get(job_id)
+        changed = is_success and job and job["kind"] == "send" and self._raw_files_changed(job["staged_dir"])
+        if running and job:
+            outcome = "ok" if is_success and not changed else ("paused" if was_paused else "failed")
+            if running["unzip"]:
+                running["unzip"].stop(publish_remaining=is_success)
+                self._record_receive("job", running["worker"], running["unzip"], job["code"], outcome,
+                                     job.get("attempts", 1) - 1)
+            else:
+                self._record_send("job", running["worker"], job["code"], job["source"], job["staged_path"],
+                                  outcome, job.get("compress_s", 0), job.get("attempts", 1) - 1)
+        elif running and running["unzip"]:
+            running["unzip"].stop(publish_remaining=is_success)
+        if changed:
+            self.job_queue.update(job_id, state=PAUSED, error="Source changed while sending")
+        elif is_success:
+            self.job_queue.finish(job_id)
+            self.refresh_file_list()
+        elif job:
+            self.job_queue.update(job_id, state=PAUSED, error=None if was_paused else "Connection dropped")
+        self._pump_jobs()
+
+    def _selected_job_ids(self):
+        return [item.data(Qt.UserRole) for item in self.job_list.selectedItems()]
+
+    def pause_selected_jobs(self):
+        for job_id in self._selected_job_ids():
+            job = self.job_queue.get(job_id)
+            if not job: continue
+            if job["state"] in (SENDING, RECEIVING) and job_id in self.job_workers:
+                # on_job_croc_finished records the pause once croc has exited.
+                self.job_workers[job_id]["worker"].stop()
+            elif job["state"] == QUEUED:
+                self.job_queue.update(job_id, state=PAUSED)
+        self.refresh_job_list()
+
+    def resume_selected_jobs(self):
+        for job_id in self._selected_job_ids():
+            job = self.job_queue.get(job_id)
+            if job and job["state"] == PAUSED:
+                self.job_queue.update(job_id, state=QUEUED, error=None)
+        self._pump_jobs()
+
+    def remove_selected_jobs(self):
+        for job_id in self._selected_job_ids():
+            job = self.job_queue.get(job_id)
+            if not job or job["state"] == ZIPPING: continue
+            running = self.job_workers.pop(job_id, None)
+            if running:
+                running["worker"].stop()
+                if running["unzip"]: running["unzip"].stop()
+            if job["kind"] == "recv":
+                ReceiveStaging(self.download_folder, f"job-{job_id}").reset()
+            self.job_queue.remove(job_id)
+        self._pump_jobs()
+
+    def clear_finished_jobs(self):
+        if self.job_queue is None: return
+        self.job_queue.clear_done()
+        self.refresh_job_list()
+
+    def refresh_job_list(self):
+        if self.job_queue is None: return
+        icons = {QUEUED: "🕒", ZIPPING: "🗜️", SENDING: "📤", RECEIVING: "📥", PAUSED: "⏸️", DONE: "✅"}
+        selected = set(self._selected_job_ids())
+        self.job_list.clear()
+        for job in self.job_queue.jobs:
+            label = os.path.basename(os.path.normpath(job["source"])) if job["kind"] == "send" else "receive"
+            text = f"{icons.get(job['state'], '')} {job['state']:<9} {label}  ::  {job['code']}"
+            if job.get("error"):
+                text += f"  ({job['error']})"
+            item = QListWidgetItem(text)
+            item.setData(Qt.UserRole, job["id"])
+            self.job_list.addItem(item)
+            item.setSelected(job["id"] in selected)
+
     # ==========================
     # LOGIC: AUTO SENDER (WATCHER)
     # ==========================
@@ -318,12 +665,92 @@ class CrocApp(QWidget):
         if dname:
             items = [self.auto_send_list.item(i).text() for i in range(self.auto_send_list.count())]
             if dname not in items:
+                self.folder_policies[dname] = FolderPolicy(dname)
                 self.auto_send_list.addItem(dname)
                 self._save_state()
 
     def remove_watch_folder(self):
         for item in self.auto_send_list.selectedItems():
             self.auto_send_list.takeItem(self.auto_send_list.row(item))
+            self.folder_policies.pop(item.text(), None)
+        self._save_state()
+
+    def apply_folder_profile(self):
+        for item in self.auto_send_list.selectedItems():
+            policy = self.folder_policies.setdefault(item.text(), FolderPolicy(item.text()))
+            profile = self.combo_folder_profile.currentText()
+            policy.profile = None if profile == "default" else profile
+        self._refresh_folder_profile_tooltips()
+        self._save_state()
+
+    def _refresh_folder_profile_tooltips(self):
+        for i in range(self.auto_send_list.count()):
+            item = self.auto_send_list.item(i)
+            policy = self.folder_policies.get(item.text())
+            item.setToolTip(f"Profile: {(policy and policy.profile) or 'default'}\n"
+                            f"Settings: {policy.describe() if policy else 'watcher defaults'}")
+
+    def edit_folder_policy(self):
+        """Edits the per-folder overrides of the selected folders; empty fields use the watcher defaults."""
+        items = self.auto_send_list.selectedItems()
+        if not items:
+            QMessageBox.information(self, "Folder Settings", "Select one or more watched folders first.")
+            return
+        first = self.folder_policies.setdefault(items[0].text(), FolderPolicy(items[0].text()))
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"Folder Settings ({len(items)} folder{'s' if len(items) > 1 else ''})")
+        form = QFormLayout()
+        txt_code = QLineEdit(first.code or "")
+        txt_code.setPlaceholderText("Server code of the watcher")
+        spin_interval = QSpinBox()
+        spin_interval.setRange(0, 3600)
+        spin_interval.setSpecialValueText("Watcher default")
+        spin_interval.setSuffix(" seconds")
+        spin_interval.setValue(first.interval or 0)
+        combo_profile = QComboBox()
+        combo_profile.addItems(list(COMPRESSION_PROFILES) + [ADAPTIVE_PROFILE])
+        combo_profile.setCurrentText(first.profile or "default")
+        combo_priority = QComboBox()
+        combo_priority.addItems(list(PRIORITIES))
+        combo_priority.setCurrentText(first.priority or "normal")
+        combo_delete = QComboBox()
+        combo_delete.addItems(["Watcher default", "Delete after sending", "Keep originals"])
+        combo_delete.setCurrentIndex({None: 0, True: 1, False: 2}[first.delete_after_send])
+        txt_include = QLineEdit(", ".join(first.include))
+        txt_include.setPlaceholderText("e.g. *.csv, reports/**  (empty = everything)")
+        txt_exclude = QLineEdit(", ".join(first.exclude))
+        txt_exclude.setPlaceholderText("e.g. *.bak, cache/  (a trailing / matches folders only)")
+        combo_defaults = QComboBox()
+        combo_defaults.addItems(["Watcher default", "Skip temp/lock/swap files", "Send them too"])
+        combo_defaults.setCurrentIndex({None: 0, True: 1, False: 2}[first.default_excludes])
+        form.addRow("Server Code:", txt_code)
+        form.addRow("Check Interval:", spin_interval)
+        form.addRow("Compression:", combo_profile)
+        form.addRow("Priority:", combo_priority)
+        form.addRow("Originals:", combo_delete)
+        form.addRow("Include:", txt_include)
+        form.addRow("Exclude:", txt_exclude)
+        form.addRow("Temp Files:", combo_defaults)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        form.addRow(buttons)
+        dialog.setLayout(form)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+
+        for item in items:
+            policy = self.folder_policies.setdefault(item.text(), FolderPolicy(item.text()))
+            policy.code = txt_code.text().strip() or None
+            policy.interval = spin_interval.value() or None
+            policy.profile = None if combo_profile.currentText() == "default" else combo_profile.currentText()
+            policy.priority = None if combo_priority.currentText() == "normal" else combo_priority.currentText()
+            policy.delete_after_send = [None, True, False][combo_delete.currentIndex()]
+            policy.include = parse_globs(txt_include.text())
+            policy.exclude = parse_globs(txt_exclude.text())
+            policy.default_excludes = [None, True, False][combo_defaults.currentIndex()]
+        self._refresh_folder_profile_tooltips()
         self._save_state()
 
     def toggle_auto_send(self):
@@ -336,13 +763,16 @@ class CrocApp(QWidget):
             self.auto_send_code.setReadOnly(False)
             self.log("[Watcher] 🛑 Stopped.")
         else:
-            folders = [self.auto_send_list.item(i).text() for i in range(self.auto_send_list.count())]
+            paths = [self.auto_send_list.item(i).text() for i in range(self.auto_send_list.count())]
+            # Fresh copies: the worker keeps each folder's scan schedule on its policy.
+            folders = [FolderPolicy.from_config(self.folder_policies.get(p, FolderPolicy(p)).to_config())
+                       for p in paths]
             code = self.auto_send_code.text().strip()
 
             if not folders:
                 QMessageBox.warning(self, "Error", "Add at least one folder to watch.")
                 return
-            if not code:
+            if not code and any(not policy.code for policy in folders):
                 QMessageBox.warning(self, "Error", "Please enter a Server Code.")
                 return
 
@@ -352,10 +782,20 @@ class CrocApp(QWidget):
             self.auto_send_list.setEnabled(False)
             self.auto_send_code.setReadOnly(True)
 
+            from workers import AutoSendWorker
             self.auto_send_worker = AutoSendWorker(
                 folders, code, self._7z_path,
                 delete_after_send=self.chk_delete_sent.isChecked(),
-                check_interval=self.spin_interval.value()
+                check_interval=self.spin_interval.value(),
+                prefetch_depth=self.config.get("watcher_prefetch", 4),
+                batch_max_files=self.config.get("watcher_batch_files", 32),
+                batch_max_bytes=self.config.get("watcher_batch_mb", 64) * 1024 * 1024,
+                archive_format=self.combo_archive.currentText(),
+                require_ack=self.config.get("require_ack", True),
+                ack_timeout=self.config.get("ack_timeout", 60),
+                mirror_mode=self.chk_mirror.isChecked(),
+                cold_interval_max=self.config.get("watch_cold_interval_max", 300),
+                default_excludes=self.chk_default_excludes.isChecked()
             )
             self.auto_send_worker.log_signal.connect(self.log)
             self.auto_send_worker.finished_signal.connect(self.on_auto_send_finished)
@@ -395,10 +835,12 @@ class CrocApp(QWidget):
         self._save_state()
 
     def toggle_auto_recv(self):
-        if self.auto_recv_workers:
-            for worker in self.auto_recv_workers:
-                worker.stop()
-            self.auto_recv_workers.clear()
+        if self.auto_recv_pool:
+            # Keep a reference until the pool's threads have wound down.
+            pool, self.auto_recv_pool = self.auto_recv_pool, None
+            self.stopping_recv_pools.append(pool)
+            pool.finished.connect(lambda: self.stopping_recv_pools.remove(pool))
+            pool.stop()
             self.btn_start_auto_recv.setText("📡 Start Server Listeners")
             self.btn_start_auto_recv.setStyleSheet(
                 "background-color: #2196F3; color: white; padding: 15px; font-weight:bold; font-size:14px;")
@@ -417,18 +859,25 @@ class CrocApp(QWidget):
             self.log("=" * 40)
             self.log("[Server] Initializing...")
 
+            listeners = []
             for i in range(self.auto_recv_list.count()):
-                text = self.auto_recv_list.item(i).text()
-                parts = text.split("  ::  ")
+                parts = self.auto_recv_list.item(i).text().split("  ::  ")
                 if len(parts) == 2:
-                    folder_name = parts[0]
-                    code = parts[1]
-
-                    worker = AutoRecvWorker(code, self.download_folder, folder_name, self._7z_path)
-                    worker.log_signal.connect(self.log)
-                    worker.extracted_signal.connect(self.refresh_file_list)
-                    self.auto_recv_workers.append(worker)
-                    worker.start()
+                    listeners.append((parts[0], parts[1]))
+
+            # All codes share one pool with a bounded number of live croc processes.
+            from workers import ListenerPoolWorker
+            self.auto_recv_pool = ListenerPoolWorker(
+                listeners, self.download_folder, self._7z_path,
+                max_live=self.config.get("listener_max_live", 8),
+                poll_interval=self.config.get("listener_poll_interval", 3),
+                idle_backoff=self.config.get("listener_idle_backoff", 30),
+                handshake_timeout=self.config.get("listener_handshake_timeout", 30),
+                ack_timeout=self.config.get("ack_timeout", 60),
+                fsync=self.config.get("receive_fsync", True))
+            self.auto_recv_pool.log_signal.connect(self.log)
+            self.auto_recv_pool.extracted_signal.connect(self.refresh_file_list)
+            self.auto_recv_pool.start()
 
     # ==========================
     # UTILS & MANUAL UI
@@ -486,7 +935,10 @@ class CrocApp(QWidget):
             if not path or not code: return
             self.cleanup_staged_files()
             self.set_ui_state("ZIPPING")
-            self.zip_worker = ZipWorker(path, self._7z_path)
+            self.zip_started, self.send_attempts = time.time(), 0
+            from workers import ZipWorker
+            self.zip_worker = ZipWorker(path, self._7z_path, self.combo_archive.currentText(),
+                                        self.combo_send_profile.currentText(), path_filter=self._send_filter())
             self.zip_worker.log_signal.connect(self.log)
             self.zip_worker.finished_signal.connect(self.on_zip_finished)
             self.zip_worker.start()
@@ -500,29 +952,130 @@ class CrocApp(QWidget):
             if self.croc_worker: self.croc_worker.stop()
             self.set_ui_state("PAUSED_SEND")
         elif self.current_state == "PAUSED_SEND":
-            self.set_ui_state("SENDING")
-            code = self.txt_code.text().strip()
-            self.croc_worker = CrocWorker(["croc", "send", "--code", code, self.staged_path_to_send])
-            self.croc_worker.log_signal.connect(self.log)
-            self.croc_worker.finished_signal.connect(self.on_croc_send_finished)
-            self.croc_worker.start()
+            self.start_send()
+
+    def start_send(self):
+        self.set_ui_state("SENDING")
+        self.send_attempts += 1
+        self._restage_raw_files(self.staged_base_temp_dir)
+        code = self.txt_code.text().strip()
+        from workers import CrocWorker
+        self.croc_worker = CrocWorker(["croc", "send", "--code", code, self.staged_path_to_send])
+        self.croc_worker.log_signal.connect(self.log)
+        self.croc_worker.finished_signal.connect(self.on_croc_send_finished)
+        self.croc_worker.start()
 
     def on_zip_finished(self, success, staged_path, temp_base_dir):
         if success:
             self.staged_path_to_send = staged_path
             self.staged_base_temp_dir = temp_base_dir
-            self.handle_pause_send_click()
+            self.zip_seconds = time.time() - self.zip_started
+            self.start_send()
         else:
             self.cleanup_staged_files()
             self.set_ui_state("IDLE")
 
     def on_croc_send_finished(self, was_paused, is_success):
-        if is_success:
+        ok = is_success and not self._raw_files_changed(self.staged_base_temp_dir)
+        self._record_send("manual", self.croc_worker, self.txt_code.text().strip(), self.file_path_input.text(),
+                          self.staged_path_to_send, "ok" if ok else ("paused" if was_paused else "failed"),
+                          self.zip_seconds, self.send_attempts - 1)
+        if ok:
             self.cleanup_staged_files()
             self.set_ui_state("IDLE")
         else:
             self.set_ui_state("PAUSED_SEND")
 
+    # ==========================
+    # TRANSFER HISTORY
+    # ==========================
+    def _record_send(self, source, worker, code, source_path, staged_path, outcome, compress_s, retries):
+        files, raw = tree_stats(source_path) if source_path and os.path.exists(source_path) else (0, 0)
+        _, packed = tree_stats(staged_path) if staged_path and os.path.exists(staged_path) else (0, 0)
+        HISTORY.record("send", source, outcome, worker.started_at or time.time(), code=code, files=files,
+                       bytes_raw=raw, bytes_packed=packed, compress_s=compress_s, transfer_s=worker.duration,
+                       retries=retries)
+
+    def _record_receive(self, source, croc_worker, unzip_worker, code, outcome, retries):
+        """Recorded once the unzipper's final pass is done, so its totals are complete."""
+        def record():
+            # Data left in staging because it could not be published was not delivered.
+            final = "failed" if outcome == "ok" and unzip_worker.unpublished else outcome
+            HISTORY.record("recv", source, final, croc_worker.started_at or time.time(), code=code,
+                           files=unzip_worker.received_files, bytes_raw=unzip_worker.received_bytes,
+                           bytes_packed=unzip_worker.received_bytes, transfer_s=croc_worker.duration,
+                           retries=retries)
+        if unzip_worker.isFinished():
+            record()
+        else:
+            unzip_worker.finished.connect(record)
+
+    def refresh_history_stats(self):
+        ranges = {"Last 24 hours": 86400, "Last 7 days": 7 * 86400, "Last 30 days": 30 * 86400, "All time": None}
+        span = ranges.get(self.combo_stats_range.currentText())
+        rows = HISTORY.stats(since=time.time() - span if span else None)
+        if not rows:
+            self.lbl_stats.setText("<i>No transfers recorded yet.</i>" + self._adaptive_stats_html())
+            return
+        html = ["<table cellspacing='6'><tr><th align='left'>Direction</th><th align='left'>Listener</th>"
+                "<th>Transfers</th><th>OK</th><th>Files</th><th>Data</th><th>Retries</th>"
+                "<th>Avg transfer</th><th>Throughput</th></tr>"]
+        for r in rows:
+            html.append(f"<tr><td>{r['direction']}</td><td>{r['listener'] or '-'}</td>"
+                        f"<td align='right'>{r['transfers']}</td><td align='right'>{r['ok']}</td>"
+                        f"<td align='right'>{r['files'] or 0}</td>"
+                        f"<td align='right'>{(r['bytes_raw'] or 0) / (1024 * 1024):.1f} MB</td>"
+                        f"<td align='right'>{r['retries'] or 0}</td>"
+                        f"<td align='right'>{r['avg_transfer_s'] or 0:.1f} s</td>"
+                        f"<td align='right'>{(r['rate'] or 0) / (1024 * 1024):.2f} MB/s</td></tr>")
+        html.append("</table>")
+        html.append(self._adaptive_stats_html())
+        self.lbl_stats.setText("".join(html))
+
+    def _adaptive_stats_html(self):
+        """What the adaptive compression controller currently measures and picks (this session only)."""
+        snapshot = METRICS.snapshot()
+        gauges = snapshot["gauges"]
+        if "adaptive.level" not in gauges:
+            return ""
+        link = gauges.get("adaptive.link_bps")
+        link_text = f"link {link / (1024 * 1024):.2f} MB/s" if link else "link not measured yet"
+        html = [f"<p><b>Adaptive compression:</b> level {gauges['adaptive.level']}, {link_text}, "
+                f"{snapshot['counters'].get('adaptive.level_changes', 0)} level change(s)</p>"]
+        levels = sorted(int(k[len("adaptive.level"):-len(".ratio")]) for k in gauges
+                        if k.startswith("adaptive.level") and k.endswith(".ratio"))
+        if levels:
+            html.append("<table cellspacing='6'><tr><th>Level</th><th>Compress</th><th>Ratio</th></tr>")
+            for level in levels:
+                html.append(f"<tr><td align='right'>{level}</td>"
+                            f"<td align='right'>{gauges[f'adaptive.level{level}.compress_bps'] / (1024 * 1024):.1f} MB/s</td>"
+                            f"<td align='right'>{gauges[f'adaptive.level{level}.ratio']:.3f}</td></tr>")
+            html.append("</table>")
+        changes = [e for e in snapshot["events"] if e["event"] == "adaptive.level_change"][-3:]
+        for e in reversed(changes):
+            html.append(f"<br><i>{time.strftime('%H:%M:%S', time.localtime(e['ts']))}: "
+                        f"level {e['old']} → {e['new']} ({e['reason']})</i>")
+        return "".join(html)
+
+    def _send_filter(self):
+        return PathFilter(self.config.get("send_include", []), self.config.get("send_exclude", []),
+                          self.config.get("default_excludes", True))
+
+    def _restage_raw_files(self, staged_dir):
+        """Store-mode sends link the originals; anything edited since staging is staged again first."""
+        if not staged_dir: return
+        changed = verify_zero_copy(staged_dir)
+        if changed:
+            self.log(f"♻️ {len(changed)} file(s) changed since staging; re-staged before sending.")
+
+    def _raw_files_changed(self, staged_dir):
+        """True if a hardlinked original was modified while croc was sending it."""
+        if not staged_dir: return False
+        changed = verify_zero_copy(staged_dir, restage=False, hardlinks_only=True)
+        if changed:
+            self.log(f"⚠️ {len(changed)} file(s) changed while being sent. Resume to send the current version.")
+        return bool(changed)
+
     def cleanup_staged_files(self):
         if self.staged_base_temp_dir and os.path.exists(self.staged_base_temp_dir):
             shutil.rmtree(self.staged_base_temp_dir, ignore_errors=True)
@@ -533,29 +1086,46 @@ class CrocApp(QWidget):
         if self.current_state == "IDLE":
             code = self.recv_code_input.text().strip()
             if not code: return
-            self.set_ui_state("RECEIVING")
-            self.croc_worker = CrocWorker(["croc", "--yes", "--out", self.download_folder, code])
-            self.croc_worker.log_signal.connect(self.log)
-            self.croc_worker.finished_signal.connect(self.on_croc_recv_finished)
-            self.croc_worker.start()
-            if self._7z_path:
-                self.live_unzip_worker = LiveUnzipWorker(self.download_folder, self._7z_path)
-                self.live_unzip_worker.file_extracted_signal.connect(self.refresh_file_list)
-                self.live_unzip_worker.start()
+            self.recv_attempts = 0
+            self.start_receive(code)
         elif self.current_state == "PAUSED_RECV":
             if self.croc_worker: self.croc_worker.stop()
+            ReceiveStaging(self.download_folder, "manual").reset()
             self.set_ui_state("IDLE")
 
+    def start_receive(self, code):
+        self.set_ui_state("RECEIVING")
+        self.recv_attempts += 1
+        # croc writes into a private session folder (kept across pause/resume so croc can
+        # resume), and the live unzipper only ever looks at that folder.
+        staging = ReceiveStaging(self.download_folder, "manual")
+        session_dir = staging.prepare()
+        from workers import CrocWorker, LiveUnzipWorker
+        self.croc_worker = CrocWorker(["croc", "--yes", "--out", session_dir, code], kind="recv")
+        self.croc_worker.log_signal.connect(self.log)
+        self.croc_worker.finished_signal.connect(self.on_croc_recv_finished)
+        self.croc_worker.start()
+        self.live_unzip_worker = LiveUnzipWorker(self.download_folder, self._7z_path, staging,
+                                                 fsync=self.config.get("receive_fsync", True))
+        self.live_unzip_worker.file_extracted_signal.connect(self.refresh_file_list)
+        self.live_unzip_worker.start()
+
     def handle_pause_recv_click(self):
         if self.current_state == "RECEIVING":
             if self.croc_worker: self.croc_worker.stop()
             self.set_ui_state("PAUSED_RECV")
         elif self.current_state == "PAUSED_RECV":
-            self.handle_recv_click()
+            code = self.recv_code_input.text().strip()
+            if code: self.start_receive(code)
 
     def on_croc_recv_finished(self, was_paused, is_success):
         self.refresh_file_list()
-        if self.live_unzip_worker: self.live_unzip_worker.stop()
+        if self.live_unzip_worker:
+            self.live_unzip_worker.stop(publish_remaining=is_success)
+            self._record_receive("manual", self.croc_worker, self.live_unzip_worker,
+                                 self.recv_code_input.text().strip(),
+                                 "ok" if is_success else ("paused" if was_paused else "failed"),
+                                 self.recv_attempts - 1)
         if not is_success:
             self.set_ui_state("PAUSED_RECV")
         else:
@@ -578,7 +1148,7 @@ class CrocApp(QWidget):
     def refresh_file_list(self):
         self.file_list_widget.clear()
         if os.path.exists(self.download_folder):
-            items = os.listdir(self.download_folder)
+            items = [i for i in os.listdir(self.download_folder) if not i.startswith(".")]
             items.sort(key=lambda x: os.path.getmtime(os.path.join(self.download_folder, x)), reverse=True)
             for item in items:
                 p = os.path.join(self.download_folder, item)
@@ -0,0 +1,120 @@
+import time
+import sqlite3
+import logging
+import threading
+
+HISTORY_DB = 'croc_history.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transfers (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL NOT NULL,
+    direction TEXT NOT NULL,          -- send | recv
+    source TEXT NOT NULL,             -- manual | job | watcher | listener
+    code TEXT,
+    listener TEXT,
+    files INTEGER DEFAULT 0,
+    bytes_raw INTEGER DEFAULT 0,
+    bytes_packed INTEGER DEFAULT 0,
+    compress_s REAL DEFAULT 0,
+    transfer_s REAL DEFAULT 0,
+    ack_s REAL DEFAULT 0,
+    extract_s REAL DEFAULT 0,
+    retries INTEGER DEFAULT 0,
+    outcome TEXT NOT NULL,            -- ok | failed | paused | rejected | unverified
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transfers_started ON transfers (started);
+CREATE INDEX IF NOT EXISTS idx_transfers_listener ON transfers (listener, started);
+CREATE INDEX IF NOT EXISTS idx_transfers_direction ON transfers (direction, started);
+"""
+
+COLUMNS = ("started", "finished", "direction", "source", "code", "listener", "files", "bytes_raw",
+           "bytes_packed", "compress_s", "transfer_s", "ack_s", "extract_s", "retries", "outcome", "error")
+
+
+class TransferHistory:
+    """
+    One row per croc session (manual, queued job, watcher batch or listener session),
+    kept in SQLite with WAL so the GUI can query while workers append. The connection
+    is opened on first use and shared by the worker threads behind a lock.
+    """
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def record(self, direction, source, outcome, started, finished=None, **fields):
+        """Stores one transfer; unknown fields are ignored. Never raises into a worker."""
+        row = {"direction": direction, "source": source, "outcome": outcome, "started": started,
+               "finished": finished or time.time(), **fields}
+        names = [c for c in COLUMNS if c in row]
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute(f"INSERT INTO transfers ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                                 [row[c] for c in names])
+        except sqlite3.Error as e:
+            logging.error(f"Could not record transfer history: {e}")
+
+    def _where(self, since, until, listener, direction):
+        clauses, args = [], []
+        if since is not None:
+            clauses.append("started >= ?")
+            args.append(since)
+        if until is not None:
+            clauses.append("started < ?")
+            args.append(until)
+        if listener is not None:
+            clauses.append("listener = ?")
+            args.append(listener)
+        if direction is not None:
+            clauses.append("direction = ?")
+            args.append(direction)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def _query(self, sql, args):
+        try:
+            with self._lock:
+                return [dict(r) for r in self._connection().execute(sql, args).fetchall()]
+        except sqlite3.Error as e:
+            logging.error(f"Could not query transfer history: {e}")
+            return []
+
+    def recent(self, since=None, until=None, listener=None, direction=None, limit=100):
+        where, args = self._where(since, until, listener, direction)
+        return self._query(f"SELECT * FROM transfers{where} ORDER BY started DESC LIMIT ?", args + [limit])
+
+    def slowest(self, since=None, until=None, listener=None, direction=None, limit=10):
+        """Successful transfers with the lowest raw throughput (bytes/s over the whole session)."""
+        where, args = self._where(since, until, listener, direction)
+        where += (" AND " if where else " WHERE ") + "outcome = 'ok' AND bytes_raw > 0"
+        return self._query(f"SELECT *, bytes_raw / MAX(finished - started, 0.001) AS rate FROM transfers{where} "
+                           f"ORDER BY rate ASC LIMIT ?", args + [limit])
+
+    def stats(self, since=None, until=None, listener=None, direction=None):
+        """Aggregates per (direction, listener): counts, volume, stage times and throughput."""
+        where, args = self._where(since, until, listener, direction)
+        return self._query(
+            "SELECT direction, COALESCE(listener, '') AS listener, COUNT(*) AS transfers,"
+            " SUM(outcome = 'ok') AS ok, SUM(files) AS files, SUM(bytes_raw) AS bytes_raw,"
+            " SUM(bytes_packed) AS bytes_packed, SUM(retries) AS retries,"
+            " AVG(compress_s) AS avg_compress_s, AVG(transfer_s) AS avg_transfer_s,"
+            " AVG(ack_s) AS avg_ack_s, AVG(extract_s) AS avg_extract_s,"
+            " SUM(bytes_raw) / MAX(SUM(finished - started), 0.001) AS rate"
+            f" FROM transfers{where} GROUP BY direction, listener ORDER BY direction, listener", args)
+
+
+HISTORY = TransferHistory()
@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import logging
+import threading
+
+JOBS_FILE = 'croc_jobs.json'
+# Staged archives live next to the job list so a paused send survives a restart.
+JOBS_STAGING_DIR = 'croc_jobs'
+
+# Job states
+QUEUED = "QUEUED"
+ZIPPING = "ZIPPING"
+SENDING = "SENDING"
+RECEIVING = "RECEIVING"
+PAUSED = "PAUSED"
+DONE = "DONE"
+
+ACTIVE_STATES = (ZIPPING, SENDING, RECEIVING)
+
+
+class JobQueue:
+    """
+    Persistent list of manual sends and receives. Each job is a plain dict:
+      id, kind ("send" | "recv"), code, source, archive_format, profile,
+      state, staged_path, staged_dir, error, created, updated
+    Jobs run in insertion order; the GUI decides how many are active at once.
+    """
+
+    def __init__(self, path=JOBS_FILE, staging_root=JOBS_STAGING_DIR):
+        self.path = path
+        self.staging_root = staging_root
+        self.jobs = []
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    self.jobs = json.load(f)
+            except Exception as e:
+                logging.error(f"Error loading jobs: {e}")
+        # Whatever was running when the app stopped is paused; a send that had
+        # finished zipping resumes from its staged archives.
+        for job in self.jobs:
+            if job["state"] == ZIPPING:
+                self._discard_staging(job)
+                job["state"] = QUEUED
+            elif job["state"] in ACTIVE_STATES:
+                job["state"] = PAUSED
+
+    def save(self):
+        with self._lock:
+            try:
+                tmp = self.path + ".tmp"
+                with open(tmp, 'w') as f:
+                    json.dump(self.jobs, f, indent=4)
+                os.replace(tmp, self.path)
+            except Exception as e:
+                logging.error(f"Error saving jobs: {e}")
+
+    def _add(self, **fields):
+        now = time.time()
+        job = {"id": uuid.uuid4().hex[:12], "state": QUEUED, "staged_path": None, "staged_dir": None,
+               "error": None, "created": now, "updated": now, **fields}
+        self.jobs.append(job)
+        self.save()
+        return job
+
+    def add_send(self, source, code, archive_format, profile):
+        return self._add(kind="send", source=source, code=code, archive_format=archive_format, profile=profile)
+
+    def add_recv(self, code):
+        return self._add(kind="recv", source=None, code=code, archive_format=None, profile=None)
+
+    def get(self, job_id):
+        return next((j for j in self.jobs if j["id"] == job_id), None)
+
+    def update(self, job_id, **fields):
+        job = self.get(job_id)
+        if job:
+            job.update(fields, updated=time.time())
+            self.save()
+        return job
+
+    def staging_dir_for(self, job_id):
+        path = os.path.abspath(os.path.join(self.staging_root, job_id))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def active(self):
+        return [j for j in self.jobs if j["state"] in ACTIVE_STATES]
+
+    def next_queued(self):
+        return next((j for j in self.jobs if j["state"] == QUEUED), None)
+
+    def remove(self, job_id):
+        job = self.get(job_id)
+        if job:
+            self._discard_staging(job)
+            self.jobs.remove(job)
+            self.save()
+
+    def clear_done(self):
+        self.jobs = [j for j in self.jobs if j["state"] != DONE]
+        self.save()
+
+    def finish(self, job_id):
+        job = self.get(job_id)
+        if job:
+            self._discard_staging(job)
+            self.update(job_id, state=DONE, error=None)
+
+    def _discard_staging(self, job):
+        if job.get("staged_dir"):
+            shutil.rmtree(job["staged_dir"], ignore_errors=True)
+        job["staged_dir"] = job["staged_path"] = None
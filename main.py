@@ -1,10 +1,93 @@
+import os
 import sys
-from PyQt5.QtWidgets import QApplication
-from utils import setup_logging
-from gui import CrocApp
+import time
+import argparse
+
+_PROCESS_START = time.perf_counter()
+
+
+def run_profile_benchmark(args):
+    from utils import get_7z_path, load_config
+    from archive import benchmark_profiles
+
+    config = load_config()
+    archive_format = args.format or config.get("archive_format", "7z")
+    try:
+        results, best = benchmark_profiles(args.benchmark_profiles, get_7z_path(), archive_format, args.link_mbps)
+    except RuntimeError as e:
+        print(f"Profile benchmark failed: {e}")
+        sys.exit(1)
+    print(f"Profile benchmark ({archive_format}, link {args.link_mbps} Mbit/s):")
+    for r in results:
+        if r["failed"]:
+            print(f"  {r['profile']:<10} failed")
+            continue
+        print(f"  {r['profile']:<10} ratio {r['ratio']:.3f}  compress {r['compress_mbps']:8.1f} Mbit/s"
+              f"  end-to-end {r['effective_mbps']:8.1f} Mbit/s")
+    if best is None:
+        print("No profile could be benchmarked.")
+        sys.exit(1)
+    print(f"Recommended profile: {best}")
+
+
+def print_history(args):
+    from history import HISTORY
+
+    since = time.time() - args.since_hours * 3600 if args.since_hours > 0 else None
+    scope = f"last {args.since_hours:g} h" if since else "all time"
+    print(f"Transfer history ({scope}{', listener ' + args.listener if args.listener else ''}):")
+    for r in HISTORY.stats(since=since, listener=args.listener):
+        print(f"  {r['direction']:<5} {r['listener'] or '-':<16} {r['transfers']:5d} transfers ({r['ok']} ok)"
+              f"  {(r['bytes_raw'] or 0) / 1048576:10.1f} MB  retries {r['retries'] or 0:3d}"
+              f"  compress {r['avg_compress_s'] or 0:6.1f} s  transfer {r['avg_transfer_s'] or 0:6.1f} s"
+              f"  ack {r['avg_ack_s'] or 0:5.1f} s  extract {r['avg_extract_s'] or 0:5.1f} s"
+              f"  {(r['rate'] or 0) / 1048576:7.2f} MB/s")
+    print("Slowest transfers:")
+    for r in HISTORY.slowest(since=since, listener=args.listener):
+        print(f"  {time.strftime('%Y-%m-%d %H:%M', time.localtime(r['started']))}  {r['direction']:<5}"
+              f" {r['source']:<8} {r['code'] or '':<20} {r['bytes_raw'] / 1048576:10.1f} MB"
+              f"  {r['rate'] / 1048576:7.2f} MB/s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Croc Transfer GUI")
+    parser.add_argument("--benchmark-profiles", metavar="PATH",
+                        help="Benchmark compression profiles on a sample file/folder and exit")
+    parser.add_argument("--link-mbps", type=float, default=100.0, help="Link speed assumed by the benchmark")
+    parser.add_argument("--format", help="Archive format to benchmark (defaults to the configured one)")
+    parser.add_argument("--startup-benchmark", action="store_true",
+                        help="Measure time until the window is shown, then exit (non-zero if over budget)")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Startup budget for --startup-benchmark")
+    parser.add_argument("--history", action="store_true", help="Print transfer history stats and exit")
+    parser.add_argument("--since-hours", type=float, default=24.0,
+                        help="History window in hours for --history (0 for all time)")
+    parser.add_argument("--listener", help="Only show this listener's transfers with --history")
+    parser.add_argument("--profile", choices=["spans", "cprofile", "py-spy"],
+                        help="Write a per-transfer trace (plus a cProfile or py-spy capture) to croc_profiles/")
+    args, _ = parser.parse_known_args(argv)
+    return args
 
 
 def main():
+    args = parse_args()
+
+    if args.benchmark_profiles:
+        run_profile_benchmark(args)
+        return
+    if args.history:
+        print_history(args)
+        return
+
+    if args.profile:
+        # Same switch as setting CROC_PROFILE; the GUI applies it when it configures profiling.
+        os.environ["CROC_PROFILE"] = args.profile
+
+    # Qt and the GUI are only loaded once we know a window is wanted.
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    from utils import setup_logging
+    from gui import CrocApp
+
     # 1. Initialize Application Environment
     setup_logging()
 
@@ -15,6 +98,13 @@ def main():
     window = CrocApp()
     window.show()
 
+    if args.startup_benchmark:
+        def report():
+            elapsed_ms = (time.perf_counter() - _PROCESS_START) * 1000
+            print(f"Startup to first event loop tick: {elapsed_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+            app.exit(0 if elapsed_ms <= args.budget_ms else 1)
+        QTimer.singleShot(0, report)
+
     sys.exit(app.exec_())
 
 
@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+MANIFEST_SUFFIX = ".crocmanifest.json"
+ACK_SUFFIX = ".crocack.json"
+HASH_CHUNK = 1024 * 1024
+
+
+def hash_algorithm():
+    """xxh3-128 when the optional xxhash package is installed, otherwise blake2b (both run at GB/s)."""
+    return "xxh3_128" if xxhash is not None else "blake2b"
+
+
+def hash_file(path, algo=None):
+    algo = algo or hash_algorithm()
+    h = xxhash.xxh3_128() if algo == "xxh3_128" else hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def manifest_entry(source_path, rel_path, with_hash=True):
+    """rel_path is relative to the watched root and always uses '/' separators."""
+    st = os.stat(source_path)
+    entry = {"path": rel_path.replace(os.sep, "/"), "size": st.st_size, "mode": st.st_mode & 0o777}
+    if with_hash:
+        entry["hash"] = hash_file(source_path)
+    return entry
+
+
+def encode_paths(entries):
+    """
+    Interns directories so deep trees don't repeat long prefixes in every entry:
+    each file keeps an index into a sorted directory table, and every directory
+    is front-coded against the previous one as [shared_prefix_len, suffix].
+    """
+    dirs = sorted({e["path"].rpartition("/")[0] for e in entries})
+    index = {d: i for i, d in enumerate(dirs)}
+    coded, prev = [], ""
+    for d in dirs:
+        shared = len(os.path.commonprefix([prev, d]))
+        coded.append([shared, d[shared:]])
+        prev = d
+    files = []
+    for e in entries:
+        d, _, name = e["path"].rpartition("/")
+        files.append({**{k: v for k, v in e.items() if k != "path"}, "dir": index[d], "name": name})
+    return coded, files
+
+
+def decode_paths(coded, files):
+    dirs, prev = [], ""
+    for shared, suffix in coded:
+        prev = prev[:shared] + suffix
+        dirs.append(prev)
+    entries = []
+    for f in files:
+        d = dirs[f["dir"]]
+        entry = {k: v for k, v in f.items() if k not in ("dir", "name")}
+        entry["path"] = f"{d}/{f['name']}" if d else f["name"]
+        entries.append(entry)
+    return entries
+
+
+def write_manifest(out_dir, entries, ack=True, ops=None, payload=None):
+    """
+    Writes a manifest for one croc session and returns (transfer_id, manifest_path).
+    `ops` carries metadata-only mirror operations (rename/delete) for the receiver;
+    `payload` lists the names the session's other files travel under.
+    """
+    transfer_id = uuid.uuid4().hex
+    dirs, files = encode_paths(entries)
+    manifest = {"transfer_id": transfer_id, "created": time.time(), "algo": hash_algorithm(), "ack": ack,
+                "dirs": dirs, "files": files}
+    if ops:
+        manifest["ops"] = ops
+    if payload:
+        manifest["payload"] = payload
+    path = os.path.join(out_dir, transfer_id + MANIFEST_SUFFIX)
+    with open(path, "w") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    return transfer_id, path
+
+
+def load_manifest(path):
+    manifest = load_json(path)
+    if manifest is None:
+        return None
+    if "dirs" in manifest:
+        manifest["files"] = decode_paths(manifest["dirs"], manifest["files"])
+    return manifest
+
+
+def safe_rel_path(rel_path):
+    """Rejects absolute paths and '..' so a manifest can't point outside the destination."""
+    parts = rel_path.split("/")
+    if rel_path.startswith("/") or any(p in ("", "..") for p in parts) or ":" in parts[0]:
+        return None
+    return os.path.join(*parts)
+
+
+def is_manifest(filename):
+    return filename.endswith(MANIFEST_SUFFIX)
+
+
+def load_json(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.error(f"Could not read {path}: {e}")
+        return None
+
+
+def _verify_entry(entry, root_dir, algo):
+    """True if the entry's file under root_dir has the listed size and hash (its mode is then applied)."""
+    rel = safe_rel_path(entry["path"])
+    if rel is None:
+        return False
+    path = os.path.join(root_dir, rel)
+    try:
+        if os.path.getsize(path) != entry["size"] or ("hash" in entry and hash_file(path, algo) != entry["hash"]):
+            return False
+        os.chmod(path, entry.get("mode", 0o644))
+        return True
+    except OSError:
+        return False
+
+
+def _can_verify(algo):
+    if algo == "xxh3_128" and xxhash is None:
+        logging.error("Manifest uses xxh3_128 but xxhash is not installed; cannot verify.")
+        return False
+    return True
+
+
+def verify_tree(manifest, root_dir):
+    """Checks every manifest entry under root_dir. Returns the list of failed relative paths."""
+    algo = manifest.get("algo", "blake2b")
+    if not _can_verify(algo):
+        return [entry["path"] for entry in manifest.get("files", [])]
+    return [entry["path"] for entry in manifest.get("files", []) if not _verify_entry(entry, root_dir, algo)]
+
+
+class StreamVerifier:
+    """
+    Verifies manifest entries while a session is being extracted, not after it. It
+    takes the syncer's place: every file an extractor writes under root_dir is passed
+    on to `syncer` and, if a manifest lists it, hashed on a background thread while
+    the next archive is extracted. finish() checks the entries that never came
+    through and returns {transfer_id: [failed relative paths]}.
+    """
+
+    def __init__(self, manifests, root_dir, syncer=None, workers=2):
+        self.manifests = manifests
+        self.root_dir = root_dir
+        self.syncer = syncer
+        self._entries = {}
+        for manifest in manifests:
+            if _can_verify(manifest.get("algo", "blake2b")):
+                for entry in manifest.get("files", []):
+                    self._entries[entry["path"]] = (manifest, entry)
+        self._checks = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="verify") if self._entries else None
+
+    def add(self, path, nbytes=None):
+        if self.syncer:
+            self.syncer.add(path, nbytes)
+        if self._pool is None:
+            return
+        rel = os.path.relpath(path, self.root_dir).replace(os.sep, "/")
+        found = self._entries.get(rel)
+        if found:
+            # A later archive may overwrite the file; the last write is the one checked.
+            manifest, entry = found
+            self._checks[rel] = self._pool.submit(_verify_entry, entry, self.root_dir, manifest.get("algo", "blake2b"))
+
+    def flush(self):
+        if self.syncer:
+            self.syncer.flush()
+
+    def finish(self):
+        results = {}
+        for manifest in self.manifests:
+            algo = manifest.get("algo", "blake2b")
+            failures = []
+            for entry in manifest.get("files", []):
+                check = self._checks.get(entry["path"])
+                if entry["path"] not in self._entries:
+                    ok = False
+                elif check is not None:
+                    ok = check.result()
+                else:
+                    ok = _verify_entry(entry, self.root_dir, algo)
+                if not ok:
+                    failures.append(entry["path"])
+            results[manifest["transfer_id"]] = failures
+        if self._pool:
+            self._pool.shutdown()
+        return results
+
+
+def ack_code(code, transfer_id):
+    """
+    The return channel: the receiver acknowledges on a code derived from the transfer
+    code and the transfer id, so senders sharing a code never pick up each other's acks.
+    """
+    return f"{code}-ack-{transfer_id[:8]}"
+
+
+def write_ack(out_dir, transfer_id, failures):
+    path = os.path.join(out_dir, transfer_id + ACK_SUFFIX)
+    with open(path, "w") as f:
+        json.dump({"transfer_id": transfer_id, "ok": not failures, "failed": failures}, f)
+    return path
+
+
+def read_ack(ack_dir, transfer_id):
+    path = os.path.join(ack_dir, transfer_id + ACK_SUFFIX)
+    return load_json(path) if os.path.exists(path) else None
@@ -0,0 +1,38 @@
+import threading
+import time
+import logging
+from collections import deque
+
+
+class Metrics:
+    """Thread-safe in-process counters, gauges and a short log of recent decisions."""
+
+    def __init__(self, max_events=200):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.events = deque(maxlen=max_events)
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def event(self, name, **fields):
+        with self._lock:
+            self.events.append({"ts": time.time(), "event": name, **fields})
+        logging.info(f"[metrics] {name} {fields}")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "events": list(self.events),
+            }
+
+
+METRICS = Metrics()
@@ -0,0 +1,199 @@
+import os
+import json
+import shutil
+import logging
+import threading
+
+from manifest import hash_file, safe_rel_path
+from scanner import SCANNER
+
+TRACKER_FILE = 'croc_tracker.json'
+
+# Snapshot record layout: [size, mtime_ns, inode, hash or None]
+SIZE, MTIME, INODE, HASH = range(4)
+
+
+class MirrorTracker:
+    """
+    Persistent per-root snapshot of what the receiver already has, used to turn
+    folder changes into compact operations: add, modify, rename and delete.
+    """
+
+    def __init__(self, path=TRACKER_FILE):
+        self.path = path
+        self.snapshots = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    self.snapshots = json.load(f)
+            except Exception as e:
+                logging.error(f"Error loading tracker: {e}")
+
+    def save(self):
+        with self._lock:
+            try:
+                tmp = self.path + ".tmp"
+                with open(tmp, 'w') as f:
+                    json.dump(self.snapshots, f, separators=(",", ":"))
+                os.replace(tmp, self.path)
+            except Exception as e:
+                logging.error(f"Error saving tracker: {e}")
+
+    def scan(self, root, path_filter=None, snapshot=None):
+        """
+        Current state of a watched root as {rel_path: record}; `path_filter` prunes what
+        isn't mirrored. An already taken scanner.Snapshot of the root can be passed in.
+        """
+        if snapshot is None:
+            snapshot = SCANNER.scan(root, path_filter)
+        return {rel: [size, mtime, inode, None] for rel, size, mtime, inode in
+                zip(snapshot.paths, snapshot.sizes, snapshot.mtimes, snapshot.inodes)}
+
+    def diff(self, root, current):
+        """
+        Returns (ops, changed, file_renames): ops are metadata-only rename/delete operations,
+        changed lists (rel_path, "add" | "modify") whose content has to be sent, and
+        file_renames are the per-file moves the rename ops stand for.
+        """
+        previous = self.snapshots.get(root, {})
+        deleted = {p: rec for p, rec in previous.items() if p not in current}
+        added = {p: rec for p, rec in current.items() if p not in previous}
+        modified = [p for p, rec in current.items()
+                    if p in previous and (rec[SIZE], rec[MTIME]) != (previous[p][SIZE], previous[p][MTIME])]
+
+        renames = []
+        by_inode = {rec[INODE]: p for p, rec in deleted.items()}
+        for new_path, rec in list(added.items()):
+            old_path = by_inode.get(rec[INODE])
+            if old_path and (deleted[old_path][SIZE], deleted[old_path][MTIME]) == (rec[SIZE], rec[MTIME]):
+                renames.append((old_path, new_path))
+                del deleted[old_path], added[new_path]
+
+        # Fall back to content hashes (e.g. moves across filesystems) where sizes line up.
+        by_size = {}
+        for p, rec in deleted.items():
+            if rec[HASH]:
+                by_size.setdefault(rec[SIZE], []).append(p)
+        for new_path, rec in list(added.items()):
+            for old_path in by_size.get(rec[SIZE], []):
+                if old_path not in deleted:
+                    continue
+                try:
+                    digest = hash_file(os.path.join(root, new_path))
+                except OSError:
+                    break
+                if digest == deleted[old_path][HASH]:
+                    rec[HASH] = digest
+                    renames.append((old_path, new_path))
+                    del deleted[old_path], added[new_path]
+                    break
+
+        ops = [{"op": "rename", "from": a, "to": b} for a, b in _collapse_dir_renames(renames, previous, current)]
+        ops += [{"op": "delete", "path": p} for p in sorted(deleted)]
+        changed = [(p, "add") for p in sorted(added)] + [(p, "modify") for p in sorted(modified)]
+        return ops, changed, renames
+
+    def apply_metadata(self, root, ops, file_renames):
+        """Records that the receiver applied rename/delete operations."""
+        with self._lock:
+            snap = self.snapshots.setdefault(root, {})
+            for old_path, new_path in file_renames:
+                if old_path in snap:
+                    snap[new_path] = snap.pop(old_path)
+            for op in ops:
+                if op["op"] == "delete":
+                    snap.pop(op["path"], None)
+        self.save()
+
+    def record(self, root, rel_path, full_path, digest=None):
+        """Records that the receiver now holds the current content of rel_path."""
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            return
+        with self._lock:
+            self.snapshots.setdefault(root, {})[rel_path] = [st.st_size, st.st_mtime_ns, st.st_ino, digest]
+
+
+def _collapse_dir_renames(renames, previous, current):
+    """
+    Folds file renames that together move a whole directory into one directory rename,
+    so moving a big folder costs one operation instead of one per file.
+    """
+    groups = {}
+    for old_path, new_path in renames:
+        old_parts, new_parts = old_path.split("/"), new_path.split("/")
+        common = 0
+        while common < min(len(old_parts), len(new_parts)) - 1 and old_parts[-1 - common] == new_parts[-1 - common]:
+            common += 1
+        if common == 0 or old_parts[-1] != new_parts[-1]:
+            groups.setdefault((old_path, new_path), []).append((old_path, new_path))
+            continue
+        old_dir = "/".join(old_parts[:len(old_parts) - common])
+        new_dir = "/".join(new_parts[:len(new_parts) - common])
+        groups.setdefault((old_dir, new_dir), []).append((old_path, new_path))
+
+    result = []
+    for (old_dir, new_dir), members in groups.items():
+        if len(members) == 1 and members[0] == (old_dir, new_dir):
+            result.append((old_dir, new_dir))
+            continue
+        prefix = old_dir + "/"
+        whole_dir = (
+            old_dir and new_dir
+            and sum(1 for p in previous if p.startswith(prefix)) == len(members)
+            and not any(p.startswith(prefix) for p in current)
+        )
+        if whole_dir:
+            result.append((old_dir, new_dir))
+        else:
+            result.extend(members)
+    return result
+
+
+def apply_ops(ops, dest_dir, trash_dir):
+    """
+    Applies rename/delete operations on the receiver. Each step is a single rename,
+    so a consumer sees either the old or the new layout for every entry, never a copy
+    in progress. Deletions are renamed into trash first and purged afterwards.
+    Returns the list of operations that could not be applied.
+    """
+    failed = []
+    os.makedirs(trash_dir, exist_ok=True)
+    for index, op in enumerate(ops):
+        try:
+            if op["op"] == "rename":
+                src, dst = safe_rel_path(op["from"]), safe_rel_path(op["to"])
+                if not src or not dst:
+                    raise OSError("unsafe path")
+                target = os.path.join(dest_dir, dst)
+                os.makedirs(os.path.dirname(target) or dest_dir, exist_ok=True)
+                os.replace(os.path.join(dest_dir, src), target)
+            elif op["op"] == "delete":
+                rel = safe_rel_path(op["path"])
+                if not rel:
+                    raise OSError("unsafe path")
+                victim = os.path.join(dest_dir, rel)
+                if os.path.lexists(victim):
+                    os.replace(victim, os.path.join(trash_dir, str(index)))
+                    _prune_empty_dirs(os.path.dirname(victim), dest_dir)
+        except OSError as e:
+            logging.error(f"Mirror op failed {op}: {e}")
+            failed.append(op)
+    shutil.rmtree(trash_dir, ignore_errors=True)
+    return failed
+
+
+def _prune_empty_dirs(path, stop_at):
+    stop_at = os.path.abspath(stop_at)
+    path = os.path.abspath(path)
+    while path.startswith(stop_at + os.sep):
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)
@@ -0,0 +1,138 @@
+import os
+import re
+import copy
+
+# Files that are never worth sending: partial downloads, Office lock files, Finder /
+# Explorer metadata and editor swap/backup files. Sending them wastes a session and
+# they usually change again (or vanish) right after.
+DEFAULT_EXCLUDES = (
+    "*.part", "*.partial", "*.crdownload", "*.download", "*.tmp~",
+    "~$*", ".~lock.*#",
+    ".DS_Store", "._*", "Thumbs.db", "desktop.ini",
+    ".*.swp", ".*.swo", ".*.swx", "*~", ".#*", "#*#", "4913",
+)
+
+
+def _translate(pattern):
+    """Glob -> regex source. '*' and '?' stay within one path component, '**' crosses them."""
+    out, i, n = [], 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            if i < n and pattern[i] == "*":
+                i += 1
+                if i < n and pattern[i] == "/":
+                    i += 1
+                    out.append("(?:.*/)?")  # "**/" also matches no directory at all
+                else:
+                    out.append(".*")
+            else:
+                out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = i
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                out.append("\\[")
+                continue
+            body = pattern[i:j].replace("\\", "\\\\")
+            i = j + 1
+            if body[0] in "!^":
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+        else:
+            out.append(re.escape(c))
+    return "".join(out)
+
+
+def compile_globs(patterns):
+    """
+    Compiles glob patterns into one regex matched against '/'-separated relative paths.
+    A pattern without '/' matches the last component at any depth; one with a leading
+    or inner '/' is anchored at the root ("/build" is only the top-level build). A
+    trailing '/' is ignored here (see PathFilter). Returns None when there are no patterns.
+    """
+    parts = []
+    for pattern in patterns:
+        pattern = pattern.strip().replace("\\", "/").rstrip("/")
+        if not pattern.strip("/"):
+            continue
+        if "/" in pattern:
+            parts.append(_translate(pattern.lstrip("/")))
+        else:
+            parts.append("(?:.*/)?" + _translate(pattern))
+    if not parts:
+        return None
+    flags = re.IGNORECASE if os.name == 'nt' else 0
+    return re.compile("(?:" + "|".join(parts) + r")\Z", flags)
+
+
+def parse_globs(text):
+    """Comma-separated glob list, as typed in a settings field."""
+    return [g.strip() for g in text.split(",") if g.strip()]
+
+
+class PathFilter:
+    """
+    Include/exclude globs compiled once into a single regex each, so a scan costs one
+    match per path. Excludes apply to files and directories (an excluded directory is
+    pruned from the walk); a pattern ending in '/' only matches directories. Includes
+    only select files, so they never prune a directory.
+    """
+
+    def __init__(self, include=(), exclude=(), default_excludes=True):
+        self.include = [p for p in include if p.strip()]
+        self.exclude = [p for p in exclude if p.strip()] + (list(DEFAULT_EXCLUDES) if default_excludes else [])
+        self._include = compile_globs(self.include)
+        self._exclude_files = compile_globs([p for p in self.exclude if not p.rstrip().endswith("/")])
+        self._exclude_dirs = compile_globs(self.exclude)
+        # Prepended to every path checked, see under().
+        self.prefix = ""
+
+    def under(self, rel_dir):
+        """
+        The same filter for paths relative to rel_dir, a folder below the root the globs
+        are written against, so "/build" and "src/tmp/" still mean what they say there.
+        """
+        scoped = copy.copy(self)
+        scoped.prefix = self.prefix + rel_dir.replace(os.sep, "/").strip("/") + "/"
+        return scoped
+
+    def signature(self):
+        """Identifies the filter for cache keys."""
+        return [sorted(self.include), sorted(self.exclude)] + ([self.prefix] if self.prefix else [])
+
+    def accepts(self, rel_path):
+        rel_path = self.prefix + rel_path.replace(os.sep, "/")
+        if self._exclude_files and self._exclude_files.match(rel_path):
+            return False
+        return not self._include or bool(self._include.match(rel_path))
+
+    def prunes(self, rel_dir):
+        return bool(self._exclude_dirs and self._exclude_dirs.match(self.prefix + rel_dir.replace(os.sep, "/")))
+
+    def walk(self, root):
+        """os.walk(root) with excluded directories pruned and only accepted files listed."""
+        root = os.path.normpath(root)
+        for dirpath, dirs, files in os.walk(root):
+            rel_dir = os.path.relpath(dirpath, root).replace(os.sep, "/")
+            prefix = "" if rel_dir == "." else rel_dir + "/"
+            dirs[:] = [d for d in dirs if not self.prunes(prefix + d)]
+            yield dirpath, dirs, [f for f in files if self.accepts(prefix + f)]
+
+    def files(self, source):
+        """Accepted files of a file or folder (a single file is judged by its own name)."""
+        if not os.path.isdir(source):
+            if self.accepts(os.path.basename(source)):
+                yield source
+            return
+        for dirpath, dirs, files in self.walk(source):
+            for f in files:
+                yield os.path.join(dirpath, f)
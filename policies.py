@@ -0,0 +1,74 @@
+from pathfilter import PathFilter
+from scheduler import PRIORITY_SMALL, PRIORITY_AUTO, PRIORITY_BULK
+
+# Folder priority names -> scheduler priority classes.
+PRIORITIES = {"high": PRIORITY_SMALL, "normal": PRIORITY_AUTO, "bulk": PRIORITY_BULK}
+
+POLICY_FIELDS = ("code", "interval", "profile", "include", "exclude", "default_excludes", "priority",
+                 "delete_after_send")
+
+
+class FolderPolicy:
+    """
+    Watcher settings for one watched root. Fields left unset (None) fall back to the
+    watcher-wide values. In the config, "sender_folders" entries are either a plain
+    path or a dict:
+      {"path": "...", "code": "site-a", "interval": 10, "profile": "fast",
+       "include": ["*.csv"], "exclude": ["tmp/", "*.bak"], "default_excludes": true,
+       "priority": "high" | "normal" | "bulk", "delete_after_send": false}
+    Each policy also carries its scan schedule: hot folders are rescanned at their base
+    interval, cold ones back off.
+    """
+    __slots__ = POLICY_FIELDS + ("folder", "scan_interval", "idle_scans", "_filter")
+
+    def __init__(self, folder, code=None, interval=None, profile=None, include=None, exclude=None,
+                 default_excludes=None, priority=None, delete_after_send=None):
+        self.folder = folder
+        self.code = code or None
+        self.interval = interval or None
+        self.profile = profile or None
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        # None = the watcher-wide setting.
+        self.default_excludes = default_excludes
+        self.priority = priority if priority in PRIORITIES else None
+        self.delete_after_send = delete_after_send
+        self.scan_interval = None
+        self.idle_scans = 0
+        self._filter = None
+
+    @classmethod
+    def from_config(cls, entry):
+        if isinstance(entry, str):
+            return cls(entry)
+        return cls(entry["path"], **{k: entry.get(k) for k in POLICY_FIELDS})
+
+    def to_config(self):
+        """A plain path when nothing is overridden, so simple configs stay simple."""
+        entry = {k: getattr(self, k) for k in POLICY_FIELDS if getattr(self, k) not in (None, [])}
+        return {"path": self.folder, **entry} if entry else self.folder
+
+    def describe(self):
+        parts = [f"{k}: {getattr(self, k)}" for k in POLICY_FIELDS if getattr(self, k) not in (None, [])]
+        return ", ".join(parts) or "watcher defaults"
+
+    def priority_class(self):
+        return PRIORITIES.get(self.priority, PRIORITY_AUTO)
+
+    def path_filter(self, default_excludes=True):
+        """The folder's include/exclude globs, compiled once (see pathfilter.PathFilter)."""
+        if self._filter is None:
+            use_defaults = default_excludes if self.default_excludes is None else self.default_excludes
+            self._filter = PathFilter(self.include, self.exclude, use_defaults)
+        return self._filter
+
+    def scanned(self, found_changes, base_interval, max_interval):
+        """Updates the scan schedule: a scan that finds nothing doubles the interval, up to max_interval."""
+        base = self.interval or base_interval
+        if found_changes or self.scan_interval is None:
+            self.idle_scans = 0
+            self.scan_interval = base
+        else:
+            self.idle_scans += 1
+            self.scan_interval = min(max(base, max_interval), self.scan_interval * 2)
+        return self.scan_interval
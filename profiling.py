@@ -0,0 +1,211 @@
+import os
+import re
+import sys
+import json
+import time
+import signal
+import shutil
+import logging
+import cProfile
+import threading
+import subprocess
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: no rusage, spans carry wall and thread CPU time only.
+    resource = None
+
+PROFILE_DIR = 'croc_profiles'
+
+# Capture modes on top of the timing spans.
+CAPTURE_OFF = "off"
+CAPTURE_CPROFILE = "cprofile"
+CAPTURE_PYSPY = "py-spy"
+
+
+def _children_usage():
+    """(cpu seconds, peak RSS in MB) of child processes (7z, croc) reaped so far."""
+    if resource is None:
+        return 0.0, 0.0
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is KB on Linux, bytes on macOS.
+    rss_mb = ru.ru_maxrss / (1024 * 1024) if sys.platform == "darwin" else ru.ru_maxrss / 1024
+    return ru.ru_utime + ru.ru_stime, rss_mb
+
+
+class Trace:
+    """
+    Timing spans of one transfer, written as Chrome trace-event JSON (open it in
+    chrome://tracing, Perfetto or speedscope to see the stages on a timeline).
+    Each span also records the thread's own CPU time and the CPU used by child
+    processes reaped while it was open; with several transfers running at once that
+    child time is attributed to whichever spans overlapped it.
+    """
+
+    def __init__(self, name, out_dir, capture=CAPTURE_OFF, start=None):
+        self.name = name
+        self.out_dir = out_dir
+        self.capture = capture
+        self.events = []
+        self.threads = set()
+        # A trace may be opened after the fact (once a poll turned into a transfer).
+        self.t0 = start if start is not None else time.perf_counter()
+        self._lock = threading.Lock()
+        self._profiler = None
+        self._pyspy = None
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.base = os.path.join(out_dir, f"{stamp}-{re.sub(r'[^A-Za-z0-9_.-]+', '_', name)[:60]}-{id(self):x}")
+        if capture == CAPTURE_PYSPY:
+            self._start_pyspy()
+
+    def _us(self, t):
+        return round((t - self.t0) * 1e6)
+
+    def _append(self, event):
+        tid = threading.get_ident()
+        event.update(pid=os.getpid(), tid=tid)
+        with self._lock:
+            if tid not in self.threads:
+                self.threads.add(tid)
+                self.events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                                    "args": {"name": threading.current_thread().name}})
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, stage, **args):
+        start, thread_cpu = time.perf_counter(), time.thread_time()
+        child_cpu, _ = _children_usage()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter()
+            child_cpu_end, child_rss = _children_usage()
+            args.update(cpu_s=round(time.thread_time() - thread_cpu, 4),
+                        child_cpu_s=round(child_cpu_end - child_cpu, 4), child_peak_rss_mb=round(child_rss, 1))
+            self._append({"name": stage, "ph": "X", "ts": self._us(start), "dur": self._us(end) - self._us(start),
+                          "args": args})
+
+    def add(self, stage, start, end, **args):
+        """Records a span measured by the caller (perf_counter timestamps)."""
+        self._append({"name": stage, "ph": "X", "ts": self._us(start), "dur": self._us(end) - self._us(start),
+                      "args": args})
+
+    @contextmanager
+    def profiled(self):
+        """cProfile for the calling thread while the block runs (capture mode "cprofile")."""
+        if self.capture != CAPTURE_CPROFILE or self._profiler is not None:
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Only one profiler may be active per process on newer Pythons.
+            logging.info(f"[profile] cProfile busy, {self.name} runs without it")
+            yield
+            return
+        self._profiler = profiler
+        try:
+            yield
+        finally:
+            profiler.disable()
+
+    def _start_pyspy(self):
+        pyspy = shutil.which("py-spy")
+        if not pyspy:
+            logging.warning("[profile] py-spy not found on PATH; capturing spans only")
+            return
+        try:
+            self._pyspy = subprocess.Popen(
+                [pyspy, "record", "--pid", str(os.getpid()), "--format", "speedscope", "--nonblocking",
+                 "--output", self.base + ".speedscope.json"],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                # Its own process group, so the Ctrl+Break that stops it on Windows doesn't reach us.
+                creationflags=getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0))
+        except OSError as e:
+            logging.warning(f"[profile] Could not start py-spy: {e}")
+
+    def _stop_pyspy(self):
+        # py-spy writes its profile when interrupted.
+        try:
+            self._pyspy.send_signal(signal.CTRL_BREAK_EVENT if os.name == 'nt' else signal.SIGINT)
+            self._pyspy.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self._pyspy.kill()
+
+    def close(self):
+        """Writes the trace (and any captured profile); returns the trace path."""
+        if self._pyspy:
+            self._stop_pyspy()
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            if self._profiler:
+                self._profiler.dump_stats(self.base + ".prof")
+            with self._lock:
+                trace = {"traceEvents": list(self.events), "displayTimeUnit": "ms",
+                         "otherData": {"transfer": self.name, "started": time.time() - (time.perf_counter() - self.t0)}}
+            with open(self.base + ".trace.json", "w") as f:
+                json.dump(trace, f)
+            logging.info(f"[profile] Wrote {self.base}.trace.json")
+            return self.base + ".trace.json"
+        except OSError as e:
+            logging.error(f"[profile] Could not write trace for {self.name}: {e}")
+            return None
+
+    def discard(self):
+        """Drops a trace that turned out not to cover a transfer (e.g. an idle poll)."""
+        if self._pyspy:
+            self._pyspy.kill()
+
+
+class _NullTrace:
+    """Stand-in when profiling is off: every hook is a no-op."""
+
+    @contextmanager
+    def span(self, stage, **args):
+        yield args
+
+    def add(self, stage, start, end, **args):
+        pass
+
+    @contextmanager
+    def profiled(self):
+        yield
+
+    def close(self):
+        return None
+
+    def discard(self):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class Profiler:
+    """
+    Opt-in per-transfer profiling. Off unless enabled in the config
+    ("profiling": true) or by CROC_PROFILE=spans|cprofile|py-spy in the environment.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.capture = CAPTURE_OFF
+        self.out_dir = PROFILE_DIR
+
+    def configure(self, enabled=False, capture=CAPTURE_OFF, out_dir=PROFILE_DIR):
+        override = os.environ.get("CROC_PROFILE", "").strip().lower()
+        if override:
+            enabled = override not in ("0", "off", "no")
+            capture = override if override in (CAPTURE_CPROFILE, CAPTURE_PYSPY) else CAPTURE_OFF
+        self.enabled = enabled
+        self.capture = capture if capture in (CAPTURE_CPROFILE, CAPTURE_PYSPY) else CAPTURE_OFF
+        self.out_dir = out_dir or PROFILE_DIR
+
+    def trace(self, name, start=None):
+        """A Trace for one transfer, or the no-op NULL_TRACE when profiling is off."""
+        return Trace(name, self.out_dir, self.capture, start) if self.enabled else NULL_TRACE
+
+
+PROFILER = Profiler()
@@ -0,0 +1,116 @@
+import os
+import shutil
+import logging
+
+# Hidden folder under the download directory. It lives on the same filesystem as the
+# destination so publishing is a rename, and the Files tab / live unzip skip it.
+STAGING_DIR_NAME = ".incoming"
+
+
+class ReceiveStaging:
+    """
+    Private landing area for one listener:
+      session/  - croc --out target; kept across failed attempts so croc can resume
+      extract/  - archives are unpacked here, never in the destination
+      rejected/ - delivered files that could not be unpacked; never published
+    Finished entries are moved into the destination with atomic renames. Entries that
+    can't be moved stay in extract/ and are retried by the next publish.
+    """
+
+    def __init__(self, base_download_dir, name):
+        self.root = os.path.join(base_download_dir, STAGING_DIR_NAME, name)
+        self.session_dir = os.path.join(self.root, "session")
+        self.extract_dir = os.path.join(self.root, "extract")
+        self.rejected_dir = os.path.join(self.root, "rejected")
+
+    def prepare(self):
+        os.makedirs(self.session_dir, exist_ok=True)
+        return self.session_dir
+
+    def delivered_files(self, before=None):
+        """
+        Files delivered by the last croc session, and nothing else. With `before` (the
+        stamps() taken when that session started), files it did not create or change,
+        i.e. leftovers of an earlier broken session, are left out.
+        """
+        delivered = []
+        for root, dirs, files in os.walk(self.session_dir):
+            for f in files:
+                path = os.path.join(root, f)
+                if before is None or _stamp(path) != before.get(path):
+                    delivered.append(path)
+        return delivered
+
+    def stamps(self):
+        """{path: (size, mtime_ns)} of what is in the session folder now."""
+        return {os.path.join(root, f): _stamp(os.path.join(root, f))
+                for root, dirs, files in os.walk(self.session_dir) for f in files}
+
+    def reject(self, delivered_path):
+        """Moves a delivered file that can't be unpacked out of the way; returns where it went."""
+        os.makedirs(self.rejected_dir, exist_ok=True)
+        target = os.path.join(self.rejected_dir, os.path.basename(delivered_path))
+        os.replace(delivered_path, target)
+        return target
+
+    def extract_target(self, delivered_path):
+        """Where the contents of a delivered file belong inside the extract area."""
+        rel_dir = os.path.relpath(os.path.dirname(delivered_path), self.session_dir)
+        target = os.path.normpath(os.path.join(self.extract_dir, rel_dir))
+        os.makedirs(target, exist_ok=True)
+        return target
+
+    def publish(self, dest_dir):
+        """
+        Moves everything from the extract area into dest_dir. Returns (published paths,
+        relative paths left in the extract area because they could not be moved).
+        """
+        published, failed = [], []
+        if os.path.isdir(self.extract_dir):
+            _publish_tree(self.extract_dir, dest_dir, published, failed)
+        return published, [os.path.relpath(p, self.extract_dir).replace(os.sep, "/") for p in failed]
+
+    def reset(self):
+        """Clears the session; anything publish() could not move is kept."""
+        shutil.rmtree(self.session_dir, ignore_errors=True)
+        _prune_empty_dirs(self.extract_dir)
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _publish_tree(src_dir, dest_dir, published, failed):
+    try:
+        os.makedirs(dest_dir, exist_ok=True)
+    except OSError as e:
+        logging.error(f"Failed to publish {src_dir} -> {dest_dir}: {e}")
+        failed.append(src_dir)
+        return
+    for entry in os.scandir(src_dir):
+        dest = os.path.join(dest_dir, entry.name)
+        try:
+            if entry.is_dir(follow_symlinks=False) and os.path.isdir(dest):
+                # Merge into an existing folder one entry at a time.
+                _publish_tree(entry.path, dest, published, failed)
+                continue
+            if entry.is_dir(follow_symlinks=False) and os.path.exists(dest):
+                os.remove(dest)
+            os.replace(entry.path, dest)
+            published.append(dest)
+        except OSError as e:
+            logging.error(f"Failed to publish {entry.path} -> {dest}: {e}")
+            failed.append(entry.path)
+
+
+def _prune_empty_dirs(root):
+    """Removes the folders under (and including) root that hold no files."""
+    for dirpath, dirs, files in os.walk(root, topdown=False):
+        try:
+            os.rmdir(dirpath)
+        except OSError:
+            pass
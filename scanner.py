@@ -0,0 +1,158 @@
+import os
+import bisect
+import logging
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class Snapshot:
+    """
+    The files under one root at scan time: relative paths ('/'-separated, sorted) with
+    sizes, mtimes (ns) and inode numbers in parallel typed arrays. Sorted order makes
+    diffing two snapshots a single merge pass.
+    """
+    __slots__ = ("root", "paths", "sizes", "mtimes", "inodes")
+
+    def __init__(self, root, paths=None, sizes=None, mtimes=None, inodes=None):
+        self.root = root
+        self.paths = paths if paths is not None else []
+        self.sizes = sizes if sizes is not None else array("q")
+        self.mtimes = mtimes if mtimes is not None else array("q")
+        self.inodes = inodes if inodes is not None else array("Q")
+
+    @classmethod
+    def from_records(cls, root, records):
+        """records: iterable of (rel_path, size, mtime_ns, inode)."""
+        records = sorted(records)
+        if not records:
+            return cls(root)
+        paths, sizes, mtimes, inodes = zip(*records)
+        return cls(root, list(paths), array("q", sizes), array("q", mtimes), array("Q", inodes))
+
+    def __len__(self):
+        return len(self.paths)
+
+    def index(self, rel_path):
+        i = bisect.bisect_left(self.paths, rel_path)
+        return i if i < len(self.paths) and self.paths[i] == rel_path else -1
+
+    def full_path(self, i):
+        return os.path.join(self.root, *self.paths[i].split("/"))
+
+    def diff(self, previous):
+        """
+        (added, modified, removed) relative paths against an older snapshot of the same
+        root; modified means size or mtime changed. No previous snapshot: all added.
+        """
+        if previous is None:
+            return list(self.paths), [], []
+        added, modified, removed = [], [], []
+        a, b = self.paths, previous.paths
+        i = j = 0
+        while i < len(a) and j < len(b):
+            if a[i] == b[j]:
+                if self.sizes[i] != previous.sizes[j] or self.mtimes[i] != previous.mtimes[j]:
+                    modified.append(a[i])
+                i += 1
+                j += 1
+            elif a[i] < b[j]:
+                added.append(a[i])
+                i += 1
+            else:
+                removed.append(b[j])
+                j += 1
+        added.extend(a[i:])
+        removed.extend(b[j:])
+        return added, modified, removed
+
+
+def _scan_dir(dirpath, rel_dir, path_filter, files, subdirs):
+    """Lists one directory: appends (rel, size, mtime_ns, inode) to files and (path, rel) to subdirs."""
+    prefix = rel_dir + "/" if rel_dir else ""
+    try:
+        with os.scandir(dirpath) as it:
+            for entry in it:
+                rel = prefix + entry.name
+                try:
+                    # Only real directories are descended into, like os.walk without followlinks.
+                    if entry.is_dir(follow_symlinks=False):
+                        if not (path_filter and path_filter.prunes(rel)):
+                            subdirs.append((entry.path, rel))
+                        continue
+                    if not entry.is_file() or (path_filter and not path_filter.accepts(rel)):
+                        continue
+                    # DirEntry caches its stat; on Windows it comes with the directory listing.
+                    st = entry.stat()
+                    files.append((rel, st.st_size, st.st_mtime_ns, entry.inode()))
+                except OSError:
+                    continue  # Vanished or unreadable between listing and stat.
+    except OSError as e:
+        logging.debug(f"Cannot scan {dirpath}: {e}")
+
+
+def _scan_subtree(dirpath, rel_dir, path_filter, budget):
+    """
+    Depth-first from one directory until about `budget` entries are collected; returns
+    (files, directories left unvisited) so the rest can be handed to other workers.
+    """
+    files, stack = [], [(dirpath, rel_dir)]
+    while stack and len(files) < budget:
+        path, rel = stack.pop()
+        _scan_dir(path, rel, path_filter, files, stack)
+    return files, stack
+
+
+class TreeScanner:
+    """
+    Walks trees with os.scandir on a shared thread pool. Roots and, past TASK_BUDGET
+    entries, subdirectories become separate tasks, so one large tree and many small
+    roots are both spread over the workers (directory listing and stat release the
+    GIL, which is what pays off on network shares and cold caches).
+    """
+
+    # Entries one task collects before splitting its remaining directories off, so a
+    # small tree is a single task and a large one fans out after the first few thousand.
+    TASK_BUDGET = 4096
+
+    def __init__(self, workers=8):
+        self.workers = max(1, workers)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def configure(self, workers):
+        with self._lock:
+            if workers != self.workers and self._pool:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+            self.workers = max(1, workers)
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scan")
+            return self._pool
+
+    def scan(self, root, path_filter=None):
+        return self.scan_many([(root, path_filter)])[0]
+
+    def scan_many(self, roots):
+        """roots: [(root, path_filter or None)] -> [Snapshot] in the same order (missing roots are empty)."""
+        records = [[] for _ in roots]
+        pool = self._executor()
+        pending = {}
+        for n, (root, path_filter) in enumerate(roots):
+            if os.path.isdir(root):
+                pending[pool.submit(_scan_subtree, root, "", path_filter, self.TASK_BUDGET)] = n
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                n = pending.pop(future)
+                files, subdirs = future.result()
+                records[n].extend(files)
+                for path, rel in subdirs:
+                    pending[pool.submit(_scan_subtree, path, rel, roots[n][1], self.TASK_BUDGET)] = n
+        return [Snapshot.from_records(root, recs) for (root, _), recs in zip(roots, records)]
+
+
+SCANNER = TreeScanner()
@@ -0,0 +1,197 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime
+
+# Priority classes: lower value wins when slots are contended.
+PRIORITY_MANUAL = 0
+PRIORITY_SMALL = 1
+PRIORITY_AUTO = 2
+PRIORITY_BULK = 3
+
+DEFAULT_SCHEDULER_CONFIG = {
+    "max_concurrent": 0,          # 0 = unlimited concurrent croc processes
+    "total_upload_kbps": 0,       # 0 = no global upload cap
+    "default_listener_kbps": 0,   # 0 = no per-listener cap
+    "listener_kbps": {},          # listener name -> cap in KB/s
+    "small_file_mb": 8,
+    "policies": []                # time-of-day overrides, see current_policy()
+}
+
+
+def _parse_hhmm(value):
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class TransferSlot:
+    """A granted permission to run one croc process. Release it when the process exits."""
+
+    def __init__(self, scheduler, kind, listener, upload_kbps):
+        self.scheduler = scheduler
+        self.kind = kind
+        self.listener = listener
+        self.upload_kbps = upload_kbps
+        self.started_at = time.monotonic()
+        self.released = False
+
+    def croc_args(self):
+        """Global croc flags that apply this slot's share of the bandwidth budget."""
+        if self.kind == "send" and self.upload_kbps:
+            from tools import TOOLS
+            if TOOLS.supports("croc", "throttle_upload"):
+                return ["--throttleUpload", f"{int(self.upload_kbps)}k"]
+        return []
+
+    def report(self, nbytes):
+        """Records bytes moved by this slot so per-listener caps can be enforced."""
+        self.scheduler._account(self, nbytes)
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.scheduler._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class TransferScheduler:
+    """
+    Global admission control for every croc process started by the app.
+    Limits concurrent processes, splits the upload cap between active senders,
+    paces listeners that exceed their own cap, and serves waiters by priority.
+    """
+
+    def __init__(self, config=None):
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+        self._active = []
+        self._listener_ready_at = {}
+        self.config = dict(DEFAULT_SCHEDULER_CONFIG)
+        self.configure(config)
+
+    def configure(self, config):
+        with self._cond:
+            self.config = dict(DEFAULT_SCHEDULER_CONFIG)
+            if config:
+                self.config.update(config)
+            self._cond.notify_all()
+
+    def current_policy(self, now=None):
+        """
+        Returns the effective limits. Each policy entry looks like
+        {"start": "09:00", "end": "18:00", "days": [0, 1, 2, 3, 4], "total_upload_kbps": 2048}
+        and overrides the base values while active. Windows may wrap past midnight.
+        """
+        now = now or datetime.now()
+        policy = {k: v for k, v in self.config.items() if k != "policies"}
+        minute = now.hour * 60 + now.minute
+        for entry in self.config.get("policies", []):
+            try:
+                start, end = _parse_hhmm(entry["start"]), _parse_hhmm(entry["end"])
+            except (KeyError, ValueError):
+                logging.error(f"Invalid scheduler policy: {entry}")
+                continue
+            days = entry.get("days")
+            if days is not None and now.weekday() not in days:
+                continue
+            active = start <= minute < end if start <= end else (minute >= start or minute < end)
+            if active:
+                policy.update({k: v for k, v in entry.items() if k not in ("start", "end", "days")})
+        return policy
+
+    def priority_for_size(self, nbytes, base=PRIORITY_AUTO):
+        """Small files jump ahead of bulk automatic transfers."""
+        small_limit = self.config.get("small_file_mb", 8) * 1024 * 1024
+        if nbytes is not None and nbytes <= small_limit:
+            return min(base, PRIORITY_SMALL)
+        return base
+
+    def acquire(self, kind, priority=PRIORITY_AUTO, listener=None, should_continue=None):
+        """
+        Blocks until a slot is available. `kind` is "send" or "recv".
+        Returns None if `should_continue` turns False while waiting.
+        """
+        ticket = (priority, next(self._seq), listener, kind)
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    if should_continue is not None and not should_continue():
+                        return None
+                    if self._has_capacity() and self._next_eligible() == ticket:
+                        self._waiting.remove(ticket)
+                        heapq.heapify(self._waiting)
+                        slot = TransferSlot(self, kind, listener, self._upload_share(kind))
+                        self._active.append(slot)
+                        self._cond.notify_all()
+                        return slot
+                    self._cond.wait(timeout=0.5)
+            finally:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+
+    def _has_capacity(self):
+        max_concurrent = self.current_policy().get("max_concurrent", 0)
+        return not max_concurrent or len(self._active) < max_concurrent
+
+    def _next_eligible(self):
+        # Highest-priority waiter that can start now; paced listeners and senders waiting
+        # for upload budget don't block the queue.
+        now = time.monotonic()
+        for ticket in sorted(self._waiting):
+            listener, kind = ticket[2], ticket[3]
+            if listener is not None and now < self._listener_ready_at.get(listener, 0):
+                continue
+            if kind == "send" and self._upload_share(kind) < 0:
+                continue
+            return ticket
+        return None
+
+    def _upload_share(self, kind):
+        """
+        Upload cap for a new slot: an equal share, but never more than what running senders
+        leave over, since a running croc process can't be re-throttled. 0 means uncapped;
+        -1 means the budget is used up and the sender has to wait for one to finish.
+        """
+        total = self.current_policy().get("total_upload_kbps", 0)
+        if kind != "send" or not total:
+            return 0
+        running = [s for s in self._active if s.kind == "send"]
+        left = total - sum(s.upload_kbps for s in running)
+        if left < 1:
+            return -1
+        return min(left, max(1, total // (len(running) + 1)))
+
+    def _listener_cap(self, listener):
+        policy = self.current_policy()
+        return policy.get("listener_kbps", {}).get(listener, policy.get("default_listener_kbps", 0))
+
+    def _account(self, slot, nbytes):
+        if slot.listener is None or not nbytes:
+            return
+        cap = self._listener_cap(slot.listener)
+        if not cap:
+            return
+        # Hold the listener back until its average rate falls under the cap.
+        min_duration = nbytes / (cap * 1024.0)
+        with self._cond:
+            self._listener_ready_at[slot.listener] = slot.started_at + min_duration
+
+    def _release(self, slot):
+        with self._cond:
+            if slot in self._active:
+                self._active.remove(slot)
+            self._cond.notify_all()
+
+
+SCHEDULER = TransferScheduler()
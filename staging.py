@@ -0,0 +1,476 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+
+from archive import is_archive, is_store_profile
+
+STAGING_ROOT = 'croc_staging'
+INDEX_FILE = 'index.json'
+# Scratch dirs older than this are left over from a crash and get purged on start.
+STALE_TMP_SECONDS = 24 * 3600
+
+
+def source_signature(source):
+    """Size/mtime fingerprint of a file or a whole folder tree."""
+    source = os.path.abspath(source)
+    if not os.path.isdir(source):
+        st = os.stat(source)
+        return [st.st_size, st.st_mtime_ns]
+    tree = []
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for f in sorted(files):
+            st = os.stat(os.path.join(root, f))
+            tree.append([os.path.relpath(os.path.join(root, f), source), st.st_size, st.st_mtime_ns])
+    return tree
+
+
+class StagingCache:
+    """
+    Content-keyed cache of compressed archives, shared by manual sends, queued jobs
+    and the watcher. An archive is keyed by source path, size/mtime, backend, profile
+    and the path stored inside it, so a cancelled send, a retry or a resend in a later
+    session reuses it instead of compressing again.
+
+    Archives are handed out as hardlinks into scratch dirs created under the same
+    root (see mkdtemp), so staging a hit costs nothing and deleting a staged copy
+    never touches the cache. Least recently used entries are evicted under a quota.
+    """
+
+    def __init__(self, root=STAGING_ROOT, quota_mb=4096):
+        self.root = os.path.abspath(root)
+        self.cache_dir = os.path.join(self.root, "cache")
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        self.index_path = os.path.join(self.root, INDEX_FILE)
+        self.quota_bytes = quota_mb * 1024 * 1024
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def configure(self, quota_mb):
+        self.quota_bytes = max(0, quota_mb) * 1024 * 1024
+        with self._lock:
+            self._ensure_loaded()
+            self._evict()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        os.makedirs(self.cache_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        try:
+            with open(self.index_path, 'r') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        self.entries = {k: e for k, e in self.entries.items() if os.path.exists(self._path(k))}
+        for name in os.listdir(self.tmp_dir):
+            path = os.path.join(self.tmp_dir, name)
+            try:
+                if time.time() - os.path.getmtime(path) > STALE_TMP_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+    def _save(self):
+        try:
+            tmp = self.index_path + ".tmp"
+            with open(tmp, 'w') as f:
+                json.dump(self.entries, f, separators=(",", ":"))
+            os.replace(tmp, self.index_path)
+        except OSError as e:
+            logging.error(f"Error saving staging cache index: {e}")
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def prepare(self):
+        with self._lock:
+            self._ensure_loaded()
+
+    def mkdtemp(self, prefix):
+        """Scratch dir on the cache's filesystem, so cached archives can be hardlinked into it."""
+        self.prepare()
+        return tempfile.mkdtemp(prefix=prefix, dir=self.tmp_dir)
+
+    def key_for(self, source, backend, base_dir=None, path_filter=None):
+        arcname = os.path.relpath(source, base_dir) if base_dir else os.path.basename(os.path.normpath(source))
+        material = [os.path.abspath(source), source_signature(source), backend.name,
+                    backend.extension, backend.profile, arcname]
+        if path_filter and os.path.isdir(source):
+            material.append(path_filter.signature())
+        material = json.dumps(material, sort_keys=True)
+        return hashlib.blake2b(material.encode("utf-8"), digest_size=16).hexdigest()
+
+    def compress(self, backend, source, out_path, startupinfo=None, base_dir=None, path_filter=None):
+        """
+        Drop-in for backend.compress(). Returns (ok, hit): on a hit the cached archive
+        is linked to out_path, otherwise it is built once and kept for next time.
+        """
+        try:
+            key = self.key_for(source, backend, base_dir, path_filter)
+        except OSError:
+            return backend.compress(source, out_path, startupinfo, base_dir=base_dir, path_filter=path_filter), False
+        with self._lock:
+            self._ensure_loaded()
+            entry = self.entries.get(key)
+            if entry and _link_or_copy(self._path(key), out_path):
+                entry["last_used"] = time.time()
+                self._save()
+                return True, True
+
+        if not backend.compress(source, out_path, startupinfo, base_dir=base_dir, path_filter=path_filter):
+            return False, False
+        # The source may have changed while it was being compressed.
+        try:
+            if self.key_for(source, backend, base_dir, path_filter) != key:
+                return True, False
+            size = os.path.getsize(out_path)
+        except OSError:
+            return True, False
+        if size > self.quota_bytes:
+            return True, False
+        with self._lock:
+            # Only cache what can be linked in; a copy across filesystems would double the disk use.
+            if key not in self.entries and _link(out_path, self._path(key)):
+                self.entries[key] = {"source": os.path.abspath(source), "size": size, "last_used": time.time()}
+                self._evict()
+                self._save()
+        return True, False
+
+    def forget(self, source):
+        """Drops every archive built from `source` (e.g. once the original was deleted)."""
+        source = os.path.abspath(source)
+        with self._lock:
+            self._ensure_loaded()
+            for key in [k for k, e in self.entries.items() if e["source"] == source]:
+                self._drop(key)
+            self._save()
+
+    def _drop(self, key):
+        self.entries.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        total = sum(e["size"] for e in self.entries.values())
+        for key in sorted(self.entries, key=lambda k: self.entries[k]["last_used"]):
+            if total <= self.quota_bytes:
+                break
+            total -= self.entries[key]["size"]
+            self._drop(key)
+
+
+def _link(src, dst):
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        return False
+
+
+def _link_or_copy(src, dst):
+    try:
+        if os.path.exists(dst):
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+        return True
+    except OSError as e:
+        logging.error(f"Staging cache could not place {src} at {dst}: {e}")
+        return False
+
+
+class StagingSpaceError(OSError):
+    pass
+
+
+class StagingManager:
+    """
+    Decides where archives are staged and whether they fit before any compression
+    starts. The archive size is estimated from a per-backend compression ratio:
+    measured on a small sample the first time, then tracked from real archives.
+    Candidate roots are tried in order, preferring one on the source's filesystem;
+    the cache root comes first so cache hits can be hardlinked.
+    """
+
+    SAMPLE_BYTES = 4 * 1024 * 1024
+    SAFETY = 1.05
+
+    def __init__(self, cache, extra_roots=(), min_free_mb=512, quota_mb=0):
+        self.cache = cache
+        self.extra_roots = list(extra_roots)
+        self.min_free_bytes = min_free_mb * 1024 * 1024
+        self.quota_bytes = quota_mb * 1024 * 1024
+        self.ratios = {}
+        self.in_flight = {}
+        self._lock = threading.Lock()
+
+    def configure(self, extra_roots=(), min_free_mb=512, quota_mb=0):
+        self.extra_roots = [os.path.abspath(r) for r in extra_roots]
+        self.min_free_bytes = max(0, min_free_mb) * 1024 * 1024
+        self.quota_bytes = max(0, quota_mb) * 1024 * 1024
+
+    # --- estimates ---
+    def _ratio_key(self, backend):
+        return backend.name, json.dumps(backend.profile, sort_keys=True)
+
+    def observe_archive(self, backend, source, archive_path):
+        try:
+            self.observe(backend, tree_size(source), os.path.getsize(archive_path))
+        except OSError:
+            pass
+
+    def observe(self, backend, raw_bytes, packed_bytes):
+        """Feeds the size of a real archive back into the ratio estimate."""
+        if raw_bytes <= 0:
+            return
+        key = self._ratio_key(backend)
+        ratio = packed_bytes / raw_bytes
+        with self._lock:
+            previous = self.ratios.get(key)
+            self.ratios[key] = ratio if previous is None else 0.8 * previous + 0.2 * ratio
+
+    def estimate(self, source, backend):
+        """Expected archive size of `source` in bytes, with some head room."""
+        raw = tree_size(source)
+        if is_store_profile(backend.profile):
+            return int(raw * self.SAFETY)
+        key = self._ratio_key(backend)
+        if key not in self.ratios:
+            self._sample_ratio(source, backend, raw)
+        return int(raw * self.ratios.get(key, 1.0) * self.SAFETY) + 64 * 1024
+
+    def _sample_ratio(self, source, backend, raw):
+        if raw < self.SAMPLE_BYTES:
+            return  # Small enough that assuming no compression is harmless.
+        work_dir = tempfile.mkdtemp(prefix="croc_sample_")
+        try:
+            sample = os.path.join(work_dir, "sample")
+            taken = 0
+            with open(sample, "wb") as out:
+                for path in _iter_files(source):
+                    with open(path, "rb") as f:
+                        chunk = f.read(min(1024 * 1024, self.SAMPLE_BYTES - taken))
+                    out.write(chunk)
+                    taken += len(chunk)
+                    if taken >= self.SAMPLE_BYTES:
+                        break
+            packed = os.path.join(work_dir, "sample" + backend.extension)
+            if taken and backend.compress(sample, packed):
+                self.observe(backend, taken, os.path.getsize(packed))
+        except OSError as e:
+            logging.warning(f"Could not sample compression ratio for {source}: {e}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    # --- locations ---
+    def candidates(self, source=None):
+        roots = [self.cache.tmp_dir] + self.extra_roots + [tempfile.gettempdir()]
+        if source:
+            try:
+                dev = os.stat(source).st_dev
+                roots.sort(key=lambda r: _device(r) != dev)
+            except OSError:
+                pass
+        return roots
+
+    def free_bytes(self, path):
+        try:
+            return shutil.disk_usage(path).free - self.min_free_bytes
+        except OSError:
+            return -1
+
+    def has_room(self, path, nbytes):
+        if self.quota_bytes and self.staged_bytes() + nbytes > self.quota_bytes:
+            return False
+        return self.free_bytes(path) >= nbytes
+
+    def mkdtemp(self, prefix, nbytes=0, source=None, linkable=False):
+        """
+        Scratch dir on the first candidate with room for nbytes; raises StagingSpaceError otherwise.
+        With linkable=True the data will be linked rather than written, which costs nothing
+        on the source's own filesystem.
+        """
+        self.cache.prepare()
+        source_dev = _device(source) if source else None
+        for root in self.candidates(source):
+            os.makedirs(root, exist_ok=True)
+            needed = 0 if linkable and _device(root) == source_dev else nbytes
+            if self.free_bytes(root) >= needed:
+                return tempfile.mkdtemp(prefix=prefix, dir=root)
+        raise StagingSpaceError(f"Not enough free disk space to stage {nbytes / (1024 * 1024):.0f} MB")
+
+    def check(self, path, nbytes):
+        if self.free_bytes(path) < nbytes:
+            raise StagingSpaceError(f"Not enough free disk space in {path} to stage "
+                                    f"{nbytes / (1024 * 1024):.0f} MB")
+
+    # --- in-flight accounting (quota) ---
+    def claim(self, key, nbytes):
+        with self._lock:
+            self.in_flight[key] = nbytes
+
+    def release(self, key):
+        with self._lock:
+            self.in_flight.pop(key, None)
+
+    def staged_bytes(self):
+        with self._lock:
+            return sum(self.in_flight.values())
+
+
+def _iter_files(source):
+    if not os.path.isdir(source):
+        yield source
+        return
+    for root, dirs, files in os.walk(source):
+        for f in files:
+            yield os.path.join(root, f)
+
+
+def tree_stats(source):
+    """(file_count, total_bytes) of a file or folder."""
+    files = total = 0
+    for path in _iter_files(source):
+        try:
+            total += os.path.getsize(path)
+            files += 1
+        except OSError:
+            pass
+    return files, total
+
+
+def tree_size(source):
+    total = 0
+    for path in _iter_files(source):
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return total
+
+
+def _device(path):
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return None
+
+
+# ==========================================
+# ZERO-COPY STAGING (store mode)
+# ==========================================
+# Linux FICLONE ioctl: share the source's extents (btrfs, XFS, ...) instead of copying.
+FICLONE = 0x40049409
+ZERO_COPY_RECORD = ".zerocopy.json"
+
+
+def clone_file(src, dst):
+    """Reflink, else hardlink, else copy. Returns the method that worked."""
+    if sys.platform.startswith("linux"):
+        try:
+            import fcntl
+            with open(src, "rb") as fin, open(dst, "wb") as fout:
+                fcntl.ioctl(fout.fileno(), FICLONE, fin.fileno())
+            shutil.copystat(src, dst)
+            return "reflink"
+        except OSError:
+            try:
+                os.remove(dst)
+            except OSError:
+                pass
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        shutil.copy2(src, dst)
+        return "copy"
+
+
+def can_zero_copy(source):
+    """Raw files are only safe to send if nothing in them would be mistaken for an archive on arrival."""
+    return not any(is_archive(os.path.basename(p)) for p in _iter_files(source))
+
+
+def stage_zero_copy(source, dest, record_dir, path_filter=None):
+    """
+    Mirrors a file or folder at dest without copying data where the filesystem allows
+    it, and appends what was staged to record_dir's record so it can be checked before
+    sending. Inside a folder only what `path_filter` accepts is staged. Returns {method: file_count}.
+    """
+    record = _load_record(record_dir)
+    methods = {}
+    source = os.path.normpath(source)
+    is_dir = os.path.isdir(source)
+    for src in (path_filter.files(source) if path_filter and is_dir else _iter_files(source)):
+        dst = os.path.join(dest, os.path.relpath(src, source)) if is_dir else dest
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        method = clone_file(src, dst)
+        methods[method] = methods.get(method, 0) + 1
+        st = os.stat(src)
+        record[dst] = [src, st.st_size, st.st_mtime_ns, method]
+    if is_dir:
+        for root, dirs, files in (path_filter.walk(source) if path_filter else os.walk(source)):
+            for d in dirs:
+                os.makedirs(os.path.join(dest, os.path.relpath(os.path.join(root, d), source)), exist_ok=True)
+    _save_record(record_dir, record)
+    return methods
+
+
+def verify_zero_copy(record_dir, restage=True, hardlinks_only=False):
+    """
+    Returns the staged paths whose source changed since they were staged. A hardlink
+    *is* the source, so a change there means the staged data changed too. With
+    restage=True the changed ones are staged again from the current source.
+    """
+    record = _load_record(record_dir)
+    changed = []
+    for dst, (src, size, mtime_ns, method) in record.items():
+        if hardlinks_only and method != "hardlink":
+            continue
+        try:
+            st = os.stat(src)
+            if (st.st_size, st.st_mtime_ns) == (size, mtime_ns):
+                continue
+        except OSError:
+            continue  # A vanished source leaves the staged copy as the last good version.
+        changed.append(dst)
+        if restage:
+            try:
+                os.remove(dst)
+            except OSError:
+                pass
+            method = clone_file(src, dst)
+            record[dst] = [src, st.st_size, st.st_mtime_ns, method]
+    if changed and restage:
+        _save_record(record_dir, record)
+    return changed
+
+
+def _load_record(record_dir):
+    try:
+        with open(os.path.join(record_dir, ZERO_COPY_RECORD), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_record(record_dir, record):
+    with open(os.path.join(record_dir, ZERO_COPY_RECORD), 'w') as f:
+        json.dump(record, f)
+
+
+STAGING_CACHE = StagingCache()
+STAGING = StagingManager(STAGING_CACHE)
@@ -0,0 +1,24 @@
+import os
+import sys
+
+# The application modules live flat in the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import fakes
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cwd(tmp_path, monkeypatch):
+    """The app keeps its config, caches, staging and history relative to the working directory."""
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def fake_tools(tmp_path, monkeypatch):
+    """Points the app at the fake croc and 7z (see fakes.py) with a private relay."""
+    env = fakes.install(str(tmp_path / "bin"), str(tmp_path / "relay"))
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    return env
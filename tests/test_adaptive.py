@@ -0,0 +1,54 @@
+import pytest
+
+from adaptive import AdaptiveCompression, LEVELS, parse_croc_rate
+from metrics import Metrics
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    registry = Metrics()
+    monkeypatch.setattr("adaptive.METRICS", registry)
+    return registry
+
+
+def _measure(controller, level, compress_mbps, ratio):
+    controller.record_compression(level, 100 * MB, int(100 * MB * ratio), 100 / compress_mbps)
+
+
+def test_slow_link_moves_to_the_best_compressing_level(metrics):
+    controller = AdaptiveCompression(start_level=3, probe_every=1000)
+    _measure(controller, 0, 500, 1.0)
+    _measure(controller, 3, 60, 0.5)
+    _measure(controller, 7, 8, 0.3)
+    controller.record_link(2 * MB)
+    # At 2 MB/s level 3 moves 4 MB/s of raw data and level 7 6.7; store stays at 2.
+    assert controller.next_level() == 7
+    assert metrics.gauges["adaptive.level"] == 7
+    assert metrics.counters["adaptive.level_changes"] == 1
+    assert metrics.events[-1]["old"] == 3 and metrics.events[-1]["new"] == 7
+
+
+def test_fast_link_falls_back_to_store(metrics):
+    controller = AdaptiveCompression(start_level=3, probe_every=1000)
+    _measure(controller, 0, 500, 1.0)
+    _measure(controller, 3, 60, 0.5)
+    controller.record_link(400 * MB)
+    assert controller.next_level() == 0
+    assert metrics.gauges["adaptive.link_bps"] == 400 * MB
+
+
+def test_probes_neighbouring_levels(metrics):
+    controller = AdaptiveCompression(start_level=3, probe_every=2)
+    _measure(controller, 3, 60, 0.5)
+    controller.record_link(10 * MB)
+    picked = [controller.next_level() for _ in range(4)]
+    assert picked[0] == 3 and picked[1] == LEVELS[LEVELS.index(3) + 1]
+    assert picked[3] == LEVELS[LEVELS.index(3) - 1]
+    assert [e["reason"] for e in metrics.events] == ["probe", "best-estimate", "probe"]
+
+
+def test_parse_croc_rate():
+    assert parse_croc_rate("12% |███| (12/40 MB, 5.2 MB/s)") == pytest.approx(5.2 * MB)
+    assert parse_croc_rate("sending 'a.txt'") is None
@@ -0,0 +1,28 @@
+import pytest
+
+from archive import benchmark_profiles, COMPRESSION_PROFILES
+
+
+def _sample(tmp_path):
+    sample = tmp_path / "sample"
+    sample.mkdir()
+    (sample / "a.txt").write_text("alpha\n" * 5000)
+    return str(sample)
+
+
+def test_benchmark_ranks_working_profiles(fake_tools, tmp_path):
+    results, best = benchmark_profiles(_sample(tmp_path), fake_tools["SEVENZIP_PATH"], "7z")
+    assert best in COMPRESSION_PROFILES
+    assert all(not r["failed"] and r["ratio"] > 0 for r in results)
+
+
+def test_benchmark_never_recommends_a_failed_profile(fake_tools, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_7Z_FAIL_RATE", "1")
+    results, best = benchmark_profiles(_sample(tmp_path), fake_tools["SEVENZIP_PATH"], "7z")
+    assert best is None
+    assert [r["failed"] for r in results] == [True] * len(COMPRESSION_PROFILES)
+
+
+def test_benchmark_without_7z_raises(tmp_path):
+    with pytest.raises(RuntimeError):
+        benchmark_profiles(_sample(tmp_path), None, "7z")
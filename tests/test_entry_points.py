@@ -0,0 +1,90 @@
+import os
+import re
+import sys
+import json
+import glob
+import subprocess
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _calls(relay, tool):
+    records = []
+    for path in glob.glob(os.path.join(relay, "calls", f"{tool}-*.json")):
+        with open(path) as f:
+            records.append(json.load(f))
+    return [r["argv"] for r in sorted(records, key=lambda r: r["call"])]
+
+
+def _clear_calls(relay):
+    for path in glob.glob(os.path.join(relay, "calls", "*")):
+        os.remove(path)
+
+
+def test_croc_qt_reexports_shared_objects():
+    import croc_qt
+    import gui
+    import main
+    import utils
+    import workers
+    assert croc_qt.main is main.main
+    assert croc_qt.get_7z_path is utils.get_7z_path
+    assert croc_qt.CrocApp is gui.CrocApp
+    for name in ("ZipWorker", "LiveUnzipWorker", "CrocWorker"):
+        assert getattr(croc_qt, name) is getattr(workers, name)
+
+
+def test_croc_qt_import_loads_neither_qt_nor_workers():
+    probe = "import sys, croc_qt; print([m for m in ('PyQt5', 'workers', 'gui') if m in sys.modules])"
+    out = subprocess.run([sys.executable, "-c", probe], cwd=REPO, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_entry_points_build_identical_7z_argv(fake_tools, tmp_path):
+    sample = tmp_path / "sample"
+    sample.mkdir()
+    (sample / "a.txt").write_text("alpha\n" * 1000)
+    relay = fake_tools["FAKE_CROC_RELAY"]
+    argvs = {}
+    for entry in ("main.py", "croc_qt.py"):
+        _clear_calls(relay)
+        subprocess.run([sys.executable, os.path.join(REPO, entry), "--benchmark-profiles", str(sample),
+                        "--format", "7z"], check=True, capture_output=True, env=os.environ.copy())
+        # Each run compresses into its own temporary work dir.
+        argvs[entry] = [[re.sub(r"croc_bench_[^/\\]+", "croc_bench_X", a) for a in argv]
+                        for argv in _calls(relay, "7z") if argv and argv[0] == "a"]
+    assert argvs["main.py"]
+    assert argvs["main.py"] == argvs["croc_qt.py"]
+
+
+def test_entry_points_build_identical_croc_argv(fake_tools, tmp_path):
+    pytest.importorskip("PyQt5")
+    import croc_qt
+    import workers
+    payload = tmp_path / "payload.txt"
+    payload.write_text("hello\n")
+    relay = fake_tools["FAKE_CROC_RELAY"]
+    argvs = {}
+    for name, module in (("workers", workers), ("croc_qt", croc_qt)):
+        _clear_calls(relay)
+        receiver = subprocess.Popen([sys.executable, "-c", _RECEIVE_LOOP, fake_tools["CROC_PATH"],
+                                     str(tmp_path / f"out-{name}")])
+        sender = module.CrocWorker(["croc", "send", "--code", "parity", str(payload)])
+        sender.run()
+        assert receiver.wait(timeout=60) == 0
+        argvs[name] = [argv for argv in _calls(relay, "croc") if "send" in argv]
+    assert argvs["workers"]
+    assert argvs["workers"] == argvs["croc_qt"]
+
+
+# Retries the receive until the sender's offer shows up ("room not ready" before that).
+_RECEIVE_LOOP = """
+import subprocess, sys, time
+deadline = time.monotonic() + 30
+while time.monotonic() < deadline:
+    if subprocess.run([sys.argv[1], "--yes", "--out", sys.argv[2], "parity"]).returncode == 0:
+        sys.exit(0)
+sys.exit(1)
+"""
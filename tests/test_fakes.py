@@ -0,0 +1,82 @@
+import os
+import subprocess
+import threading
+import time
+
+import pytest
+
+from archive import SevenZipBackend
+
+
+def _write_tree(root):
+    files = {"a.txt": b"alpha\n", "sub/b.bin": os.urandom(300 * 1024), "sub/deeper/c.txt": b"gamma\n"}
+    for rel, data in files.items():
+        path = os.path.join(root, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    return files
+
+
+def _read_tree(root):
+    found = {}
+    for dirpath, dirs, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as f:
+                found[os.path.relpath(path, root).replace(os.sep, "/")] = f.read()
+    return found
+
+
+def test_send_receive_roundtrip(fake_tools, tmp_path):
+    src = tmp_path / "src" / "data"
+    files = _write_tree(str(src))
+    backend = SevenZipBackend(fake_tools["SEVENZIP_PATH"])
+    archive = tmp_path / "data.7z"
+    assert backend.compress(str(src), str(archive))
+
+    croc = fake_tools["CROC_PATH"]
+    sender = subprocess.Popen([croc, "send", "--code", "smoke", str(archive)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    out = tmp_path / "out"
+    deadline = time.monotonic() + 30
+    while True:
+        # A receive before the sender has published its offer reports "room not ready".
+        if subprocess.run([croc, "--yes", "--out", str(out), "smoke"], stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL).returncode == 0:
+            break
+        assert time.monotonic() < deadline, "receiver never got the offer"
+    assert sender.wait(timeout=30) == 0
+
+    assert backend.extract(str(out / "data.7z"), str(tmp_path / "extracted"))
+    assert _read_tree(str(tmp_path / "extracted" / "data")) == files
+    calls = os.listdir(os.path.join(fake_tools["FAKE_CROC_RELAY"], "calls"))
+    assert any(name.startswith("croc-0-") for name in calls)
+    assert any(name.startswith("7z-") for name in calls)
+
+
+def test_watcher_to_listener(fake_tools, tmp_path):
+    """AutoSendWorker -> ListenerPoolWorker over the fakes: verified, published, originals deleted."""
+    pytest.importorskip("PyQt5")
+    from workers import AutoSendWorker, ListenerPoolWorker
+
+    watched = tmp_path / "watched"
+    files = _write_tree(str(watched))
+    download = tmp_path / "received"
+    sender = AutoSendWorker([str(watched)], "smoke-watch", None, delete_after_send=True, require_ack=True,
+                            archive_format="7z", ack_timeout=30)
+    listener = ListenerPoolWorker([("site", "smoke-watch")], str(download), None, poll_interval=1)
+    threads = [threading.Thread(target=w.run, daemon=True) for w in (listener, sender)]
+    for t in threads:
+        t.start()
+    try:
+        deadline = time.monotonic() + 60
+        while _read_tree(str(watched)) and time.monotonic() < deadline:
+            time.sleep(0.5)
+    finally:
+        sender.is_running = False
+        listener.stop()
+        for t in threads:
+            t.join(timeout=30)
+    assert _read_tree(str(watched)) == {}
+    assert _read_tree(str(download / "site")) == files
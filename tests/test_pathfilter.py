@@ -0,0 +1,29 @@
+from pathfilter import PathFilter, compile_globs
+
+
+def test_leading_slash_anchors_at_root():
+    matcher = compile_globs(["/build"])
+    assert matcher.match("build")
+    assert not matcher.match("a/build")
+
+
+def test_pattern_without_slash_matches_at_any_depth():
+    matcher = compile_globs(["build"])
+    assert matcher.match("build")
+    assert matcher.match("a/build")
+
+
+def test_anchored_directory_exclude_prunes_only_top_level():
+    path_filter = PathFilter(exclude=["/build/"], default_excludes=False)
+    assert path_filter.prunes("build")
+    assert not path_filter.prunes("a/build")
+    # A trailing '/' limits the pattern to folders.
+    assert path_filter.accepts("build")
+
+
+def test_under_keeps_globs_relative_to_the_original_root():
+    path_filter = PathFilter(exclude=["/build/", "src/tmp/"], default_excludes=False)
+    src = path_filter.under("src")
+    assert not src.prunes("build")
+    assert src.prunes("tmp")
+    assert path_filter.under("build").signature() != src.signature()
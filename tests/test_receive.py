@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from archive import ZipBackend
+from manifest import manifest_entry, write_manifest
+from receive import ReceiveStaging
+
+
+def _listener(tmp_path, logs):
+    pytest.importorskip("PyQt5")
+    from workers import ReceiveListener
+    return ReceiveListener("code", str(tmp_path / "received"), "site", None, None, logs.append,
+                           lambda: None, lambda: True, fsync=False)
+
+
+def _deliver(listener, tmp_path, name, data):
+    """Builds what a watcher sends for one file (archive + manifest) in the listener's session folder."""
+    src = tmp_path / "src"
+    src.mkdir(exist_ok=True)
+    (src / name).write_bytes(data)
+    session = listener.staging.prepare()
+    archive_name = name + ZipBackend.extension
+    assert ZipBackend().compress(str(src / name), os.path.join(session, archive_name), base_dir=str(src))
+    write_manifest(session, [manifest_entry(str(src / name), name)], ack=False, payload=[archive_name])
+    return archive_name
+
+
+def test_leftovers_of_a_broken_session_are_not_published(tmp_path):
+    logs = []
+    listener = _listener(tmp_path, logs)
+    session = listener.staging.prepare()
+    with open(os.path.join(session, "old.txt" + ZipBackend.extension), "wb") as f:
+        f.write(b"PK\x03\x04 partial")
+    leftover = listener.staging.stamps()
+
+    _deliver(listener, tmp_path, "new.txt", b"fresh\n")
+    listener.extract_files(None, "[test]", leftover=leftover)
+
+    assert os.listdir(listener.target_dir) == ["new.txt"]
+    assert not os.path.exists(listener.staging.session_dir)
+    assert any("leftover" in line for line in logs)
+
+
+def test_a_leftover_named_by_the_manifest_belongs_to_the_session(tmp_path):
+    listener = _listener(tmp_path, [])
+    archive_name = _deliver(listener, tmp_path, "kept.txt", b"already here\n")
+    # croc found the archive already complete and only delivered the manifest.
+    leftover = {path: stamp for path, stamp in listener.staging.stamps().items() if path.endswith(archive_name)}
+    listener.extract_files(None, "[test]", leftover=leftover)
+    assert os.listdir(listener.target_dir) == ["kept.txt"]
+
+
+def test_an_archive_that_fails_to_extract_stays_in_staging(tmp_path):
+    logs = []
+    listener = _listener(tmp_path, logs)
+    archive_name = _deliver(listener, tmp_path, "broken.txt", b"data\n")
+    with open(os.path.join(listener.staging.session_dir, archive_name), "wb") as f:
+        f.write(b"not a zip")
+    listener.extract_files(None, "[test]", leftover={})
+
+    assert os.listdir(listener.target_dir) == []
+    assert os.listdir(listener.staging.rejected_dir) == [archive_name]
+    assert any("Integrity check failed: broken.txt" in line for line in logs)
+
+
+def test_stamps_track_what_a_session_changed(tmp_path):
+    staging = ReceiveStaging(str(tmp_path), "x")
+    session = staging.prepare()
+    with open(os.path.join(session, "partial"), "wb") as f:
+        f.write(b"12")
+    before = staging.stamps()
+    assert staging.delivered_files(before) == []
+    with open(os.path.join(session, "partial"), "ab") as f:
+        f.write(b"34")
+    assert staging.delivered_files(before) == [os.path.join(session, "partial")]
@@ -0,0 +1,54 @@
+import threading
+import time
+
+from scheduler import TransferScheduler, PRIORITY_MANUAL, PRIORITY_BULK
+
+
+def _until(seconds):
+    deadline = time.monotonic() + seconds
+    return lambda: time.monotonic() < deadline
+
+
+def test_concurrent_senders_stay_within_upload_cap():
+    scheduler = TransferScheduler({"total_upload_kbps": 1000})
+    first = scheduler.acquire("send")
+    assert first.upload_kbps == 1000
+    # The first sender holds the whole budget, so the next one has to wait for it.
+    assert scheduler.acquire("send", should_continue=_until(0.2)) is None
+
+    first.release()
+    slots = [scheduler.acquire("send", should_continue=_until(0.3)) for _ in range(3)]
+    assert sum(s.upload_kbps for s in slots if s) <= 1000
+
+
+def test_released_budget_goes_to_the_waiting_sender():
+    scheduler = TransferScheduler({"total_upload_kbps": 900})
+    first = scheduler.acquire("send")
+    granted = []
+    waiter = threading.Thread(target=lambda: granted.append(scheduler.acquire("send", should_continue=_until(5))))
+    waiter.start()
+    time.sleep(0.1)
+    assert not granted
+    first.release()
+    waiter.join()
+    assert granted[0] is not None and granted[0].upload_kbps == 900
+
+
+def test_receivers_are_not_held_up_by_exhausted_upload_budget():
+    scheduler = TransferScheduler({"total_upload_kbps": 500})
+    scheduler.acquire("send")
+    blocked = threading.Thread(target=lambda: scheduler.acquire("send", PRIORITY_MANUAL, should_continue=_until(1)))
+    blocked.start()
+    time.sleep(0.05)
+    slot = scheduler.acquire("recv", PRIORITY_BULK, should_continue=_until(0.5))
+    assert slot is not None and slot.upload_kbps == 0
+    blocked.join()
+
+
+def test_max_concurrent_and_uncapped_senders():
+    scheduler = TransferScheduler({"max_concurrent": 2})
+    a, b = scheduler.acquire("send"), scheduler.acquire("recv")
+    assert a.upload_kbps == 0
+    assert scheduler.acquire("send", should_continue=_until(0.2)) is None
+    b.release()
+    assert scheduler.acquire("send", should_continue=_until(0.5)) is not None
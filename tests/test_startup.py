@@ -0,0 +1,39 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+from main import parse_args
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run_gui(tmp_path, *args, timeout=60):
+    pytest.importorskip("PyQt5")
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    return subprocess.run([sys.executable, os.path.join(REPO, "main.py"), *args], cwd=str(tmp_path), env=env,
+                          capture_output=True, text=True, timeout=timeout)
+
+
+def test_startup_benchmark_is_off_by_default():
+    args = parse_args([])
+    assert args.startup_benchmark is False
+    assert parse_args(["--startup-benchmark"]).startup_benchmark is True
+
+
+def test_startup_benchmark_reports_and_exits(tmp_path):
+    result = _run_gui(tmp_path, "--startup-benchmark", "--budget-ms", "60000")
+    assert result.returncode == 0
+    assert "Startup to first event loop tick" in result.stdout
+
+
+def test_startup_benchmark_fails_over_budget(tmp_path):
+    result = _run_gui(tmp_path, "--startup-benchmark", "--budget-ms", "0")
+    assert result.returncode == 1
+
+
+def test_gui_keeps_running_without_the_flag(tmp_path):
+    with pytest.raises(subprocess.TimeoutExpired) as raised:
+        _run_gui(tmp_path, timeout=5)
+    assert "Startup to first event loop tick" not in str(raised.value.stdout or "")
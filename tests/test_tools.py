@@ -0,0 +1,47 @@
+import tools
+from tools import ToolRegistry
+
+
+def test_missing_tool_is_cached_until_path_changes(tmp_path, monkeypatch):
+    lookups = []
+    monkeypatch.setattr(tools, "_locate", lambda name: lookups.append(name))
+    monkeypatch.delenv("CROC_PATH", raising=False)
+    monkeypatch.setenv("PATH", str(tmp_path))
+    registry = ToolRegistry(cache_path=str(tmp_path / "cache.json"))
+
+    for _ in range(5):
+        assert not registry.available("croc")
+        assert not registry.supports("croc", "throttle")
+    assert lookups == ["croc"]
+
+    monkeypatch.setenv("PATH", str(tmp_path / "elsewhere"))
+    assert not registry.available("croc")
+    assert lookups == ["croc", "croc"]
+
+
+def test_missing_tool_is_looked_up_again_after_ttl(tmp_path, monkeypatch):
+    lookups = []
+    monkeypatch.setattr(tools, "_locate", lambda name: lookups.append(name))
+    registry = ToolRegistry(cache_path=str(tmp_path / "cache.json"), missing_ttl=0)
+    registry.available("croc")
+    registry.available("croc")
+    assert lookups == ["croc", "croc"]
+
+
+def test_clearing_the_override_drops_the_cached_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(tools, "PROBES", {"croc": lambda path: ("test", {})})
+    override = tmp_path / "override-croc"
+    on_path = tmp_path / "bin" / "croc"
+    for exe in (override, on_path):
+        exe.parent.mkdir(exist_ok=True)
+        exe.write_text("#!/bin/sh\n")
+        exe.chmod(0o755)
+    monkeypatch.setenv("PATH", str(on_path.parent))
+    monkeypatch.setenv("CROC_PATH", str(override))
+    registry = ToolRegistry(cache_path=str(tmp_path / "cache.json"))
+    assert registry.path("croc") == str(override)
+
+    monkeypatch.delenv("CROC_PATH")
+    assert registry.path("croc") == str(on_path)
+    # A fresh registry reading the same cache file agrees.
+    assert ToolRegistry(cache_path=str(tmp_path / "cache.json")).path("croc") == str(on_path)
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+from archive import backend_for_archive
+from pathfilter import PathFilter
+
+
+def _files(root):
+    return sorted(os.path.relpath(os.path.join(d, f), root).replace(os.sep, "/")
+                  for d, _, files in os.walk(root) for f in files)
+
+
+@pytest.mark.parametrize("archive_format", ["zip", "zstd", "7z"])
+def test_folder_send_filters_from_the_send_root(fake_tools, tmp_path, archive_format):
+    pytest.importorskip("PyQt5")
+    # Imported here: the staging singletons resolve their roots against the test's cwd.
+    from workers import ZipWorker
+    source = tmp_path / "project"
+    for rel in ("build/out.o", "src/build/keep.txt", "src/tmp/junk.txt", "src/main.c", "docs/tmp/note.txt"):
+        path = source / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+    path_filter = PathFilter(exclude=["/build/", "src/tmp/"], default_excludes=False)
+    (tmp_path / "staging").mkdir()
+    results = []
+    worker = ZipWorker(str(source), fake_tools["SEVENZIP_PATH"], archive_format=archive_format,
+                       staging_dir=str(tmp_path / "staging"), path_filter=path_filter)
+    worker.finished_signal.connect(lambda *args: results.append(args))
+    worker.run()
+    success, staged_path, _ = results[0]
+    assert success
+
+    out = tmp_path / "out"
+    for name in os.listdir(staged_path):
+        backend = backend_for_archive(name, fake_tools["SEVENZIP_PATH"])
+        assert backend.extract(os.path.join(staged_path, name), str(out))
+    assert _files(str(out)) == ["docs/tmp/note.txt", "src/build/keep.txt", "src/main.c"]
@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import subprocess
+import threading
+
+TOOLS_CACHE_FILE = 'croc_tools_cache.json'
+
+# Environment overrides, e.g. to point the app at a specific build.
+ENV_OVERRIDES = {"croc": "CROC_PATH", "7z": "SEVENZIP_PATH"}
+WIN_7Z_PATHS = [r"C:\Program Files\7-Zip\7z.exe", r"C:\Program Files (x86)\7-Zip\7z.exe"]
+
+
+class ToolMissingError(RuntimeError):
+    pass
+
+
+def _startup_info():
+    if os.name == 'nt':
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        return startupinfo
+    return None
+
+
+def _run_capture(args):
+    try:
+        res = subprocess.run(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                             text=True, encoding='utf-8', errors='replace', timeout=15,
+                             startupinfo=_startup_info())
+        return res.stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+
+def _locate(name):
+    override = os.environ.get(ENV_OVERRIDES.get(name, ""))
+    if override:
+        return shutil.which(override) or (override if os.path.exists(override) else None)
+    if name == "7z":
+        if sys.platform == 'win32':
+            for p in WIN_7Z_PATHS:
+                if os.path.exists(p):
+                    return p
+        return shutil.which("7z") or shutil.which("7za") or shutil.which("7zz")
+    return shutil.which(name)
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+
+def _probe_croc(path):
+    version = (_run_capture([path, "--version"]) or "").strip()
+    help_text = _run_capture([path, "--help"]) or ""
+    return version or "unknown", {
+        "throttle_upload": "--throttleUpload" in help_text,
+        "yes": "--yes" in help_text,
+        "out": "--out" in help_text,
+    }
+
+
+def _probe_7z(path):
+    banner = _run_capture([path]) or ""
+    info = _run_capture([path, "i"]) or ""
+    version = next((ln.strip() for ln in banner.splitlines() if "7-Zip" in ln), "unknown")
+    return version, {
+        "multithread": "-mmt" in banner or "LZMA2" in info,
+        "zstd": "ZSTD" in info.upper(),
+    }
+
+
+PROBES = {"croc": _probe_croc, "7z": _probe_7z}
+
+
+class ToolRegistry:
+    """
+    Resolves croc and 7z once, caches path, version and capabilities in
+    croc_tools_cache.json, and only re-probes (spawns the binary) when the file
+    on disk changed or the cache is older than `ttl`. Checking a cached entry
+    costs a single stat(). A missing tool is remembered for `missing_ttl` seconds,
+    as long as PATH and the override variable are unchanged.
+    """
+
+    def __init__(self, cache_path=TOOLS_CACHE_FILE, ttl=7 * 24 * 3600, missing_ttl=30):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self._lock = threading.Lock()
+        self._tools = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r') as f:
+                self._tools = json.load(f)
+        except (OSError, ValueError):
+            self._tools = {}
+
+    def _save(self):
+        try:
+            with open(self.cache_path, 'w') as f:
+                json.dump(self._tools, f, indent=4)
+        except OSError as e:
+            logging.error(f"Error saving tool cache: {e}")
+
+    @staticmethod
+    def _search_key(name):
+        """What a lookup of `name` depends on: PATH and the tool's override variable."""
+        return [os.environ.get("PATH", ""), os.environ.get(ENV_OVERRIDES.get(name, ""), "")]
+
+    def _valid(self, name, entry):
+        if not entry:
+            return False
+        if not entry.get("path"):
+            return (time.time() - entry.get("probed_at", 0) < self.missing_ttl
+                    and entry.get("search") == self._search_key(name))
+        if time.time() - entry.get("probed_at", 0) > self.ttl:
+            return False
+        # Setting, changing or clearing the override all re-resolve (None counts as a value).
+        if entry.get("override") != os.environ.get(ENV_OVERRIDES.get(name, "")):
+            return False
+        return _stamp(entry["path"]) == entry.get("stamp")
+
+    def resolve(self, name, force=False):
+        """Returns the tool's info dict; "path" is None (with an "error") when it is unavailable."""
+        with self._lock:
+            entry = self._tools.get(name)
+            if not force and self._valid(name, entry):
+                return entry
+            path = _locate(name)
+            if path is None:
+                entry = {"path": None, "error": f"'{name}' was not found on PATH", "probed_at": time.time(),
+                         "search": self._search_key(name)}
+            else:
+                version, capabilities = PROBES[name](path)
+                entry = {"path": path, "version": version, "capabilities": capabilities,
+                         "stamp": _stamp(path), "probed_at": time.time(),
+                         "override": os.environ.get(ENV_OVERRIDES.get(name, ""))}
+                logging.info(f"Resolved {name}: {path} ({version}) {capabilities}")
+            self._tools[name] = entry
+            self._save()
+            return entry
+
+    def resolve_all(self, force=False):
+        return {name: self.resolve(name, force) for name in PROBES}
+
+    def path(self, name):
+        return self.resolve(name).get("path")
+
+    def available(self, name):
+        return self.path(name) is not None
+
+    def require(self, name):
+        entry = self.resolve(name)
+        if not entry.get("path"):
+            raise ToolMissingError(entry.get("error") or f"'{name}' is not available")
+        return entry["path"]
+
+    def supports(self, name, capability):
+        return bool(self.resolve(name).get("capabilities", {}).get(capability))
+
+
+TOOLS = ToolRegistry()
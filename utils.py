@@ -1,6 +1,4 @@
 import os
-import sys
-import subprocess
 import random
 import string
 import logging
@@ -18,17 +16,20 @@ def setup_logging(log_file='croc_debug.log'):
     logging.info("=== Croc GUI Started ===")
 
 def get_7z_path():
-    """Finds the 7-Zip executable path depending on the OS."""
-    if sys.platform == 'win32':
-        paths = [r"C:\Program Files\7-Zip\7z.exe", r"C:\Program Files (x86)\7-Zip\7z.exe"]
-        for p in paths:
-            if os.path.exists(p):
-                return p
-    try:
-        subprocess.run(["7z"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        return "7z"
-    except FileNotFoundError:
-        return None
+    """Finds the 7-Zip executable path depending on the OS (cached by the tool registry)."""
+    from tools import TOOLS
+    return TOOLS.path("7z")
+
+def get_croc_version():
+    """Returns croc's version string, or None if croc is not installed."""
+    from tools import TOOLS
+    return TOOLS.resolve("croc").get("version")
+
+def probe_dependencies():
+    """Resolves 7z and croc. May spawn both binaries on a cold cache; call off the UI thread."""
+    from tools import TOOLS
+    tools = TOOLS.resolve_all()
+    return {"7z": tools["7z"].get("path"), "croc": tools["croc"].get("version") if tools["croc"].get("path") else None}
 
 def generate_transfer_code(length=6):
     """Generates a random, easy-to-read transfer code."""
@@ -44,8 +45,42 @@ def load_config():
         "sender_folders": [],
         "receiver_listeners": [],
         "delete_after_send": True,
+        "mirror_mode": False,
         "check_interval": 3,
-        "code_length": 6
+        "watch_cold_interval_max": 300,
+        "scan_workers": 8,
+        "default_excludes": True,
+        "send_include": [],
+        "send_exclude": [],
+        "code_length": 6,
+        "archive_format": "7z",
+        "manual_profile": "default",
+        "job_concurrency": 2,
+        "staging_cache_mb": 4096,
+        "staging_dirs": [],
+        "staging_min_free_mb": 512,
+        "staging_quota_mb": 0,
+        "require_ack": True,
+        "ack_timeout": 60,
+        "receive_fsync": True,
+        "listener_max_live": 8,
+        "listener_poll_interval": 3,
+        "listener_idle_backoff": 30,
+        "listener_handshake_timeout": 30,
+        "watcher_prefetch": 4,
+        "watcher_batch_files": 32,
+        "watcher_batch_mb": 64,
+        "profiling": False,
+        "profile_capture": "off",
+        "profile_dir": "croc_profiles",
+        "scheduler": {
+            "max_concurrent": 0,
+            "total_upload_kbps": 0,
+            "default_listener_kbps": 0,
+            "listener_kbps": {},
+            "small_file_mb": 8,
+            "policies": []
+        }
     }
     if os.path.exists(CONFIG_FILE):
         try:
@@ -54,8 +89,21 @@ def load_config():
                 default_config.update(loaded)
         except Exception as e:
             logging.error(f"Error loading config: {e}")
+    # Per-folder compression profiles used to be a separate path -> profile map; they
+    # are part of each folder's entry in "sender_folders" now.
+    legacy_profiles = default_config.pop("folder_profiles", None) or {}
+    if legacy_profiles:
+        default_config["sender_folders"] = [_with_legacy_profile(entry, legacy_profiles)
+                                            for entry in default_config["sender_folders"]]
     return default_config
 
+def _with_legacy_profile(entry, legacy_profiles):
+    path = entry if isinstance(entry, str) else entry["path"]
+    profile = legacy_profiles.get(path)
+    if not profile or (isinstance(entry, dict) and entry.get("profile")):
+        return entry
+    return {"path": path, "profile": profile} if isinstance(entry, str) else {**entry, "profile": profile}
+
 def save_config(config):
     """Saves current state to JSON."""
     try:
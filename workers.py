@@ -1,11 +1,47 @@
 import os
 import subprocess
-import tempfile
 import shutil
 import time
+import heapq
+import queue
+import itertools
+import threading
 import logging
 from PyQt5.QtCore import QThread, pyqtSignal
 
+from utils import probe_dependencies
+from tools import TOOLS, ToolMissingError
+from scheduler import SCHEDULER, PRIORITY_MANUAL, PRIORITY_SMALL, PRIORITY_AUTO
+from archive import get_backend, backend_for_archive, is_archive, strip_archive_suffix, is_store_profile
+from adaptive import AdaptiveCompression, ADAPTIVE_PROFILE, parse_croc_rate
+from receive import ReceiveStaging
+from assembly import SyncBatch
+from history import HISTORY
+from profiling import PROFILER, NULL_TRACE
+from staging import STAGING_CACHE, STAGING, can_zero_copy, stage_zero_copy, clone_file
+from mirror import MirrorTracker, TRACKER_FILE, apply_ops
+from policies import FolderPolicy
+from scanner import SCANNER
+from manifest import (manifest_entry, write_manifest, is_manifest, load_manifest, StreamVerifier,
+                      safe_rel_path, ack_code, write_ack, read_ack)
+
+
+def _trace_croc_session(trace, start, first_progress, end, **args):
+    """Splits a croc session at its first progress line: relay/PAKE handshake, then the wire."""
+    trace.add("croc_handshake", start, first_progress or end, **args)
+    if first_progress is not None:
+        trace.add("croc_wire", first_progress, end, **args)
+
+
+# ==========================================
+# WORKER: DEPENDENCY PROBE (Startup)
+# ==========================================
+class DependencyProbeWorker(QThread):
+    result_signal = pyqtSignal(dict)
+
+    def run(self):
+        self.result_signal.emit(probe_dependencies())
+
 
 # ==========================================
 # WORKER: ZIP (Prepares manual files)
@@ -14,36 +50,86 @@ class ZipWorker(QThread):
     log_signal = pyqtSignal(str)
     finished_signal = pyqtSignal(bool, str, str)
 
-    def __init__(self, source_path, _7z_path):
+    def __init__(self, source_path, _7z_path, archive_format="7z", profile="default", staging_dir=None,
+                 path_filter=None):
         super().__init__()
         self.source_path = source_path
+        # Applies inside a folder send; a single file the user picked is always sent.
+        self.path_filter = path_filter
         self._7z_path = _7z_path
+        self.archive_format = archive_format
+        self.profile = profile
+        self.backend = None
+        # A persistent staging_dir (job queue) lets a paused send resume after a restart.
+        self.staging_dir = staging_dir
+        self.trace = NULL_TRACE
 
     def run(self):
+        # The GUI may start us before its background dependency probe has reported back.
+        self._7z_path = self._7z_path or TOOLS.path("7z")
+        self.backend = get_backend(self.archive_format, self._7z_path, self.profile)
+        self.trace = PROFILER.trace(f"zip-{os.path.basename(os.path.normpath(self.source_path))}")
+        with self.trace.profiled():
+            self._run()
+        self.trace.close()
+
+    def _run(self):
         try:
             self.log_signal.emit("🗜️ Preparing files for transfer (Zipping)...")
-            temp_base_dir = tempfile.mkdtemp(prefix="croc_send_")
+            # Store mode sends the files themselves: reflinked/hardlinked into staging, not re-written.
+            zero_copy = is_store_profile(self.backend.profile) and can_zero_copy(self.source_path)
+            # Fail before minutes of compression rather than when the disk fills up.
+            with self.trace.span("estimate"):
+                estimate = STAGING.estimate(self.source_path, self.backend)
+            if self.staging_dir:
+                if not zero_copy: STAGING.check(self.staging_dir, estimate)
+                temp_base_dir = self.staging_dir
+            else:
+                temp_base_dir = STAGING.mkdtemp("croc_send_", estimate, self.source_path, linkable=zero_copy)
             is_dir = os.path.isdir(self.source_path)
 
             startupinfo = self._get_startup_info()
 
-            if is_dir:
+            if zero_copy:
+                staged_path = os.path.join(temp_base_dir, os.path.basename(os.path.normpath(self.source_path)))
+                with self.trace.span("stage_zero_copy"):
+                    methods = stage_zero_copy(self.source_path, staged_path, temp_base_dir, self.path_filter)
+                self.log_signal.emit("  -> Staged without compression: " +
+                                     ", ".join(f"{n} {m}" for m, n in sorted(methods.items())))
+            elif is_dir:
                 folder_name = os.path.basename(os.path.normpath(self.source_path))
                 staged_path = os.path.join(temp_base_dir, folder_name)
                 os.makedirs(staged_path)
 
                 for item in os.listdir(self.source_path):
                     item_full = os.path.join(self.source_path, item)
-                    out_7z = os.path.join(staged_path, item + ".7z")
-                    self.log_signal.emit(f"  -> Zipping: {item}")
-                    subprocess.run([self._7z_path, "a", "-mx=3", out_7z, item_full],
-                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, startupinfo=startupinfo)
+                    is_item_dir = os.path.isdir(item_full)
+                    if self.path_filter and (self.path_filter.prunes(item) if is_item_dir
+                                             else not self.path_filter.accepts(item)):
+                        self.log_signal.emit(f"  -> Skipping (excluded): {item}")
+                        continue
+                    # One archive per top-level item; its filter still matches paths from the send root.
+                    item_filter = self.path_filter.under(item) if self.path_filter else None
+                    if is_item_dir and item_filter and next(item_filter.files(item_full), None) is None:
+                        self.log_signal.emit(f"  -> Skipping (nothing left after filters): {item}")
+                        continue
+                    out_archive = os.path.join(staged_path, item + self.backend.extension)
+                    with self.trace.span("compress", item=item) as span:
+                        ok, hit = STAGING_CACHE.compress(self.backend, item_full, out_archive, startupinfo,
+                                                         path_filter=item_filter)
+                        span["cache_hit"] = hit
+                    if not ok: raise RuntimeError(f"Compressing '{item}' failed")
+                    if not hit: STAGING.observe_archive(self.backend, item_full, out_archive)
+                    self.log_signal.emit(f"  -> {'Reusing staged archive' if hit else 'Zipping'}: {item}")
             else:
-                out_7z = os.path.join(temp_base_dir, os.path.basename(self.source_path) + ".7z")
-                staged_path = out_7z
-                self.log_signal.emit(f"  -> Zipping file...")
-                subprocess.run([self._7z_path, "a", "-mx=3", out_7z, self.source_path],
-                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, startupinfo=startupinfo)
+                out_archive = os.path.join(temp_base_dir, os.path.basename(self.source_path) + self.backend.extension)
+                staged_path = out_archive
+                with self.trace.span("compress", item=os.path.basename(self.source_path)) as span:
+                    ok, hit = STAGING_CACHE.compress(self.backend, self.source_path, out_archive, startupinfo)
+                    span["cache_hit"] = hit
+                if not ok: raise RuntimeError(f"Compressing '{os.path.basename(self.source_path)}' failed")
+                if not hit: STAGING.observe_archive(self.backend, self.source_path, out_archive)
+                self.log_signal.emit("  -> Reused staged archive." if hit else "  -> Zipping file...")
 
             self.log_signal.emit("✅ Zipping complete.")
             self.finished_signal.emit(True, staged_path, temp_base_dir)
@@ -68,39 +154,92 @@ class LiveUnzipWorker(QThread):
     log_signal = pyqtSignal(str)
     file_extracted_signal = pyqtSignal()
 
-    def __init__(self, download_dir, _7z_path):
+    def __init__(self, download_dir, _7z_path, staging=None, fsync=True):
         super().__init__()
         self.download_dir = download_dir
+        self.syncer = SyncBatch(enabled=fsync)
         self._7z_path = _7z_path
+        self.staging = staging or ReceiveStaging(download_dir, "manual")
         self.is_running = True
+        self.publish_remaining = False
+        # path -> size at the last poll; archives are only tested once their size settles.
+        self.seen_sizes = {}
+        # Totals for the transfer history.
+        self.received_files = 0
+        self.received_bytes = 0
+        # Entries the last publish could not move into download_dir (kept in staging).
+        self.unpublished = []
+        self.trace = NULL_TRACE
 
     def run(self):
+        self._7z_path = self._7z_path or TOOLS.path("7z")
         startupinfo = self._get_startup_info()
-        while self.is_running:
-            self.process_files(startupinfo)
-            time.sleep(1.5)
-        self.process_files(startupinfo)
-
-    def process_files(self, startupinfo):
-        for root, dirs, files in os.walk(self.download_dir):
-            for f in files:
-                if f.endswith(".7z"):
-                    filepath = os.path.join(root, f)
-                    if self._is_file_ready(filepath):
-                        test_res = subprocess.run([self._7z_path, "t", filepath],
-                                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
-                                                  startupinfo=startupinfo)
-                        if test_res.returncode == 0:
-                            ext_res = subprocess.run([self._7z_path, "x", "-y", filepath, f"-o{root}"],
-                                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
-                                                     startupinfo=startupinfo)
-                            if ext_res.returncode == 0:
-                                try:
-                                    os.remove(filepath)
-                                    self.log_signal.emit(f"📦 Extracted & Ready: {f[:-3]}")
-                                    self.file_extracted_signal.emit()
-                                except OSError:
-                                    pass
+        self.trace = PROFILER.trace(f"unzip-{os.path.basename(os.path.normpath(self.staging.root))}")
+        with self.trace.profiled():
+            while self.is_running:
+                self.process_files(startupinfo)
+                time.sleep(1.5)
+            self.process_files(startupinfo, final=True)
+        self.trace.close()
+
+    def process_files(self, startupinfo, final=False):
+        # Only the croc session folder is scanned, never the whole download tree.
+        for filepath in self.staging.delivered_files():
+            f = os.path.basename(filepath)
+            try:
+                size = os.path.getsize(filepath)
+            except OSError:
+                continue
+            settled = final or self.seen_sizes.get(filepath) == size
+            self.seen_sizes[filepath] = size
+            if not settled or not is_archive(f):
+                continue
+
+            backend = backend_for_archive(f, self._7z_path)
+            if backend and self._is_file_ready(filepath):
+                with self.trace.span("test", file=f):
+                    complete = backend.test(filepath, startupinfo)
+                if complete:
+                    with self.trace.span("extract", file=f, bytes=size):
+                        extracted = backend.extract(filepath, self.staging.extract_target(filepath), startupinfo,
+                                                    self.syncer)
+                    if extracted:
+                        try:
+                            os.remove(filepath)
+                            self.seen_sizes.pop(filepath, None)
+                            self.received_files += 1
+                            self.received_bytes += size
+                            with self.trace.span("fsync"):
+                                self.syncer.flush()
+                            with self.trace.span("publish"):
+                                self._publish()
+                            self.log_signal.emit(f"📦 Extracted & Ready: {strip_archive_suffix(f)}")
+                            self.file_extracted_signal.emit()
+                        except OSError:
+                            pass
+
+        if final and self.publish_remaining:
+            # croc finished cleanly: whatever is left (plain files, unreadable archives) is complete.
+            for filepath in self.staging.delivered_files():
+                try:
+                    target = os.path.join(self.staging.extract_target(filepath), os.path.basename(filepath))
+                    size = os.path.getsize(filepath)
+                    os.replace(filepath, target)
+                    self.syncer.add(target)
+                    self.received_files += 1
+                    self.received_bytes += size
+                except OSError:
+                    pass
+            self.syncer.flush()
+            if self._publish():
+                self.file_extracted_signal.emit()
+            self.staging.reset()
+
+    def _publish(self):
+        published, self.unpublished = self.staging.publish(self.download_dir)
+        for rel in self.unpublished:
+            self.log_signal.emit(f"⚠️ Could not publish {rel}; it stays in {self.staging.root}.")
+        return published
 
     def _is_file_ready(self, filepath):
         if os.name != 'nt': return True
@@ -118,7 +257,8 @@ class LiveUnzipWorker(QThread):
             return startupinfo
         return None
 
-    def stop(self):
+    def stop(self, publish_remaining=False):
+        self.publish_remaining = publish_remaining
         self.is_running = False
 
 
@@ -129,24 +269,44 @@ class CrocWorker(QThread):
     log_signal = pyqtSignal(str)
     finished_signal = pyqtSignal(bool, bool)
 
-    def __init__(self, command_args):
+    def __init__(self, command_args, kind="send"):
         super().__init__()
         self.command_args = command_args
+        self.kind = kind
         self.process = None
         self.is_killed = False
+        # Wall-clock start and length of the croc session, for the transfer history.
+        self.started_at = None
+        self.duration = 0
 
     def run(self):
         startupinfo = self._get_startup_info()
+        trace = PROFILER.trace(f"croc-{self.kind}")
+        with trace.span("slot_wait"):
+            slot = SCHEDULER.acquire(self.kind, PRIORITY_MANUAL, should_continue=lambda: not self.is_killed)
+        if slot is None:
+            trace.discard()
+            self.log_signal.emit("\n⏸️ Transfer Paused manually.")
+            self.finished_signal.emit(True, False)
+            return
         try:
+            cmd = [TOOLS.require("croc")] + slot.croc_args() + self.command_args[1:]
+            self.started_at = time.time()
+            session_start, first_progress = time.perf_counter(), None
             self.process = subprocess.Popen(
-                self.command_args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
                 text=True, encoding='utf-8', errors='replace', bufsize=1, startupinfo=startupinfo
             )
             for line in self.process.stdout:
                 clean_line = line.strip()
                 if clean_line: self.log_signal.emit(clean_line)
+                if first_progress is None and "%" in clean_line:
+                    first_progress = time.perf_counter()
 
             self.process.wait()
+            self.duration = time.time() - self.started_at
+            _trace_croc_session(trace, session_start, first_progress, time.perf_counter(),
+                                returncode=self.process.returncode)
             is_success = (self.process.returncode == 0)
 
             if self.is_killed:
@@ -157,9 +317,15 @@ class CrocWorker(QThread):
                 self.log_signal.emit(f"\n⚠️ Connection dropped. (Code {self.process.returncode})")
 
             self.finished_signal.emit(self.is_killed, is_success)
+        except ToolMissingError as e:
+            self.log_signal.emit(f"❌ Error: {e}")
+            self.finished_signal.emit(False, False)
         except Exception as e:
             self.log_signal.emit(f"❌ System Error: {str(e)}")
             self.finished_signal.emit(False, False)
+        finally:
+            slot.release()
+            trace.close()
 
     def _get_startup_info(self):
         if os.name == 'nt':
@@ -180,103 +346,509 @@ class AutoSendWorker(QThread):
     log_signal = pyqtSignal(str)
     finished_signal = pyqtSignal()
 
-    def __init__(self, folders, code, _7z_path, delete_after_send=True, check_interval=3):
+    def __init__(self, folders, code, _7z_path, delete_after_send=True, check_interval=3,
+                 prefetch_depth=4, batch_max_files=32, batch_max_bytes=64 * 1024 * 1024, archive_format="7z",
+                 default_profile="default", require_ack=True, ack_timeout=60,
+                 mirror_mode=False, tracker_path=TRACKER_FILE, cold_interval_max=300, default_excludes=True):
         super().__init__()
-        self.folders = folders
+        # Plain paths or FolderPolicy objects; a policy's unset fields fall back to the arguments here.
+        self.policies = [f if isinstance(f, FolderPolicy) else FolderPolicy(f) for f in folders]
+        self.policy_by_folder = {p.folder: p for p in self.policies}
+        self.folders = [p.folder for p in self.policies]
+        # Temp, lock and swap files (pathfilter.DEFAULT_EXCLUDES) are skipped unless a folder says otherwise.
+        self.default_excludes = default_excludes
         self.code = code
         self._7z_path = _7z_path
-        self.delete_after_send = delete_after_send
+        self.archive_format = archive_format
+        self.default_profile = default_profile
+        self._backends = {}
+        # file_path -> (size, mtime_ns) for files staged raw (store mode) until they are sent.
+        self.raw_stamps = {}
+        # Per-file bookkeeping for the transfer history.
+        self.compress_seconds = {}
+        self.attempts = {}
+        self.adaptive = AdaptiveCompression()
+        self.require_ack = require_ack
+        self.ack_timeout = ack_timeout
+        # Mirror mode keeps originals and propagates renames/deletes instead.
+        self.mirror = MirrorTracker(tracker_path) if mirror_mode else None
+        self.delete_after_send = delete_after_send and not self.mirror
         self.check_interval = check_interval
+        # Folders that keep turning up nothing are rescanned less and less often, up to this.
+        self.cold_interval_max = cold_interval_max
+        self.prefetch_depth = max(1, prefetch_depth)
+        self.batch_max_files = max(1, batch_max_files)
+        self.batch_max_bytes = batch_max_bytes
 
         self.is_running = True
         self.temp_dir = None
+        # file_path -> mtime_ns when it was last sent.
         self.file_tracker = {}
+        # folder -> Snapshot of the previous scan, and the files it found that weren't sent yet.
+        self.snapshots = {}
+        self.unsent = {}
+        # Trace of the scan cycle being sent (shared with the prefetch thread).
+        self.trace = NULL_TRACE
 
     def run(self):
         self.log_signal.emit(f"\n[Watcher] 👀 Monitoring {len(self.folders)} folders...")
         self.log_signal.emit(
             f"[Watcher] ⚙️ Delete sent files: {'Yes' if self.delete_after_send else 'No'} | Interval: {self.check_interval}s")
+        for policy in self.policies:
+            if policy.to_config() != policy.folder:
+                self.log_signal.emit(f"[Watcher] ⚙️ {policy.folder}: {policy.describe()}")
 
-        self.temp_dir = tempfile.mkdtemp(prefix="croc_watch_")
+        # Fail once with a clear message instead of retrying a missing binary forever.
+        try:
+            self.croc_path = TOOLS.require("croc")
+            if self.archive_format == "7z":
+                self._7z_path = TOOLS.require("7z")
+        except ToolMissingError as e:
+            self.log_signal.emit(f"[Watcher] ❌ {e}. Watcher stopped.")
+            self.is_running = False
+            self.finished_signal.emit()
+            return
+
+        try:
+            self.temp_dir = STAGING.mkdtemp("croc_watch_")
+        except OSError as e:
+            self.log_signal.emit(f"[Watcher] ❌ {e}. Watcher stopped.")
+            self.is_running = False
+            self.finished_signal.emit()
+            return
         startupinfo = self._get_startup_info()
 
+        # (next scan time, tiebreak, policy): only folders that are due get scanned.
+        seq = itertools.count()
+        due = [(0, next(seq), policy) for policy in self.policies]
         while self.is_running:
             files_to_send = []
-
-            for folder in self.folders:
-                if not os.path.exists(folder): continue
-
-                for root, dirs, files in os.walk(folder):
-                    for file in files:
-                        full_path = os.path.join(root, file)
-                        try:
-                            mtime = os.path.getmtime(full_path)
-                            if full_path not in self.file_tracker or mtime > self.file_tracker[full_path]:
-                                files_to_send.append(full_path)
-                        except OSError:
-                            pass
+            scanned = []
+            scan_start = time.perf_counter()
+
+            while due and due[0][0] <= time.monotonic():
+                scanned.append(heapq.heappop(due)[2])
+            # All due roots are walked together on the scanner's thread pool.
+            present = [p for p in scanned if os.path.exists(p.folder)]
+            snapshots = dict(zip((p.folder for p in present), SCANNER.scan_many(
+                [(p.folder, p.path_filter(self.default_excludes)) for p in present])))
+            for policy in scanned:
+                snapshot = snapshots.get(policy.folder)
+                found, active = self.scan_folder(policy, snapshot, startupinfo) if snapshot else ([], False)
+                policy.scanned(active, self.check_interval, self.cold_interval_max)
+                files_to_send.extend(found)
 
             if files_to_send:
+                self.trace = PROFILER.trace(f"watch-{self.code}", start=scan_start)
+                self.trace.add("scan", scan_start, time.perf_counter(), folders=len(scanned),
+                               detected=len(files_to_send))
                 self.log_signal.emit(f"[Watcher] 🔎 Detected {len(files_to_send)} new/modified items.")
+                with self.trace.profiled():
+                    # One croc session can only go to one code; higher-priority folders go first.
+                    groups = {}
+                    for item in files_to_send:
+                        policy = self.policy_by_folder[item[1]]
+                        groups.setdefault((policy.priority_class(), self.code_for(item[1])), []).append(item)
+                    for (priority, code), items in sorted(groups.items()):
+                        if not self.is_running: break
+                        self.send_detected(items, startupinfo, code, priority)
+                self.trace.close()
+                self.trace = NULL_TRACE
+
+            # The next scan is timed from the end of this one, as before.
+            for policy in scanned:
+                heapq.heappush(due, (time.monotonic() + policy.scan_interval, next(seq), policy))
+            while self.is_running and due and due[0][0] > time.monotonic():
+                time.sleep(min(0.1, due[0][0] - time.monotonic()))
 
-                for file_path in files_to_send:
-                    if not self.is_running: break
-
-                    filename = os.path.basename(file_path)
-                    zip_path = os.path.join(self.temp_dir, filename + ".7z")
-
-                    self.log_signal.emit(f"[Watcher]   -> Zipping: {filename}")
-                    subprocess.run([self._7z_path, "a", "-mx=3", zip_path, file_path],
-                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, startupinfo=startupinfo)
+        self.cleanup()
+        self.finished_signal.emit()
 
-                    success = self.send_file(zip_path, filename, startupinfo)
+    def scan_folder(self, policy, snapshot, startupinfo):
+        """
+        (files, active): new or modified files under one watched root that its policy
+        accepts, as (path, folder), and whether the folder saw any activity (in mirror
+        mode renames and deletes count too). Only what changed since the previous
+        snapshot, plus what was found before but not sent yet, is checked against the
+        sent-file tracker.
+        """
+        folder = policy.folder
+        if self.mirror:
+            return self.scan_mirror(folder, startupinfo, snapshot)
+
+        added, modified, removed = snapshot.diff(self.snapshots.get(folder))
+        self.snapshots[folder] = snapshot
+        for rel in removed:
+            self.file_tracker.pop(os.path.join(folder, *rel.split("/")), None)
+
+        found, unsent = [], set()
+        for rel in sorted(set(added).union(modified, self.unsent.get(folder, ()))):
+            i = snapshot.index(rel)
+            if i < 0:
+                continue
+            full_path = snapshot.full_path(i)
+            if snapshot.mtimes[i] > self.file_tracker.get(full_path, -1):
+                found.append((full_path, folder))
+                unsent.add(rel)
+        self.unsent[folder] = unsent
+        return found, bool(found)
+
+    def code_for(self, folder):
+        return self.policy_by_folder[folder].code or self.code
+
+    def deletes_after_send(self, folder):
+        policy = self.policy_by_folder[folder]
+        delete = self.delete_after_send if policy.delete_after_send is None else policy.delete_after_send
+        # Mirror mode never deletes originals, whatever the folder says.
+        return bool(delete) and not self.mirror
+
+    def profile_for(self, folder):
+        policy = self.policy_by_folder.get(folder)
+        return (policy and policy.profile) or self.default_profile
+
+    def send_detected(self, files_to_send, startupinfo, code=None, priority=PRIORITY_AUTO):
+        """
+        Archives are prepared ahead by a background thread so the next croc session
+        starts as soon as the previous one ends, and archives that are already
+        waiting are coalesced into a single croc session to share one handshake.
+        Each archive stores its file under the path relative to the watched folder,
+        and every session carries a manifest describing that layout.
+        All files go to `code` (the watcher's code by default).
+        """
+        code = code or self.code
+        ready = queue.Queue(maxsize=self.prefetch_depth)
+        producer = threading.Thread(target=self._prefetch_archives, args=(files_to_send, ready, startupinfo),
+                                    daemon=True)
+        producer.start()
+
+        pending = None
+        finished = False
+        while (pending or not finished) and self.is_running:
+            # Time spent here means the network is waiting on compression.
+            with self.trace.span("wait_for_archive"):
+                batch = [pending] if pending else [ready.get()]
+            pending = None
+            if batch[0] is None:
+                break
+
+            names = {batch[0][1]}
+            rel_paths = {batch[0][4]["path"]}
+            batch_bytes = batch[0][3]
+            while len(batch) < self.batch_max_files:
+                try:
+                    item = ready.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    finished = True
+                    break
+                # Same relative path from two roots can't share a session; big archives go alone.
+                if item[4]["path"] in rel_paths or batch_bytes + item[3] > self.batch_max_bytes:
+                    pending = item
+                    break
+                if item[1] in names:
+                    # croc names files on the wire by basename; the path inside the archive is what counts.
+                    wire_name = f"{len(batch)}-{item[1]}"
+                    wire_path = os.path.join(os.path.dirname(item[2]), wire_name)
+                    os.replace(item[2], wire_path)
+                    item = (item[0], wire_name, wire_path, item[3], item[4], item[5])
+                batch.append(item)
+                names.add(item[1])
+                rel_paths.add(item[4]["path"])
+                batch_bytes += item[3]
+
+            batch = [self._restage_changed(item) for item in batch]
+            for item in batch:
+                if item[0] in self.raw_stamps:
+                    # Raw files arrive flat under their wire name; the receiver moves them into place.
+                    item[4]["wire"] = item[1]
+            label = batch[0][4]["path"] if len(batch) == 1 else f"{len(batch)} files"
+            transfer_id, manifest_path = write_manifest(os.path.dirname(batch[0][2]),
+                                                        [item[4] for item in batch], ack=self.require_ack,
+                                                        payload=[item[1] for item in batch])
+            payload = [item[2] for item in batch] + [manifest_path]
+            for item in batch:
+                self.attempts[item[0]] = self.attempts.get(item[0], 0) + 1
+            started = time.time()
+            with self.trace.span("send", files=len(batch), bytes=sum(item[3] for item in batch)):
+                success = self.send_file(payload, label, startupinfo, code, priority)
+            transfer_s = time.time() - started
+
+            failed, verified = set(), not self.require_ack
+            ack_started = time.time()
+            if success and self.require_ack:
+                with self.trace.span("ack"):
+                    ack = self.wait_for_ack(transfer_id, startupinfo, code)
+                if ack is None:
+                    self.log_signal.emit(f"[Watcher] ⚠️ No verified ack for '{label}'. Keeping originals.")
+                else:
+                    failed = set(ack.get("failed", []))
+                    verified = True
+                    if failed:
+                        self.log_signal.emit(f"[Watcher] ❌ Receiver rejected {len(failed)} file(s); will resend.")
+
+            for file_path, archive_name, zip_path, _, entry, folder in batch:
+                if file_path in self.raw_stamps and not self.require_ack and self._source_changed(file_path):
+                    # Without a receiver-side hash check, a change under the link means it was sent torn.
+                    failed.add(entry["path"])
+                self.raw_stamps.pop(file_path, None)
+                if success and entry["path"] not in failed:
+                    self._mark_sent(file_path, entry["path"],
+                                    allow_delete=verified and self.deletes_after_send(folder))
+                    if self.mirror:
+                        self.mirror.record(folder, entry["path"], file_path, entry.get("hash"))
+                try:
+                    os.remove(zip_path)
+                except:
+                    pass
+                STAGING.release(file_path)
+            if self.mirror:
+                self.mirror.save()
+            try:
+                os.remove(manifest_path)
+            except:
+                pass
+            self._record_batch(batch, code, started, transfer_s, time.time() - ack_started, success, failed, verified)
 
-                    if success:
-                        try:
-                            self.file_tracker[file_path] = os.path.getmtime(file_path)
-                        except:
-                            pass
+        # Unblock and drain the producer if we stopped early.
+        while producer.is_alive() or not ready.empty():
+            try:
+                item = ready.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is not None:
+                try:
+                    os.remove(item[2])
+                except:
+                    pass
+                STAGING.release(item[0])
+
+    def _record_batch(self, batch, code, started, transfer_s, ack_s, success, failed, verified):
+        if not success:
+            outcome = "failed"
+        elif failed:
+            outcome = "rejected"
+        else:
+            outcome = "ok" if verified else "unverified"
+        HISTORY.record("send", "watcher", outcome, started, code=code, files=len(batch),
+                       bytes_raw=sum(item[4]["size"] for item in batch),
+                       bytes_packed=sum(item[3] for item in batch),
+                       compress_s=sum(self.compress_seconds.pop(item[0], 0) for item in batch),
+                       transfer_s=transfer_s, ack_s=ack_s if self.require_ack else 0,
+                       retries=sum(self.attempts.get(item[0], 1) - 1 for item in batch))
+        for item in batch:
+            if success and item[4]["path"] not in failed:
+                self.attempts.pop(item[0], None)
+
+    def scan_mirror(self, folder, startupinfo, snapshot=None):
+        """
+        Sends rename/delete operations as one metadata-only session. Returns the files
+        needing content and whether there were any operations.
+        """
+        current = self.mirror.scan(folder, self.policy_by_folder[folder].path_filter(self.default_excludes),
+                                   snapshot)
+        ops, changed, file_renames = self.mirror.diff(folder, current)
+        if ops:
+            transfer_id, manifest_path = write_manifest(self.temp_dir, [], ack=False, ops=ops)
+            self.log_signal.emit(f"[Watcher] 🔀 {len(ops)} rename/delete operation(s) in {folder}")
+            if self.send_file([manifest_path], f"{len(ops)} mirror ops", startupinfo, self.code_for(folder)):
+                self.mirror.apply_metadata(folder, ops, file_renames)
+            try:
+                os.remove(manifest_path)
+            except:
+                pass
+        return [(os.path.join(folder, *rel.split("/")), folder) for rel, _ in changed], bool(ops or changed)
 
-                        if self.delete_after_send:
-                            try:
-                                os.remove(file_path)
-                                self.log_signal.emit(f"[Watcher] 🗑️ Deleted original: {filename}")
-                                if file_path in self.file_tracker:
-                                    del self.file_tracker[file_path]
-                            except Exception as e:
-                                self.log_signal.emit(f"[Watcher] ⚠️ Could not delete {filename}: {e}")
-
-                    try:
-                        os.remove(zip_path)
-                    except:
-                        pass
-
-            steps = max(1, int(self.check_interval * 10))
-            for _ in range(steps):
+    def _prefetch_archives(self, files_to_send, ready, startupinfo):
+        # The sender blocks on ready.get(); the end marker has to arrive whatever happens here.
+        try:
+            for index, (file_path, folder) in enumerate(files_to_send):
                 if not self.is_running: break
-                time.sleep(0.1)
+                item = self._prefetch_one(index, file_path, folder, startupinfo)
+                if item: ready.put(item)
+        except Exception as e:
+            self.log_signal.emit(f"[Watcher] ❌ Preparing archives failed: {e}")
+            logging.error(f"Prefetch Error: {e}")
+        finally:
+            ready.put(None)
+
+    def _prefetch_one(self, index, file_path, folder, startupinfo):
+        """Stages or compresses one file; None if it has to wait for a later scan."""
+        level = None
+        if self.profile_for(folder) == ADAPTIVE_PROFILE:
+            level = self.adaptive.next_level()
+            backend = get_backend(self.archive_format, self._7z_path, self.adaptive.profile_for(level))
+        else:
+            backend = self.backend_for_folder(folder)
+        filename = os.path.basename(file_path)
+        rel_path = os.path.relpath(file_path, folder)
+        item_dir = os.path.join(self.temp_dir, str(index))
+        # Store mode sends the file itself, reflinked/hardlinked into staging.
+        zero_copy = is_store_profile(backend.profile) and not is_archive(filename)
+        archive_name = filename if zero_copy else filename + backend.extension
+        zip_path = os.path.join(item_dir, archive_name)
 
-        self.cleanup()
-        self.finished_signal.emit()
+        try:
+            os.makedirs(item_dir, exist_ok=True)
+            linkable = zero_copy and os.stat(file_path).st_dev == os.stat(self.temp_dir).st_dev
+        except OSError:
+            return None
+        with self.trace.span("wait_for_room"):
+            has_room = linkable or self._wait_for_room(STAGING.estimate(file_path, backend))
+        if not has_room:
+            # Left unmarked, so the next scan picks it up again.
+            self.log_signal.emit(f"[Watcher] 💾 Not enough staging space for {rel_path}; deferring.")
+            return None
+        started = time.perf_counter()
+        try:
+            if zero_copy:
+                hit = False
+                with self.trace.span("stage_raw", file=rel_path):
+                    method = self._stage_raw(file_path, zip_path)
+                self.log_signal.emit(f"[Watcher]   -> Staged ({method}): {rel_path}")
+            else:
+                with self.trace.span("compress", file=rel_path, profile=backend.profile) as span:
+                    ok, hit = STAGING_CACHE.compress(backend, file_path, zip_path, startupinfo, base_dir=folder)
+                    span["cache_hit"] = hit
+                if not ok:
+                    # A partial archive must never be sent (without acks the original would be deleted).
+                    self.log_signal.emit(f"[Watcher] ❌ Compressing {rel_path} failed; will retry.")
+                    shutil.rmtree(item_dir, ignore_errors=True)
+                    return None
+                self.log_signal.emit(f"[Watcher]   -> {'Reusing staged archive' if hit else 'Zipping'}: {rel_path}"
+                                     + (f" (level {level})" if level is not None else ""))
+            size = os.path.getsize(zip_path)
+            STAGING.claim(file_path, 0 if linkable else size)
+            if not hit:
+                STAGING.observe(backend, os.path.getsize(file_path), size)
+            self.compress_seconds[file_path] = time.perf_counter() - started
+            if level is not None and not hit:
+                self.adaptive.record_compression(level, os.path.getsize(file_path), size,
+                                                 time.perf_counter() - started)
+            with self.trace.span("hash" if self.require_ack else "stat", file=rel_path):
+                entry = manifest_entry(file_path, rel_path, with_hash=self.require_ack)
+        except OSError:
+            return None
+        return (file_path, archive_name, zip_path, size, entry, folder)
+
+    def _stage_raw(self, file_path, staged_path):
+        st = os.stat(file_path)
+        method = clone_file(file_path, staged_path)
+        self.raw_stamps[file_path] = (st.st_size, st.st_mtime_ns)
+        return method
+
+    def _source_changed(self, file_path):
+        """For raw-staged files: has the source changed since it was staged (a hardlink would follow it)?"""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return False
+        return self.raw_stamps.get(file_path, (st.st_size, st.st_mtime_ns)) != (st.st_size, st.st_mtime_ns)
+
+    def _restage_changed(self, item):
+        """Re-stages a raw file whose source changed under the link and rebuilds its manifest entry."""
+        file_path, archive_name, zip_path, _, entry, folder = item
+        if file_path not in self.raw_stamps or not self._source_changed(file_path):
+            return item
+        self.log_signal.emit(f"[Watcher] ♻️ {entry['path']} changed since staging; re-staging.")
+        try:
+            os.remove(zip_path)
+            self._stage_raw(file_path, zip_path)
+            entry = manifest_entry(file_path, entry["path"], with_hash=self.require_ack)
+            return file_path, archive_name, zip_path, os.path.getsize(zip_path), entry, folder
+        except OSError:
+            return item
+
+    def _wait_for_room(self, nbytes):
+        """Holds the prefetcher back while staged archives drain; False if they never make room."""
+        while self.is_running and not STAGING.has_room(self.temp_dir, nbytes):
+            if STAGING.staged_bytes() == 0:
+                return False
+            time.sleep(0.5)
+        return self.is_running
+
+    def backend_for_folder(self, folder):
+        profile = self.profile_for(folder)
+        if profile not in self._backends:
+            self._backends[profile] = get_backend(self.archive_format, self._7z_path, profile)
+        return self._backends[profile]
+
+    def wait_for_ack(self, transfer_id, startupinfo, code=None):
+        """Polls the ack code until the receiver reports the verification result or we time out."""
+        ack_dir = os.path.join(self.temp_dir, "ack", transfer_id)
+        os.makedirs(ack_dir, exist_ok=True)
+        deadline = time.monotonic() + self.ack_timeout
+        while self.is_running and time.monotonic() < deadline:
+            slot = SCHEDULER.acquire("recv", PRIORITY_SMALL, should_continue=lambda: self.is_running)
+            if slot is None: break
+            with slot:
+                try:
+                    subprocess.run([self.croc_path, "--yes", "--out", ack_dir, ack_code(code or self.code, transfer_id)],
+                                   stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   startupinfo=startupinfo, timeout=max(1, deadline - time.monotonic()))
+                except subprocess.TimeoutExpired:
+                    pass
+            ack = read_ack(ack_dir, transfer_id)
+            if ack is not None:
+                shutil.rmtree(ack_dir, ignore_errors=True)
+                return ack
+            time.sleep(1)
+        return None
 
-    def send_file(self, zip_path, original_name, startupinfo):
-        cmd = ["croc", "send", "--code", self.code, zip_path]
-        self.log_signal.emit(f"[Watcher] 📡 Hosting '{original_name}' on code '{self.code}'. Waiting for Server...")
+    def _mark_sent(self, file_path, filename, allow_delete=False):
+        try:
+            self.file_tracker[file_path] = os.stat(file_path).st_mtime_ns
+        except:
+            pass
 
-        while self.is_running:
-            process = subprocess.Popen(
-                cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                text=True, encoding='utf-8', errors='replace', startupinfo=startupinfo
-            )
+        if allow_delete:
+            try:
+                os.remove(file_path)
+                STAGING_CACHE.forget(file_path)
+                self.log_signal.emit(f"[Watcher] 🗑️ Deleted original: {filename}")
+                if file_path in self.file_tracker:
+                    del self.file_tracker[file_path]
+            except Exception as e:
+                self.log_signal.emit(f"[Watcher] ⚠️ Could not delete {filename}: {e}")
 
-            for line in process.stdout:
-                ln = line.strip()
-                if ln and any(k in ln.lower() for k in ["error", "failed", "flag"]):
-                    self.log_signal.emit(f"[Watcher] ⚠️ Croc warning: {ln}")
+    def send_file(self, zip_paths, original_name, startupinfo, code=None, priority=PRIORITY_AUTO):
+        code = code or self.code
+        self.log_signal.emit(f"[Watcher] 📡 Hosting '{original_name}' on code '{code}'. Waiting for Server...")
+        try:
+            priority = SCHEDULER.priority_for_size(sum(os.path.getsize(p) for p in zip_paths), priority)
+        except OSError:
+            pass
 
-            process.wait()
+        while self.is_running:
+            with self.trace.span("slot_wait"):
+                slot = SCHEDULER.acquire("send", priority, should_continue=lambda: self.is_running)
+            if slot is None:
+                break
+            with slot:
+                cmd = [self.croc_path] + slot.croc_args() + ["send", "--code", code] + list(zip_paths)
+                session_start, first_progress = time.perf_counter(), None
+                process = subprocess.Popen(
+                    cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                    text=True, encoding='utf-8', errors='replace', startupinfo=startupinfo
+                )
+
+                last_rate = None
+                for line in process.stdout:
+                    ln = line.strip()
+                    if ln and any(k in ln.lower() for k in ["error", "failed", "flag"]):
+                        self.log_signal.emit(f"[Watcher] ⚠️ Croc warning: {ln}")
+                    if first_progress is None and "%" in ln:
+                        first_progress = time.perf_counter()
+                    rate = parse_croc_rate(ln) if ln else None
+                    if rate:
+                        last_rate = rate
+
+                process.wait()
+                _trace_croc_session(self.trace, session_start, first_progress, time.perf_counter(),
+                                    returncode=process.returncode)
 
             if process.returncode == 0:
+                self.adaptive.record_link(last_rate)
                 self.log_signal.emit(f"[Watcher] ✅ Sent: {original_name}")
                 return True
             else:
@@ -305,18 +877,35 @@ class AutoSendWorker(QThread):
 # ==========================================
 # WORKER: SERVER (Auto-Receiver)
 # ==========================================
-class AutoRecvWorker(QThread):
-    log_signal = pyqtSignal(str)
-    extracted_signal = pyqtSignal()
-
-    def __init__(self, code, base_download_dir, subfolder_name, _7z_path):
-        super().__init__()
+class ReceiveListener:
+    """
+    One receiver code. Not a thread: poll() runs a single croc session on the calling
+    thread, so a ListenerPoolWorker can serve hundreds of codes with a few threads.
+    """
+    __slots__ = ("code", "subfolder_name", "tag", "target_dir", "staging", "_7z_path", "croc_path",
+                 "ack_timeout", "fsync", "log", "extracted", "should_continue", "process", "trace",
+                 "idle_polls", "received")
+
+    def __init__(self, code, base_download_dir, subfolder_name, _7z_path, croc_path, log, extracted,
+                 should_continue, ack_timeout=60, fsync=True):
         self.code = code
+        self.ack_timeout = ack_timeout
+        # Received data is made durable (in batches) before it is published and acknowledged.
+        self.fsync = fsync
         self.subfolder_name = subfolder_name
+        self.tag = f"[Server: {subfolder_name}]"
         self.target_dir = os.path.join(base_download_dir, subfolder_name)
+        self.staging = ReceiveStaging(base_download_dir, subfolder_name)
         self._7z_path = _7z_path
-        self.is_running = True
+        self.croc_path = croc_path
+        self.log = log
+        self.extracted = extracted
+        self.should_continue = should_continue
         self.process = None
+        self.trace = NULL_TRACE
+        # Consecutive polls that found no sender (drives the backoff), and sessions received.
+        self.idle_polls = 0
+        self.received = 0
 
         if not os.path.exists(self.target_dir):
             try:
@@ -324,60 +913,312 @@ class AutoRecvWorker(QThread):
             except Exception as e:
                 logging.error(f"Failed to create target dir: {e}")
 
-    def run(self):
-        startupinfo = self._get_startup_info()
-        tag = f"[Server: {self.subfolder_name}]"
-
-        self.log_signal.emit(f"\n{tag} 🟢 Listening for incoming files on code: '{self.code}'")
-        self.log_signal.emit(f"{tag} 📁 Saving to: .../received/{self.subfolder_name}")
-
-        poll_count = 0
-        while self.is_running:
-            cmd = ["croc", "--yes", "--out", self.target_dir, self.code]
-
-            self.process = subprocess.Popen(
+    def poll(self, startupinfo, handshake_timeout=0):
+        """
+        One croc receive attempt; True if a session was received and unpacked. With a
+        handshake_timeout, croc is stopped if no transfer has started by then, so an
+        idle code can't hold a process slot that another code's sender is waiting for.
+        """
+        tag = self.tag
+        slot = SCHEDULER.acquire("recv", PRIORITY_AUTO, listener=self.subfolder_name,
+                                 should_continue=self.should_continue)
+        if slot is None: return False
+
+        with slot:
+            # Land in a private session folder; only finished files reach target_dir.
+            session_dir = self.staging.prepare()
+            # What an earlier broken session left behind; this session only owns what it writes.
+            leftover = self.staging.stamps()
+            cmd = [self.croc_path] + slot.croc_args() + ["--yes", "--out", session_dir, self.code]
+            started = time.time()
+            session_start, first_progress = time.perf_counter(), None
+
+            process = self.process = subprocess.Popen(
                 cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
                 text=True, encoding='utf-8', errors='replace', startupinfo=startupinfo
             )
+            watchdog = None
+            if handshake_timeout:
+                # Croc keeps what it already received in session_dir, so a later poll resumes it.
+                watchdog = threading.Timer(handshake_timeout, lambda: first_progress is None and process.kill())
+                watchdog.daemon = True
+                watchdog.start()
 
-            for line in self.process.stdout:
-                if not self.is_running: break
+            for line in process.stdout:
+                if not self.should_continue(): break
                 ln = line.strip()
                 if not ln: continue
+                if first_progress is None and "%" in ln:
+                    first_progress = time.perf_counter()
 
                 lower_ln = ln.lower()
                 if any(k in lower_ln for k in ["%", "receiving", "download", "mb", "kb", "speed"]):
-                    self.log_signal.emit(f"{tag} {ln}")
+                    self.log(f"{tag} {ln}")
+                elif "not ready" in lower_ln:
+                    continue  # No sender yet: the normal outcome of an idle poll, not worth a log line.
                 elif any(k in lower_ln for k in ["error", "flag", "failed", "command not found"]):
-                    self.log_signal.emit(f"{tag} ❌ Croc Error: {ln}")
+                    self.log(f"{tag} ❌ Croc Error: {ln}")
 
-            self.process.wait()
-            if not self.is_running: break
+            process.wait()
+            if watchdog:
+                watchdog.cancel()
+            self.process = None
+            session_end = time.perf_counter()
+            if not self.should_continue(): return False
+
+        # The slot is released before unpacking so the ack sender can get one.
+        if process.returncode != 0:
+            # A session that broke off mid-transfer is retried soon; a code with no sender backs off.
+            self.idle_polls = 1 if first_progress is not None else self.idle_polls + 1
+            return False
+        self.idle_polls = 0
+        self.received += 1
+        self.log(f"{tag} 📥 File Received! Unpacking...")
+        # Polls that found no sender are not traced; a received session is, from its start.
+        self.trace = PROFILER.trace(f"recv-{self.subfolder_name}", start=session_start)
+        _trace_croc_session(self.trace, session_start, first_progress, session_end)
+        with self.trace.profiled():
+            slot.report(self.extract_files(startupinfo, tag, started, time.time() - started, leftover))
+        self.trace.close()
+        self.trace = NULL_TRACE
+        return True
+
+    def extract_files(self, startupinfo, tag, started=None, transfer_s=0, leftover=None):
+        """
+        Extract in staging, then publish into target_dir with atomic renames. Files are
+        verified against their manifest as they land, overlapping the next extraction.
+        `leftover` (staging stamps from before the session) keeps files an earlier broken
+        session left in the session folder out of this one.
+        """
+        extract_started = time.time()
+        received_bytes = 0
+        delivered = self.staging.delivered_files(leftover)
+        manifests = [m for m in (load_manifest(p) for p in delivered if is_manifest(os.path.basename(p))) if m]
+        # croc skips a file it already has in full, so a leftover the manifest names is part of this session.
+        named = {name for m in manifests for name in m.get("payload", [])}
+        delivered += [p for p in self.staging.delivered_files() if p not in delivered and os.path.basename(p) in named]
+        stale = [p for p in leftover or () if p not in delivered]
+        if stale:
+            # Removed with the session folder by reset() below.
+            self.log(f"{tag} 🧹 Discarding {len(stale)} leftover file(s) from an earlier session.")
+        rejected = 0
+        # Stands in for the SyncBatch: whatever is written gets both synced and verified.
+        syncer = StreamVerifier(manifests, self.staging.extract_dir, SyncBatch(enabled=self.fsync))
+        # Raw (store mode) files arrive under their wire name; the manifest says where they belong.
+        wire_paths = {e["wire"]: e["path"] for m in manifests for e in m.get("files", []) if "wire" in e}
+        for filepath in delivered:
+            f = os.path.basename(filepath)
+            if is_manifest(f):
+                continue
+            try:
+                received_bytes += os.path.getsize(filepath)
+            except OSError:
+                pass
+            rel = safe_rel_path(wire_paths[f]) if f in wire_paths else None
+            if rel:
+                target = os.path.join(self.staging.extract_dir, rel)
+                try:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(filepath, target)
+                    syncer.add(target)
+                except OSError as e:
+                    self.log(f"{tag} ⚠️ Could not stage {f}: {e}")
+                continue
+            out_dir = self.staging.extract_target(filepath)
+
+            backend = backend_for_archive(f, self._7z_path) if is_archive(f) else None
+            with self.trace.span("extract", file=f):
+                extracted = bool(backend) and backend.extract(filepath, out_dir, startupinfo, syncer)
+            if extracted:
+                self.log(f"{tag} 📦 Unzipped: {strip_archive_suffix(f)}")
+                continue
+            if is_archive(f):
+                # Never published; its manifest entries fail verification and are reported as such.
+                rejected += 1
+                try:
+                    self.log(f"{tag} ❌ Could not extract {f}; kept in {self.staging.reject(filepath)}.")
+                except OSError as e:
+                    self.log(f"{tag} ❌ Could not extract {f}: {e}")
+                continue
+            try:
+                os.replace(filepath, os.path.join(out_dir, f))
+                syncer.add(os.path.join(out_dir, f))
+            except OSError as e:
+                self.log(f"{tag} ⚠️ Could not stage {f}: {e}")
+
+        for manifest in manifests:
+            if manifest.get("ops"):
+                failed_ops = apply_ops(manifest["ops"], self.target_dir, os.path.join(self.staging.root, "trash"))
+                self.log(f"{tag} 🔀 Applied {len(manifest['ops']) - len(failed_ops)} "
+                                     f"rename/delete operation(s)")
+                if failed_ops:
+                    self.log(f"{tag} ⚠️ {len(failed_ops)} operation(s) could not be applied.")
+                self.extracted()
+
+        with self.trace.span("verify", files=sum(len(m.get("files", [])) for m in manifests)):
+            results = syncer.finish()
+        for failures in results.values():
+            for rel in failures:
+                self.log(f"{tag} ❌ Integrity check failed: {rel}")
+                local = safe_rel_path(rel)
+                try:
+                    if local: os.remove(os.path.join(self.staging.extract_dir, local))
+                except OSError:
+                    pass
+
+        with self.trace.span("fsync"):
+            syncer.flush()
+        with self.trace.span("publish"):
+            published, unpublished = self.staging.publish(self.target_dir)
+        if published:
+            self.extracted()
+        if unpublished:
+            # Left in staging (the next publish retries them) and reported as not delivered.
+            self.log(f"{tag} ❌ {len(unpublished)} item(s) could not be published; kept in {self.staging.root}.")
+            for manifest in manifests:
+                failures = results[manifest["transfer_id"]]
+                failures += [e["path"] for e in manifest.get("files", []) if e["path"] not in failures
+                             and any(e["path"] == rel or e["path"].startswith(rel + "/") for rel in unpublished)]
+        self.staging.reset()
+        acks = [(m["transfer_id"], results[m["transfer_id"]]) for m in manifests if m.get("ack", True)]
+
+        extract_s = time.time() - extract_started
+        ack_started = time.time()
+        for transfer_id, failures in acks:
+            with self.trace.span("ack"):
+                self.send_ack(transfer_id, failures, startupinfo, tag)
+
+        payload = [p for p in delivered if not is_manifest(os.path.basename(p))]
+        listed = [e for m in manifests for e in m.get("files", [])]
+        outcome = "failed" if unpublished or rejected else "rejected" if any(f for _, f in acks) else "ok"
+        HISTORY.record("recv", "listener", outcome,
+                       started or extract_started, code=self.code, listener=self.subfolder_name,
+                       files=len(listed) or len(payload),
+                       bytes_raw=sum(e["size"] for e in listed) if listed else received_bytes,
+                       bytes_packed=received_bytes, transfer_s=transfer_s, extract_s=extract_s,
+                       ack_s=time.time() - ack_started)
+        return received_bytes
+
+    def send_ack(self, transfer_id, failures, startupinfo, tag):
+        ack_dir = os.path.join(self.staging.root, "ack")
+        os.makedirs(ack_dir, exist_ok=True)
+        ack_path = write_ack(ack_dir, transfer_id, failures)
+        slot = SCHEDULER.acquire("send", PRIORITY_SMALL, should_continue=self.should_continue)
+        if slot is None: return
+        with slot:
+            try:
+                res = subprocess.run([self.croc_path] + slot.croc_args() + ["send", "--code", ack_code(self.code, transfer_id), ack_path],
+                                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                     startupinfo=startupinfo, timeout=self.ack_timeout)
+                if res.returncode == 0 and failures:
+                    self.log(f"{tag} ⚠️ Reported {len(failures)} undelivered file(s) to the sender.")
+                elif res.returncode == 0:
+                    self.log(f"{tag} ✔️ Verified and acknowledged.")
+            except subprocess.TimeoutExpired:
+                self.log(f"{tag} ⚠️ Sender did not collect the ack.")
+        shutil.rmtree(ack_dir, ignore_errors=True)
 
-            if self.process.returncode == 0:
-                self.log_signal.emit(f"{tag} 📥 File Received! Unpacking...")
-                self.extract_files(startupinfo, tag)
-                poll_count = 0
-            else:
-                poll_count += 1
-                if poll_count >= 10:
-                    self.log_signal.emit(f"{tag} ⏳ Still polling for sender data on '{self.code}'...")
-                    poll_count = 0
-                time.sleep(3)
+    def stop(self):
+        """Kills a croc session in progress; its partial data stays in the session folder."""
+        process = self.process
+        if process and process.poll() is None:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+
+class ListenerPoolWorker(QThread):
+    """
+    Serves many receiver codes with at most `max_live` croc processes, one per pool
+    thread. Codes are polled in due-time order, which rotates fairly through idle
+    ones; a code that finds no sender backs off (doubling up to `idle_backoff`
+    seconds), one that just received something is polled again right away.
+    """
+    log_signal = pyqtSignal(str)
+    extracted_signal = pyqtSignal()
+
+    def __init__(self, listeners, base_download_dir, _7z_path, max_live=8, poll_interval=3, idle_backoff=30,
+                 handshake_timeout=30, ack_timeout=60, fsync=True):
+        super().__init__()
+        # (folder name, code) pairs
+        self.specs = list(listeners)
+        self.base_download_dir = base_download_dir
+        self._7z_path = _7z_path
+        self.max_live = max(1, max_live)
+        self.poll_interval = poll_interval
+        self.idle_backoff = max(poll_interval, idle_backoff)
+        self.handshake_timeout = handshake_timeout
+        self.ack_timeout = ack_timeout
+        self.fsync = fsync
+        self.listeners = []
+        self.is_running = True
+        self._due = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def run(self):
+        try:
+            croc_path = TOOLS.require("croc")
+        except ToolMissingError as e:
+            self.log_signal.emit(f"[Server] ❌ {e}. Listeners stopped.")
+            self.is_running = False
+            return
+        self._7z_path = self._7z_path or TOOLS.path("7z")
+
+        should_continue = lambda: self.is_running
+        self.listeners = [ReceiveListener(code, self.base_download_dir, name, self._7z_path, croc_path,
+                                          self.log_signal.emit, self.extracted_signal.emit, should_continue,
+                                          ack_timeout=self.ack_timeout, fsync=self.fsync)
+                          for name, code in self.specs]
+        now = time.monotonic()
+        with self._cond:
+            self._due = [(now, next(self._seq), listener) for listener in self.listeners]
+            heapq.heapify(self._due)
+
+        threads = [threading.Thread(target=self._serve, name=f"listener-{i}", daemon=True)
+                   for i in range(min(self.max_live, len(self.listeners)))]
+        self.log_signal.emit(f"\n[Server] 🟢 Listening on {len(self.listeners)} code(s) with up to "
+                             f"{len(threads)} croc process(es). Saving to: .../received/<listener>")
+        for t in threads:
+            t.start()
+
+        last_report = time.monotonic()
+        while self.is_running:
+            time.sleep(0.5)
+            if time.monotonic() - last_report >= 60:
+                last_report = time.monotonic()
+                live = sum(1 for l in self.listeners if l.process is not None)
+                self.log_signal.emit(f"[Server] ⏳ {live} of {len(self.listeners)} code(s) in a croc session, "
+                                     f"{sum(l.received for l in self.listeners)} session(s) received so far.")
+        for t in threads:
+            t.join()
+
+    def _serve(self):
+        startupinfo = self._get_startup_info()
+        while self.is_running:
+            with self._cond:
+                while self.is_running and (not self._due or self._due[0][0] > time.monotonic()):
+                    self._cond.wait(min(0.5, self._due[0][0] - time.monotonic()) if self._due else 0.5)
+                if not self.is_running: break
+                _, _, listener = heapq.heappop(self._due)
+
+            received = False
+            try:
+                received = listener.poll(startupinfo, self.handshake_timeout)
+            except Exception as e:
+                logging.error(f"Listener {listener.subfolder_name} failed: {e}")
+                self.log_signal.emit(f"{listener.tag} ❌ {e}")
+
+            with self._cond:
+                heapq.heappush(self._due, (time.monotonic() + self._delay(listener, received),
+                                           next(self._seq), listener))
+                self._cond.notify()
 
-    def extract_files(self, startupinfo, tag):
-        for root, dirs, files in os.walk(self.target_dir):
-            for f in files:
-                if f.endswith(".7z"):
-                    filepath = os.path.join(root, f)
-                    subprocess.run([self._7z_path, "x", "-y", filepath, f"-o{root}"],
-                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, startupinfo=startupinfo)
-                    try:
-                        os.remove(filepath)
-                        self.log_signal.emit(f"{tag} 📦 Unzipped: {f[:-3]}")
-                        self.extracted_signal.emit()
-                    except OSError:
-                        pass
+    def _delay(self, listener, received):
+        if received or not listener.idle_polls:
+            return 0
+        return min(self.idle_backoff, self.poll_interval * 2 ** min(listener.idle_polls - 1, 16))
 
     def _get_startup_info(self):
         if os.name == 'nt':
@@ -388,4 +1229,5 @@ class AutoRecvWorker(QThread):
 
     def stop(self):
         self.is_running = False
-        if self.process: self.process.terminate()
\ No newline at end of file
+        for listener in self.listeners:
+            listener.stop()